@@ -0,0 +1,71 @@
+"""Compare vectorized GNSSVehicleCoordinatesEstimator.predict with the per-row loop
+
+Usage:
+    python -m benchmarks.bench_coordinates_estimator --samples 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+from gnss_localization.projection_matrix import build_projection_matrix
+
+
+def loop_predict(estimator: GNSSVehicleCoordinatesEstimator, inputs: np.ndarray):
+    """Per-row implementation that predict used before vectorization"""
+    gnss_coordinates = np.asanyarray(
+        [
+            build_projection_matrix(roll, pitch, yaw)
+            @ estimator.proj_estimator.gnss_vector
+            for _, _, _, roll, pitch, yaw in inputs
+        ]
+    ).reshape(-1, 3)
+    return np.asanyarray(
+        [
+            build_projection_matrix(0, 0, 0) @ (plane_coordinates - gnss_coords)
+            for gnss_coords, plane_coordinates in zip(gnss_coordinates, inputs[:, :3])
+        ]
+    )
+
+
+def best_of(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    inputs = np.hstack(
+        [
+            rng.normal(0, 10_000, size=(args.samples, 3)),
+            np.deg2rad(rng.normal(0, 5, size=(args.samples, 3))),
+        ]
+    )
+    estimator = GNSSVehicleCoordinatesEstimator(0, 0, 1500)
+    out = np.empty((args.samples, 3))
+
+    assert np.allclose(loop_predict(estimator, inputs), estimator.predict(inputs))
+
+    loop_time = best_of(lambda: loop_predict(estimator, inputs), args.repeats)
+    vector_time = best_of(lambda: estimator.predict(inputs), args.repeats)
+    out_time = best_of(lambda: estimator.predict(inputs, out=out), args.repeats)
+
+    print(f"samples:            {args.samples}")
+    print(f"loop:               {loop_time * 1e3:10.2f} ms")
+    print(f"vectorized:         {vector_time * 1e3:10.2f} ms")
+    print(f"vectorized + out=:  {out_time * 1e3:10.2f} ms")
+    print(f"speedup:            {loop_time / vector_time:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Per-sample latency of GNSSOnlineEstimator.update against the batch estimators
+
+Usage:
+    python -m benchmarks.bench_online_latency --samples 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from gnss_localization.heading_estimator import GNSSHeadingEstimator
+from gnss_localization.online_estimator import GNSSOnlineEstimator
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+
+
+def batch_update(proj_estimator, coord_estimator, heading_estimator, origin, sample):
+    """Single sample through the batch estimators, as in the README example"""
+    projection = proj_estimator.predict(sample)
+    vehicle_coordinates = coord_estimator.predict(sample)
+    heading = heading_estimator.predict(vehicle_coordinates, origin=origin)
+    return projection, vehicle_coordinates, heading
+
+
+def measure(update, samples) -> np.ndarray:
+    latencies = np.empty(len(samples))
+    clock = time.perf_counter_ns
+    for i, sample in enumerate(samples):
+        start = clock()
+        update(sample)
+        latencies[i] = clock() - start
+    return latencies
+
+
+def report(name: str, latencies: np.ndarray) -> None:
+    p50, p99 = np.percentile(latencies, [50, 99]) / 1e3
+    print(f"{name:<12} p50: {p50:8.2f} us   p99: {p99:8.2f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    inputs = np.hstack(
+        [
+            np.cumsum(rng.normal(100, 10, size=(args.samples, 3)), axis=0),
+            np.deg2rad(rng.normal(0, 5, size=(args.samples, 3))),
+        ]
+    )
+    samples = inputs.tolist()
+    north = (0, 1, 0)
+
+    online = GNSSOnlineEstimator(0, 0, 1500, north_direction=north)
+    online_latencies = measure(lambda sample: online.update(*sample), samples)
+
+    proj_estimator = GNSSProjectionEstimator(0, 0, 1500)
+    coord_estimator = GNSSVehicleCoordinatesEstimator(0, 0, 1500)
+    heading_estimator = GNSSHeadingEstimator(0, 0, 1500, north_direction=north)
+    origin = coord_estimator.predict(samples[0])[0]
+    batch_latencies = measure(
+        lambda sample: batch_update(
+            proj_estimator, coord_estimator, heading_estimator, origin, sample
+        ),
+        samples,
+    )
+
+    print(f"samples: {args.samples}")
+    report("online", online_latencies)
+    report("batch API", batch_latencies)
+
+
+if __name__ == "__main__":
+    main()
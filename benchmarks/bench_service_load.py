@@ -0,0 +1,138 @@
+"""Throughput and tail latency of the estimator service under concurrent clients
+
+Usage:
+    python -m benchmarks.bench_service_load --clients 64 --requests 2000
+    python -m benchmarks.bench_service_load --socket /tmp/gnssl.sock --operation proj
+
+Every client is a connection sending single-sample requests one after another,
+the clients run in several processes.
+Without --socket or --port a service is started in a subprocess on a temporary
+Unix socket.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from gnss_localization.service import (
+    OP_COORDINATES,
+    OP_HEADING,
+    OP_PROJECTION,
+    ServiceClient,
+)
+
+OPERATIONS = {"proj": OP_PROJECTION, "coords": OP_COORDINATES, "heading": OP_HEADING}
+
+
+async def run_client(address, operation, samples) -> np.ndarray:
+    client = await ServiceClient.connect(*address)
+    latencies = np.empty(len(samples))
+    clock = time.perf_counter_ns
+    try:
+        for i, sample in enumerate(samples):
+            start = clock()
+            await client.request(operation, sample)
+            latencies[i] = clock() - start
+    finally:
+        await client.close()
+    return latencies
+
+
+async def run_load(address, operation, clients, requests, seed=0):
+    rng = np.random.default_rng(seed)
+    width = 9 if operation == OP_HEADING else 6
+    samples = rng.normal(0, 1000, size=(clients, requests, width))
+    start = time.perf_counter()
+    latencies = await asyncio.gather(
+        *(run_client(address, operation, samples[i]) for i in range(clients))
+    )
+    return np.concatenate(latencies), time.perf_counter() - start
+
+
+def run_process(args):
+    return asyncio.run(run_load(*args))
+
+
+def start_service(socket_path: Path, max_wait_ms: float) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gnss_localization.cli",
+            "serve",
+            "--socket",
+            str(socket_path),
+            "--north",
+            "0",
+            "1",
+            "0",
+            "--max-wait-ms",
+            str(max_wait_ms),
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while not socket_path.exists():
+        if process.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("Service did not start")
+        time.sleep(0.05)
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", type=Path, default=None)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=4,
+        help="clients are spread over processes, so the generator is not the limit",
+    )
+    parser.add_argument("--operation", choices=OPERATIONS, default="heading")
+    parser.add_argument(
+        "--max-wait-ms", type=float, default=0.5, help="of the started service"
+    )
+    args = parser.parse_args()
+
+    process = None
+    socket_path = args.socket
+    if socket_path is None and args.port is None:
+        socket_path = Path(tempfile.mkdtemp()) / "gnssl.sock"
+        process = start_service(socket_path, args.max_wait_ms)
+    try:
+        address = (socket_path, args.host, args.port)
+        jobs = [
+            (address, OPERATIONS[args.operation], clients, args.requests, seed)
+            for seed, clients in enumerate(
+                np.diff(np.linspace(0, args.clients, args.processes + 1).astype(int))
+            )
+        ]
+        with ProcessPoolExecutor(args.processes) as executor:
+            results = list(executor.map(run_process, jobs))
+        latencies = np.concatenate([result[0] for result in results])
+        seconds = max(result[1] for result in results)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+            os.unlink(socket_path)
+
+    p50, p99, worst = np.percentile(latencies, [50, 99, 100]) / 1e3
+    print(f"clients: {args.clients}  requests: {len(latencies)}  {args.operation}")
+    print(f"throughput: {len(latencies) / seconds:10.0f} requests/s")
+    print(f"latency     p50: {p50:8.1f} us   p99: {p99:8.1f} us   max: {worst:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Scaling of the estimators over threads computing chunks of rows
+
+Usage:
+    python -m benchmarks.bench_threads --samples 4000000 --threads 1 2 4 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+from gnss_localization.heading_estimator import GNSSHeadingEstimator
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+
+
+def best_of(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=4_000_000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    inputs = np.hstack(
+        [
+            rng.normal(0, 10_000, size=(args.samples, 3)),
+            np.deg2rad(rng.normal(0, 5, size=(args.samples, 3))),
+        ]
+    )
+    projection = GNSSProjectionEstimator(120, -40, 1500)
+    coordinates = GNSSVehicleCoordinatesEstimator(120, -40, 1500)
+    heading = GNSSHeadingEstimator(0, 0, 0, (0, 1, 0))
+    vehicle_coordinates = coordinates.predict(inputs)
+    out = np.empty((args.samples, 3))
+    stages = {
+        "projections": lambda pool: projection.predict(inputs, out, executor=pool),
+        "coordinates": lambda pool: coordinates.predict(inputs, out, executor=pool),
+        "headings": lambda pool: heading.predict(vehicle_coordinates, executor=pool),
+    }
+
+    print(f"samples: {args.samples}, cores: {os.cpu_count()}")
+    print(f"{'stage':<12} {'threads':>7} {'ms':>10} {'rows/s':>12} {'speedup':>8}")
+    for stage, predict in stages.items():
+        baseline = None
+        for threads in args.threads:
+            with ThreadPoolExecutor(threads) as pool:
+                predict(pool)
+                seconds = best_of(lambda: predict(pool), args.repeats)
+            baseline = baseline or seconds
+            print(
+                f"{stage:<12} {threads:>7} {seconds * 1e3:>10.2f}"
+                f" {args.samples / seconds:>12.3g} {baseline / seconds:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
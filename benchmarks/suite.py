@@ -0,0 +1,241 @@
+"""Benchmark suite for the estimators and the CLI across data sizes
+
+Usage:
+    python -m benchmarks.suite run --output results.json
+    python -m benchmarks.suite run --sizes 1e2 1e4 1e6 --stages proj_predict cli_proj
+    python -m benchmarks.suite compare baseline.json results.json --threshold 0.1
+
+`run` times every stage on synthetic trajectories and writes throughput and peak
+memory as JSON, `compare` flags stages whose throughput dropped by more than the
+threshold against a saved baseline and exits with code 1 if any did.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from gnss_localization.heading_estimator import GNSSHeadingEstimator
+from gnss_localization.pipeline import prepare_inputs
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.projection_matrix import build_projection_matrix
+from gnss_localization.rotation_cache import RotationCache
+from gnss_localization.smoothing import GNSSTrackSmoother
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+
+DEFAULT_SIZES = [10**power for power in range(2, 8)]
+MISSING = ["z_mm", "yaw_deg"]
+# The per-call matrix builder runs a Python loop, larger sizes are extrapolated
+MATRIX_SAMPLE_LIMIT = 100_000
+STAGES = (
+    "build_projection_matrix",
+    "proj_predict",
+    "proj_predict_cached",
+    "coords_predict",
+    "heading_predict",
+    "track_smooth",
+    "cli_proj",
+    "cli_heading",
+)
+
+
+def synthetic_track(n_samples: int, seed: int = 0) -> pd.DataFrame:
+    """Trajectory in the layout of `data.csv`: a noisy curve with small tilts"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples) * 0.1
+    heading = np.cumsum(rng.normal(0, 0.01, n_samples))
+    return pd.DataFrame(
+        {
+            "time_s": 1.6e9 + t,
+            "x_mm": np.cumsum(1000 * np.sin(heading)) + rng.normal(0, 20, n_samples),
+            "y_mm": np.cumsum(1000 * np.cos(heading)) + rng.normal(0, 20, n_samples),
+            "roll_deg": rng.normal(0, 2, n_samples),
+            "pitch_deg": rng.normal(0, 2, n_samples),
+        }
+    )
+
+
+def measure(func: Callable[[], object], repeats: int) -> Dict[str, float]:
+    """Best wall time of several runs and peak traced memory of one run"""
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(seconds), "peak_mb": peak / 2**20}
+
+
+def measure_process(command: List[str], repeats: int) -> Dict[str, float]:
+    """Best wall time and peak resident memory of a child process"""
+    seconds, peak_mb = [], 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds.append(time.perf_counter() - start)
+        if os.waitstatus_to_exitcode(status):
+            raise RuntimeError(f"Command failed: {' '.join(command)}")
+        peak_mb = max(peak_mb, usage.ru_maxrss / 2**10)
+    return {"seconds": min(seconds), "peak_mb": peak_mb}
+
+
+def stage_runners(
+    n_samples: int, track: pd.DataFrame, workdir: Path, repeats: int
+) -> Dict[str, Callable[[], Dict[str, float]]]:
+    inputs = prepare_inputs(track, MISSING)
+    proj_estimator = GNSSProjectionEstimator(0, 0, 1500)
+    coord_estimator = GNSSVehicleCoordinatesEstimator(0, 0, 1500)
+    vehicle_coordinates = coord_estimator.predict(inputs)
+    times = track["time_s"].to_numpy()
+    matrix_samples = inputs[:MATRIX_SAMPLE_LIMIT, 3:]
+
+    def build_matrices():
+        for roll, pitch, yaw in matrix_samples:
+            build_projection_matrix(roll, pitch, yaw)
+
+    def matrix_stage():
+        result = measure(build_matrices, repeats)
+        result["seconds"] *= n_samples / len(matrix_samples)
+        return result
+
+    def cli_stage(command: str) -> Callable[[], Dict[str, float]]:
+        data_path = workdir / "track.csv"
+        if not data_path.exists():
+            track.to_csv(data_path, index=False)
+        return lambda: measure_process(
+            [
+                sys.executable,
+                "-m",
+                "gnss_localization.cli",
+                command,
+                "--data",
+                str(data_path),
+                "--output",
+                str(workdir / f"{command}.csv"),
+                "--no-visualize",
+            ],
+            repeats,
+        )
+
+    return {
+        "build_projection_matrix": matrix_stage,
+        "proj_predict": lambda: measure(
+            lambda: proj_estimator.predict(inputs), repeats
+        ),
+        "proj_predict_cached": lambda: measure(
+            lambda: GNSSProjectionEstimator(0, 0, 1500, RotationCache()).predict(
+                inputs
+            ),
+            repeats,
+        ),
+        "coords_predict": lambda: measure(
+            lambda: coord_estimator.predict(inputs), repeats
+        ),
+        "heading_predict": lambda: measure(
+            lambda: GNSSHeadingEstimator(0, 0, 1500, None).predict(vehicle_coordinates),
+            repeats,
+        ),
+        "track_smooth": lambda: measure(
+            lambda: GNSSTrackSmoother().smooth(times, vehicle_coordinates), repeats
+        ),
+        "cli_proj": cli_stage("proj"),
+        "cli_heading": cli_stage("heading"),
+    }
+
+
+def run(args: argparse.Namespace) -> None:
+    results = []
+    for n_samples in sorted(int(float(size)) for size in args.sizes):
+        track = synthetic_track(n_samples)
+        with tempfile.TemporaryDirectory() as workdir:
+            runners = stage_runners(n_samples, track, Path(workdir), args.repeats)
+            for stage in args.stages or runners:
+                result = runners[stage]()
+                result.update(
+                    stage=stage,
+                    n_samples=n_samples,
+                    rows_per_s=n_samples / result["seconds"],
+                )
+                results.append(result)
+                print(
+                    f"{stage:<24} n={n_samples:<9} {result['seconds']:10.4f} s"
+                    f" {result['rows_per_s']:14.0f} rows/s"
+                    f" {result['peak_mb']:10.1f} MB peak"
+                )
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+def compare(args: argparse.Namespace) -> None:
+    baseline = json.loads(Path(args.baseline).read_text())["results"]
+    current = json.loads(Path(args.current).read_text())["results"]
+    reference = {(entry["stage"], entry["n_samples"]): entry for entry in baseline}
+
+    regressions = 0
+    for entry in current:
+        key = (entry["stage"], entry["n_samples"])
+        if key not in reference:
+            continue
+        change = entry["rows_per_s"] / reference[key]["rows_per_s"] - 1
+        memory = entry["peak_mb"] - reference[key]["peak_mb"]
+        flag = ""
+        if change < -args.threshold:
+            flag = "REGRESSION"
+            regressions += 1
+        print(
+            f"{key[0]:<24} n={key[1]:<9} throughput {change:+8.1%}"
+            f"  peak memory {memory:+9.1f} MB  {flag}"
+        )
+    if regressions:
+        print(f"{regressions} regressions over {args.threshold:.0%} threshold")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmarks")
+    run_parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES)
+    run_parser.add_argument("--repeats", type=int, default=3)
+    run_parser.add_argument("--output", help="Path to JSON results")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="Compare with baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -36,4 +36,4 @@ estimator = gnssl.GNSSHeadingEstimator(
     offset_x=0.0, offset_y=0.0, offset_z=1500.0, north_direction=(0, 1, 0)
 )
 heading = estimator.predict(np.asanyarray(vehicle_coordinates).reshape(-1, 3))
-print(heading) [43.02760911 55.47551315 50.60675111]
+print(heading)  # [338.47356315 308.53286053 317.19855435]
@@ -1,4 +1,14 @@
 from gnss_localization.heading_estimator import GNSSHeadingEstimator
 from gnss_localization.projection_estimator import GNSSProjectionEstimator
 from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
-from gnss_localization.visualizations import *
+from gnss_localization.online_estimator import GNSSOnlineEstimator
+from gnss_localization.fleet_estimator import GNSSFleetEstimator
+
+
+def __getattr__(name):
+    # matplotlib is imported on first use of a visualization, not with the package
+    if name in ("animate_projections", "plot_headings"):
+        from gnss_localization import visualizations
+
+        return getattr(visualizations, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,238 @@
+import copy
+import glob
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Collection, Dict, List, Optional, Sequence
+
+from gnss_localization.pipeline import run_headings, run_projections
+from gnss_localization.profiling import Profiler
+
+INPUT_SUFFIXES = (".csv", ".nmea", ".npy", ".npz")
+MANIFEST_NAME = "manifest.json"
+
+
+def find_inputs(pattern: str) -> List[Path]:
+    """Collect files with moving data
+
+    Args:
+        pattern (str): Directory with data files or glob pattern
+
+    Returns:
+        List[Path]: Sorted paths to data files
+    """
+    path = Path(pattern)
+    if path.is_dir():
+        paths = (child for child in path.iterdir() if child.suffix in INPUT_SUFFIXES)
+    else:
+        paths = (Path(match) for match in glob.glob(pattern, recursive=True))
+    return sorted(path for path in paths if path.is_file())
+
+
+def output_paths(
+    inputs: Sequence[Path], output_dir: Path, output_suffix: str
+) -> List[Path]:
+    """Result paths that mirror the layout of inputs under their common directory
+
+    Inputs in different subdirectories keep their subdirectories, inputs that
+    differ only by extension, like `x.csv` and `x.nmea`, get it in the name:
+    `x-csv.csv` and `x-nmea.csv`.
+
+    Args:
+        inputs (Sequence[Path]): Paths to files with moving data
+        output_dir (Path): Directory for results
+        output_suffix (str): Extension of result files
+
+    Returns:
+        List[Path]: Path to results of every input
+    """
+    if not inputs:
+        return []
+    root = Path(os.path.commonpath([path.resolve().parent for path in inputs]))
+    relative = [path.resolve().relative_to(root).with_suffix("") for path in inputs]
+    counts: Dict[Path, int] = {}
+    for name in relative:
+        counts[name] = counts.get(name, 0) + 1
+    return [
+        output_dir
+        / name.with_name(
+            f"{name.name}-{path.suffix[1:]}{output_suffix}"
+            if counts[name] > 1
+            else f"{name.name}{output_suffix}"
+        )
+        for path, name in zip(inputs, relative)
+    ]
+
+
+def process_file(
+    mode: str,
+    data_path: Path,
+    output_path: Path,
+    estimators: Sequence[Any],
+    missing: Collection[str] = (),
+    chunk_size: Optional[int] = None,
+    profile: bool = False,
+) -> Dict[str, Any]:
+    """Process single file and describe the outcome
+
+    Estimators are copied, so state computed from the data of one file, like the
+    north vector of `GNSSHeadingEstimator`, never leaks into another file.
+
+    Args:
+        mode (str): "proj" for GNSS projections or "heading" for vehicle headings
+        data_path (Path): Path to file with moving data
+        output_path (Path): Path to results
+        estimators (Sequence[Any]): Configured `GNSSProjectionEstimator` for "proj"
+        mode, or `GNSSVehicleCoordinatesEstimator` and `GNSSHeadingEstimator` for
+        "heading" mode
+        missing (Collection[str], optional): Columns that are unavailable.
+        Defaults to ().
+        chunk_size (Optional[int], optional): Number of rows per chunk in streaming
+        mode. Defaults to None.
+        profile (bool, optional): Add timings, rows and peak memory of pipeline
+        stages to the entry under "stages" key. Defaults to False.
+
+    Returns:
+        Dict[str, Any]: Manifest entry with paths, row count, timing and error
+    """
+    entry: Dict[str, Any] = {"input": str(data_path), "output": str(output_path)}
+    stats: Dict[str, float] = {"rows": 0}
+    profiler = Profiler(enabled=profile)
+    start = time.perf_counter()
+    try:
+        estimators = copy.deepcopy(estimators)
+        if mode == "proj":
+            run_projections(
+                data_path,
+                output_path,
+                *estimators,
+                missing,
+                chunk_size,
+                stats,
+                profiler,
+            )
+        else:
+            run_headings(
+                data_path,
+                output_path,
+                *estimators,
+                missing,
+                chunk_size,
+                stats,
+                profiler,
+            )
+        entry.update(status="ok", error=None)
+    except Exception as error:  # pylint: disable=broad-except
+        entry.update(status="failed", error=f"{type(error).__name__}: {error}")
+    entry.update(rows=int(stats["rows"]), seconds=time.perf_counter() - start)
+    if profile:
+        entry["stages"] = profiler.stages
+    return entry
+
+
+def run_batch(
+    inputs: Sequence[Path],
+    output_dir: Path,
+    mode: str,
+    estimators: Sequence[Any],
+    missing: Collection[str] = (),
+    chunk_size: Optional[int] = None,
+    jobs: int = 1,
+    output_suffix: str = ".csv",
+    profile: bool = False,
+) -> Dict[str, Any]:
+    """Process many files on a pool of processes
+
+    One output per input is written to `output_dir`, see `output_paths`, together
+    with a JSON manifest listing row counts, timings and failures. Inputs whose
+    output path is taken by an earlier input, or is the path of an input, are not
+    processed and are listed as failed.
+
+    Args:
+        inputs (Sequence[Path]): Paths to files with moving data
+        output_dir (Path): Directory for results and manifest
+        mode (str): "proj" for GNSS projections or "heading" for vehicle headings
+        estimators (Sequence[Any]): Estimators shared by all files, see
+        `process_file`
+        missing (Collection[str], optional): Columns that are unavailable.
+        Defaults to ().
+        chunk_size (Optional[int], optional): Number of rows per chunk in streaming
+        mode. Defaults to None.
+        jobs (int, optional): Number of worker processes, files are processed in
+        the current process if 1. Defaults to 1.
+        output_suffix (str, optional): Extension of result files, which selects
+        their format. Defaults to ".csv".
+        profile (bool, optional): Record pipeline stages of every file and add
+        their totals to the manifest under "stages" key, peak memory is the
+        maximum over files. Defaults to False.
+
+    Returns:
+        Dict[str, Any]: Manifest
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tasks, collisions = [], {}
+    sources = {path.resolve(): path for path in inputs}
+    written: Dict[Path, Path] = {}
+    for path, output_path in zip(
+        inputs, output_paths(inputs, output_dir, output_suffix)
+    ):
+        resolved = output_path.resolve()
+        if resolved in sources:
+            error = f"Output would overwrite the input {sources[resolved]}"
+        elif resolved in written:
+            error = f"Output collides with the output of {written[resolved]}"
+        else:
+            error = None
+        if error is not None:
+            collisions[len(tasks)] = {
+                "input": str(path),
+                "output": str(output_path),
+                "status": "failed",
+                "error": error,
+                "rows": 0,
+                "seconds": 0.0,
+            }
+        else:
+            written[resolved] = path
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+        tasks.append((mode, path, output_path))
+    runnable = [task for i, task in enumerate(tasks) if i not in collisions]
+
+    start = time.perf_counter()
+    if jobs == 1 or len(runnable) < 2:
+        results = [
+            process_file(*task, estimators, missing, chunk_size, profile)
+            for task in runnable
+        ]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(
+                    process_file, *task, estimators, missing, chunk_size, profile
+                )
+                for task in runnable
+            ]
+            results = [future.result() for future in futures]
+    processed = iter(results)
+    files = [collisions.get(i) or next(processed) for i in range(len(tasks))]
+
+    manifest = {
+        "mode": mode,
+        "jobs": jobs,
+        "files_total": len(files),
+        "files_failed": sum(entry["status"] != "ok" for entry in files),
+        "rows": sum(entry["rows"] for entry in files),
+        "seconds": time.perf_counter() - start,
+        "files": files,
+    }
+    if profile:
+        profiler = Profiler()
+        for entry in files:
+            profiler.merge(entry.get("stages", {}))
+        manifest["stages"] = profiler.stages
+    with open(output_dir / MANIFEST_NAME, "w") as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
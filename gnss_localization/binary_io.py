@@ -0,0 +1,128 @@
+import struct
+import numpy as np
+from pathlib import Path
+from typing import Sequence, Tuple
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_SHAPE_RESERVE = 10**19
+
+
+def _npy_header(columns: Sequence[str], n_rows: int, size: int = 0) -> bytes:
+    """Header of .npy file with one little-endian float64 field per column
+
+    Args:
+        columns (Sequence[str]): Names of the columns
+        n_rows (int): Number of records in the file
+        size (int, optional): Total size of the header in bytes. If 0 the header is
+        sized to fit any number of rows, so records can be appended later without
+        moving the data. Defaults to 0.
+
+    Returns:
+        bytes: Header of .npy file
+    """
+    descr = [(column, "<f8") for column in columns]
+    header = repr({"descr": descr, "fortran_order": False, "shape": (n_rows,)})
+    if not size:
+        reserve = repr({"descr": descr, "fortran_order": False, "shape": (0,)})
+        reserve = len(reserve) + len(str(NPY_SHAPE_RESERVE))
+        size = -(-(len(NPY_MAGIC) + 2 + reserve + 1) // 64) * 64
+    header = header.ljust(size - len(NPY_MAGIC) - 2 - 1) + "\n"
+    return NPY_MAGIC + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+def save_records(
+    path: Path, results: np.ndarray, columns: Sequence[str], append: bool = False
+) -> None:
+    """Write rows as little-endian float64 records to .npy file
+
+    Files written by this function can be opened with `np.load` and grown by
+    appending more rows, the header is rewritten in place.
+
+    Args:
+        path (Path): Path to .npy file
+        results (np.ndarray): Array with one column per name in `columns`
+        columns (Sequence[str]): Names of the columns
+        append (bool, optional): Append rows to existing file. Defaults to False.
+
+    Raises:
+        ValueError: If existing file has different columns or can not be appended
+    """
+    rows = np.ascontiguousarray(results, dtype="<f8").reshape(len(results), -1)
+    if not append:
+        with open(path, "wb") as file:
+            file.write(_npy_header(columns, len(rows)))
+            file.write(rows.tobytes())
+        return
+
+    with open(path, "r+b") as file:
+        np.lib.format.read_magic(file)
+        (n_rows,), _, dtype = np.lib.format.read_array_header_1_0(file)
+        header_size = file.tell()
+        if dtype.names != tuple(columns):
+            raise ValueError(f"Can not append columns {columns} to {dtype.names}")
+        header = _npy_header(columns, n_rows + len(rows), header_size)
+        if len(header) != header_size:
+            raise ValueError(f"Header of {path} has no room to append records")
+        file.seek(header_size + n_rows * dtype.itemsize)
+        file.write(rows.tobytes())
+        file.seek(0)
+        file.write(header)
+
+
+def load_records(path: Path, mmap: bool = True) -> np.ndarray:
+    """Open .npy file with float64 records
+
+    Args:
+        path (Path): Path to .npy file
+        mmap (bool, optional): Memory-map the file instead of reading it, slices of
+        the result do not copy the data. Defaults to True.
+
+    Returns:
+        np.ndarray: Structured array with one field per column
+    """
+    return np.load(str(path), mmap_mode="r" if mmap else None)
+
+
+def records_view(records: np.ndarray, columns: Sequence[str]) -> np.ndarray:
+    """View of record fields as 2D float64 array
+
+    No data is copied, so a slice of a memory-mapped file can be passed to the
+    estimators directly.
+
+    Args:
+        records (np.ndarray): Structured array with float64 fields
+        columns (Sequence[str]): Fields to select, in order of the result columns
+
+    Returns:
+        np.ndarray: Array of shape NxK, where K is number of columns
+    """
+    # recfunctions pulls in numpy.ma, which is slow to import
+    import numpy.lib.recfunctions as rfn
+
+    return rfn.structured_to_unstructured(records[list(columns)], copy=False)
+
+
+def load_columns(path: Path) -> Tuple[np.ndarray, Tuple[str, ...]]:
+    """Read .npz file with one array per column
+
+    Args:
+        path (Path): Path to .npz file
+
+    Returns:
+        Tuple[np.ndarray, Tuple[str, ...]]: Array of shape NxK and column names
+    """
+    with np.load(str(path)) as columns:
+        names = tuple(columns.files)
+        return np.column_stack([columns[name] for name in names]), names
+
+
+def save_columns(path: Path, results: np.ndarray, columns: Sequence[str]) -> None:
+    """Write each column to .npz file as separate array
+
+    Args:
+        path (Path): Path to .npz file
+        results (np.ndarray): Array with one column per name in `columns`
+        columns (Sequence[str]): Names of the columns
+    """
+    results = results.reshape(len(results), len(columns))
+    np.savez(str(path), **{column: results[:, i] for i, column in enumerate(columns)})
@@ -0,0 +1,400 @@
+import hashlib
+import io
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Collection, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+from gnss_localization.heading_estimator import GNSSHeadingEstimator
+from gnss_localization.pipeline import (
+    HEADING_COLUMNS,
+    INPUT_COLUMNS,
+    PROJECTION_COLUMNS,
+    check_inputs,
+    import_pandas,
+    prepare_inputs,
+    read_data,
+    write_results,
+)
+from gnss_localization.profiling import Profiler
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+
+CACHE_VERSION = 1
+INDEX_NAME = "index.json"
+BLOCK_SIZE = 1 << 20
+
+
+def default_cache_dir() -> Path:
+    """Cache directory from `GNSSL_CACHE_DIR` or `~/.cache/gnssl`"""
+    return Path(
+        os.environ.get("GNSSL_CACHE_DIR", Path.home() / ".cache" / "gnssl")
+    ).expanduser()
+
+
+def file_digests(path: Path, prefix_sizes: Collection[int] = ()) -> Dict[int, str]:
+    """Hash file and its prefixes in a single read
+
+    Args:
+        path (Path): Path to file
+        prefix_sizes (Collection[int], optional): Sizes in bytes of prefixes to
+        hash as well. Defaults to ().
+
+    Returns:
+        Dict[int, str]: Digest by prefix size, the whole file is under its size
+    """
+    size = os.path.getsize(path)
+    stops = sorted({s for s in prefix_sizes if 0 < s < size} | {size})
+    hasher = hashlib.blake2b(digest_size=16)
+    digests = {}
+    position = 0
+    with open(path, "rb") as file:
+        for stop in stops:
+            while position < stop:
+                block = file.read(min(BLOCK_SIZE, stop - position))
+                hasher.update(block)
+                position += len(block)
+            digests[stop] = hasher.copy().hexdigest()
+    return digests
+
+
+class ResultCache:
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = 1 << 30):
+        """On-disk cache of estimator results keyed by content of input files.
+
+        Entries are arrays in .npy files listed in a JSON index. When the cache
+        grows over `max_bytes`, least recently used entries are removed.
+
+        Args:
+            directory (Optional[Path], optional): Cache directory. Defaults to
+            `default_cache_dir()`.
+            max_bytes (int, optional): Upper bound on size of stored arrays.
+            Defaults to 1 GiB.
+        """
+        self.directory = Path(directory or default_cache_dir())
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.directory / INDEX_NAME) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: Dict[str, Dict[str, Any]]) -> None:
+        # concurrent writers may lose entries of each other, but never corrupt it
+        temporary = self.directory / f"{INDEX_NAME}.{os.getpid()}"
+        with open(temporary, "w") as file:
+            json.dump(index, file)
+        os.replace(temporary, self.directory / INDEX_NAME)
+
+    def lookup(
+        self, params_key: str, data_path: Path
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray], Dict[int, str]]:
+        """Find cached results for the whole file or for its longest prefix
+
+        Args:
+            params_key (str): Hash of estimator parameters, see `params_key`
+            data_path (Path): Path to input file
+
+        Returns:
+            Tuple[Optional[Dict[str, Any]], Optional[np.ndarray], Dict[int, str]]:
+            Matching entry and its results, or None if nothing matches, and
+            digests of the file and prefixes of candidate entries
+        """
+        index = self._read_index()
+        candidates = {
+            name: entry
+            for name, entry in index.items()
+            if entry["params"] == params_key
+        }
+        digests = file_digests(
+            data_path,
+            [entry["size"] for entry in candidates.values() if entry["appendable"]],
+        )
+        size = max(digests)
+        best = None
+        for name, entry in candidates.items():
+            if digests.get(entry["size"]) != entry["digest"]:
+                continue
+            if entry["size"] < size and not entry["appendable"]:
+                continue
+            if best is None or entry["size"] > index[best]["size"]:
+                best = name
+        if best is None:
+            return None, None, digests
+        try:
+            results = np.load(self.directory / index[best]["file"])
+        except (OSError, ValueError):
+            return None, None, digests
+        index[best]["last_used"] = time.time()
+        self._write_index(index)
+        return index[best], results, digests
+
+    def store(
+        self,
+        params_key: str,
+        digests: Dict[int, str],
+        results: np.ndarray,
+        appendable: bool,
+        replaces: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Add results for a file and evict least recently used entries
+
+        Args:
+            params_key (str): Hash of estimator parameters
+            digests (Dict[int, str]): Digests of the file from `lookup`
+            results (np.ndarray): Results for the whole file
+            appendable (bool): The file may grow by appended rows, i.e. it is a
+            text file ending with a line break
+            replaces (Optional[Dict[str, Any]], optional): Entry of a prefix of the
+            file, which is superseded and removed. Defaults to None.
+        """
+        size = max(digests)
+        name = f"{params_key}-{digests[size]}"
+        np.save(self.directory / f"{name}.npy", results)
+        index = self._read_index()
+        if replaces is not None:
+            index.pop(f"{params_key}-{replaces['digest']}", None)
+            if replaces["file"] != f"{name}.npy":
+                _remove(self.directory / replaces["file"])
+        index[name] = {
+            "params": params_key,
+            "size": size,
+            "digest": digests[size],
+            "appendable": appendable,
+            "rows": len(results),
+            "file": f"{name}.npy",
+            "bytes": results.nbytes,
+            "last_used": time.time(),
+        }
+        self._evict(index)
+        self._write_index(index)
+
+    def _evict(self, index: Dict[str, Dict[str, Any]]) -> None:
+        total = sum(entry["bytes"] for entry in index.values())
+        for name in sorted(index, key=lambda name: index[name]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= index[name]["bytes"]
+            _remove(self.directory / index.pop(name)["file"])
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        for entry in self._read_index().values():
+            _remove(self.directory / entry["file"])
+        self._write_index({})
+
+
+def _remove(path: Path) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _rotation_resolution(
+    estimator: Union[GNSSProjectionEstimator, GNSSVehicleCoordinatesEstimator],
+) -> Optional[float]:
+    """Quantization step of the rotation cache, None if results are exact"""
+    estimator = getattr(estimator, "proj_estimator", estimator)
+    if estimator.rotation_cache is None:
+        return None
+    return estimator.rotation_cache.resolution
+
+
+def params_key(
+    kind: str,
+    estimator: Union[GNSSProjectionEstimator, GNSSVehicleCoordinatesEstimator],
+    missing: Collection[str],
+    attitude_path: Optional[Path] = None,
+) -> str:
+    """Hash of everything besides the input file that results depend on
+
+    Args:
+        kind (str): Kind of cached results
+        estimator (Union[GNSSProjectionEstimator, GNSSVehicleCoordinatesEstimator]):
+        Configured estimator
+        missing (Collection[str]): Columns that are unavailable
+        attitude_path (Optional[Path], optional): Path to separately recorded
+        attitude. Defaults to None.
+
+    Returns:
+        str: Hex digest
+    """
+    params = {
+        "version": CACHE_VERSION,
+        "kind": kind,
+        "offsets": [estimator.offset_x, estimator.offset_y, estimator.offset_z],
+        "rotation_resolution": _rotation_resolution(estimator),
+        "dtype": estimator.dtype.str,
+        "missing": sorted(missing),
+        "attitude": None,
+    }
+    if attitude_path is not None:
+        params["attitude"] = file_digests(attitude_path)[os.path.getsize(attitude_path)]
+    return hashlib.blake2b(
+        json.dumps(params, sort_keys=True).encode(), digest_size=16
+    ).hexdigest()
+
+
+def _read_tail(data_path: Path, offset: int, missing: Collection[str]):
+    """Read CSV rows appended after `offset` bytes"""
+    import pandas as pd
+
+    with open(data_path, "rb") as file:
+        header = file.readline()
+        file.seek(offset)
+        tail = file.read()
+    columns = [column for column in INPUT_COLUMNS if column not in missing]
+    return pd.read_csv(
+        io.BytesIO(header + tail), usecols=columns, skipinitialspace=True
+    )
+
+
+def _cached_predict(
+    cache: ResultCache,
+    kind: str,
+    estimator: Union[GNSSProjectionEstimator, GNSSVehicleCoordinatesEstimator],
+    data_path: Path,
+    missing: Collection[str],
+    profiler: Profiler,
+    attitude_path: Optional[Path],
+) -> np.ndarray:
+    """Results of estimator for the file, reusing cached results of its prefix"""
+    key = params_key(kind, estimator, missing, attitude_path)
+    with profiler.stage("cache") as event:
+        entry, cached, digests = cache.lookup(key, data_path)
+        event["rows"] = 0 if cached is None else len(cached)
+    size = max(digests)
+    appendable = Path(data_path).suffix == ".csv" and attitude_path is None
+    if appendable:
+        with open(data_path, "rb") as file:
+            file.seek(max(size - 1, 0))
+            appendable = file.read(1) == b"\n"
+
+    if entry is not None and entry["size"] == size:
+        return cached
+
+    with profiler.stage("read") as event:
+        if entry is None:
+            data = read_data(data_path, missing, attitude_path=attitude_path)
+        else:
+            data = _read_tail(data_path, entry["size"], missing)
+        event["rows"] = len(data)
+    with profiler.stage("prepare", len(data)):
+        inputs = prepare_inputs(data, missing, estimator.dtype)
+    if entry is None:
+        check_inputs(inputs)
+    with profiler.stage("predict", len(inputs)):
+        results = estimator.predict(inputs)
+    if cached is not None:
+        results = np.concatenate([cached, results])
+    with profiler.stage("cache", 0):
+        cache.store(key, digests, results, appendable, replaces=entry)
+    return results
+
+
+def cached_projections(
+    cache: ResultCache,
+    data_path: Path,
+    output_path: Path,
+    estimator: GNSSProjectionEstimator,
+    missing: Collection[str] = (),
+    stats: Optional[Dict[str, float]] = None,
+    profiler: Optional[Profiler] = None,
+    attitude_path: Optional[Path] = None,
+) -> np.ndarray:
+    """Cached counterpart of `run_projections`
+
+    If the file was processed before with the same parameters, the results are
+    loaded from the cache. If rows were appended to a CSV file since then, only
+    the new rows are processed.
+
+    Args:
+        cache (ResultCache): Result cache
+        data_path (Path): Path to file with moving data
+        output_path (Path): Path to results
+        estimator (GNSSProjectionEstimator): Configured projection estimator
+        missing (Collection[str], optional): Columns that are unavailable.
+        Defaults to ().
+        stats (Optional[Dict[str, float]], optional): If set, number of processed
+        rows is stored under "rows" key. Defaults to None.
+        profiler (Optional[Profiler], optional): If set, stages are recorded,
+        including cache lookups and updates. Defaults to None.
+        attitude_path (Optional[Path], optional): Path to separately recorded
+        attitude. Defaults to None.
+
+    Returns:
+        np.ndarray: Projections
+    """
+    stats = {} if stats is None else stats
+    profiler = Profiler(enabled=False) if profiler is None else profiler
+    import_pandas(profiler)
+    projections = _cached_predict(
+        cache, "projections", estimator, data_path, missing, profiler, attitude_path
+    )
+    with profiler.stage("write", len(projections)):
+        write_results(projections, PROJECTION_COLUMNS, output_path, append=False)
+    stats["rows"] = len(projections)
+    return projections
+
+
+def cached_headings(
+    cache: ResultCache,
+    data_path: Path,
+    output_path: Path,
+    coord_estimator: GNSSVehicleCoordinatesEstimator,
+    heading_estimator: GNSSHeadingEstimator,
+    missing: Collection[str] = (),
+    stats: Optional[Dict[str, float]] = None,
+    profiler: Optional[Profiler] = None,
+    attitude_path: Optional[Path] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Cached counterpart of `run_headings`
+
+    Vehicle coordinates are cached and headings are recomputed from them every
+    time, because a north vector derived from the data changes when rows are
+    appended.
+
+    Args:
+        cache (ResultCache): Result cache
+        data_path (Path): Path to file with moving data
+        output_path (Path): Path to results
+        coord_estimator (GNSSVehicleCoordinatesEstimator): Configured coordinates
+        estimator
+        heading_estimator (GNSSHeadingEstimator): Configured heading estimator
+        missing (Collection[str], optional): Columns that are unavailable.
+        Defaults to ().
+        stats (Optional[Dict[str, float]], optional): If set, number of processed
+        rows is stored under "rows" key. Defaults to None.
+        profiler (Optional[Profiler], optional): If set, stages are recorded,
+        including cache lookups and updates. Defaults to None.
+        attitude_path (Optional[Path], optional): Path to separately recorded
+        attitude. Defaults to None.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Vehicle coordinates and headings
+    """
+    stats = {} if stats is None else stats
+    profiler = Profiler(enabled=False) if profiler is None else profiler
+    import_pandas(profiler)
+    vehicle_coordinates = _cached_predict(
+        cache,
+        "coordinates",
+        coord_estimator,
+        data_path,
+        missing,
+        profiler,
+        attitude_path,
+    )
+    with profiler.stage("headings", len(vehicle_coordinates)):
+        headings = heading_estimator.predict(vehicle_coordinates)
+    with profiler.stage("write", len(headings)):
+        write_results(headings, HEADING_COLUMNS, output_path, append=False)
+    stats["rows"] = len(vehicle_coordinates)
+    return vehicle_coordinates, headings
@@ -1,24 +1,125 @@
+import os
+from enum import Enum
 from pathlib import Path
-from typing import Optional, Tuple
-import typer
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
-import pandas as pd
+import typer
 
 from gnss_localization.heading_estimator import GNSSHeadingEstimator
 from gnss_localization.projection_estimator import GNSSProjectionEstimator
 from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
-from gnss_localization.visualizations import plot_headings, animate_projections
+from gnss_localization.batch import find_inputs, run_batch
+from gnss_localization.cache import ResultCache, cached_headings, cached_projections
+from gnss_localization.pipeline import (
+    INPUT_COLUMNS,
+    run_headings,
+    run_pipeline,
+    run_projections,
+)
+from gnss_localization.profiling import Profiler
+from gnss_localization.rotation_cache import RotationCache
+from gnss_localization.smoothing import GNSSTrackSmoother
 
 app = typer.Typer()
 
 
+class BatchMode(str, Enum):
+    proj = "proj"
+    heading = "heading"
+
+
+def missing_columns(
+    no_x: bool, no_y: bool, no_z: bool, no_roll: bool, no_pitch: bool, no_yaw: bool
+) -> List[str]:
+    """Names of input columns that are unavailable and filled with zeros"""
+    flags = (no_x, no_y, no_z, no_roll, no_pitch, no_yaw)
+    return [column for column, missing in zip(INPUT_COLUMNS, flags) if missing]
+
+
+def rotation_cache(resolution: Optional[float]) -> Optional[RotationCache]:
+    """Rotation cache with the resolution, None if rotations are not cached"""
+    if resolution is None:
+        return None
+    try:
+        return RotationCache(resolution)
+    except ValueError as error:
+        typer.echo(f"Warning! {error}")
+        raise typer.Exit(1)
+
+
+def report_profile(
+    profiler: Profiler,
+    show: bool,
+    output_path: Optional[Path],
+    rotations: Optional[RotationCache] = None,
+) -> None:
+    """Print summary table of the stages and write JSON trace if requested"""
+    if show:
+        typer.echo(profiler.summary())
+        if rotations is not None:
+            stats = rotations.stats()
+            typer.echo(
+                f"rotation cache: {stats['hit_rate']:.1%} hit rate,"
+                f" {stats['evaluated']} of {stats['rows']} rotations evaluated"
+            )
+    if output_path is not None:
+        profiler.save(output_path)
+
+
+def reject_in_follow(options: Dict[str, bool]) -> None:
+    """Exit if any of the options, unsupported in follow mode, is used"""
+    used = [option for option, is_used in options.items() if is_used]
+    if used:
+        typer.echo(f"Warning! --follow mode does not support {', '.join(used)}")
+        raise typer.Exit(1)
+
+
+def run_follow(
+    data_path: Path,
+    output_path: Path,
+    mode: str,
+    estimators: List[Any],
+    missing: List[str],
+    checkpoint_path: Optional[Path],
+    poll_interval: float,
+    idle_timeout: Optional[float],
+    profiler: Profiler,
+) -> None:
+    """Run follow mode until it is idle for too long or interrupted"""
+    from gnss_localization.follow import follow_log
+
+    try:
+        checkpoint = follow_log(
+            data_path,
+            output_path,
+            mode,
+            estimators,
+            missing,
+            checkpoint_path,
+            poll_interval,
+            idle_timeout,
+            profiler,
+        )
+    except ValueError as error:
+        typer.echo(f"Warning! {error}")
+        raise typer.Exit(1)
+    except KeyboardInterrupt:
+        return
+    typer.echo(f"Processed {checkpoint['rows']} rows of {data_path}")
+
+
 @app.command("proj")
 def compute_projections(
     data_path: Path = typer.Option(
-        Path("./data.csv"), "--data", help="Path to file with moving data"
+        Path("./data.csv"),
+        "--data",
+        help="Path to file with moving data: CSV, .nmea log, .npy records or .npz"
+        " columns",
     ),
     output_path: Optional[Path] = typer.Option(
-        None, "--output", help="Path to results"
+        None,
+        "--output",
+        help="Path to results, format is chosen by extension: .csv, .npy or .npz",
     ),
     no_x: bool = typer.Option(
         False,
@@ -57,63 +158,204 @@ def compute_projections(
     ),
     offset_y: float = typer.Option(
         0,
-        "--offset-x",
+        "--offset-y",
         help="Ofset of the GNSS modyle by Y axis from the center of the vehicle",
     ),
     offset_z: float = typer.Option(
         1500,
-        "--offset-x",
+        "--offset-z",
         help="Ofset of the GNSS modyle by Z axis from the center of the vehicle",
     ),
     visualize: bool = typer.Option(
-        True, "--visualize", help="Write visualization on disk"
+        True, "--visualize/--no-visualize", help="Write visualization on disk"
+    ),
+    chunk_size: Optional[int] = typer.Option(
+        None,
+        "--chunk-size",
+        min=1,
+        help="Stream the data in chunks of this many rows to bound memory usage."
+        " Visualization is skipped in this mode",
+    ),
+    attitude_path: Optional[Path] = typer.Option(
+        None,
+        "--attitude",
+        help="File with separately timestamped attitude (time_s, roll_deg,"
+        " pitch_deg, yaw_deg), resampled onto the time_s column of --data",
+    ),
+    follow: bool = typer.Option(
+        False,
+        "--follow",
+        help="Keep processing rows appended to a growing CSV log and append results"
+        " to CSV output, resuming from a checkpoint after restart. Visualization"
+        " is skipped in this mode",
+    ),
+    checkpoint_path: Optional[Path] = typer.Option(
+        None,
+        "--checkpoint",
+        help="Checkpoint of --follow mode, defaults to <output>.checkpoint.json",
+    ),
+    poll_interval: float = typer.Option(
+        0.2, "--poll-interval", min=0.01, help="Seconds between checks for new rows"
+    ),
+    idle_timeout: Optional[float] = typer.Option(
+        None,
+        "--idle-timeout",
+        help="Stop --follow mode after this many seconds without new rows",
+    ),
+    cache: bool = typer.Option(
+        False,
+        "--cache/--no-cache",
+        help="Reuse results of earlier runs over the same data and offsets, and"
+        " process only rows appended to CSV files since then. Ignored with"
+        " --chunk-size",
+    ),
+    cache_dir: Optional[Path] = typer.Option(
+        None,
+        "--cache-dir",
+        help="Cache directory, defaults to $GNSSL_CACHE_DIR or ~/.cache/gnssl",
+    ),
+    cache_size: int = typer.Option(
+        1024,
+        "--cache-size",
+        min=1,
+        help="Size of the cache in MB, least recently used results are removed",
+    ),
+    frame_stride: int = typer.Option(
+        1, "--frame-stride", min=1, help="Animate every n-th sample"
+    ),
+    max_frames: int = typer.Option(
+        300,
+        "--max-frames",
+        min=2,
+        help="Upper bound on animation frames, the stride is increased to meet it",
+    ),
+    max_points: int = typer.Option(
+        2000,
+        "--max-points",
+        min=3,
+        help="Upper bound on points of the animated path, decimated with LTTB",
+    ),
+    animation_path: Path = typer.Option(
+        Path("projections.gif"),
+        "--animation",
+        help="Path to animation, .gif or .mp4 (needs ffmpeg)",
+    ),
+    render_jobs: int = typer.Option(
+        os.cpu_count() or 1,
+        "--render-jobs",
+        min=1,
+        help="Number of processes rendering animation frames",
+    ),
+    rotation_resolution: Optional[float] = typer.Option(
+        None,
+        "--rotation-resolution",
+        help="Reuse rotations of attitudes equal up to this many radians, e.g."
+        " 1e-4. Moves results by at most offset length * resolution * 0.87",
+    ),
+    float32: bool = typer.Option(
+        False,
+        "--float32",
+        help="Compute and store in single precision to halve memory. Projections"
+        " stay within 0.001 mm, coordinates are rounded to 0.5 mm up to 8.4 km"
+        " from the origin, 1 mm up to 16.8 km and so on",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print time, rows per second and peak memory of every stage",
+    ),
+    profile_output: Optional[Path] = typer.Option(
+        None, "--profile-output", help="Write JSON trace of the stages to this path"
     ),
 ):
-    data = pd.read_csv(str(data_path))
-    if no_x:
-        data["x_mm"] = np.zeros(len(data))
-    if no_y:
-        data["y_mm"] = np.zeros(len(data))
-    if no_z:
-        data["z_mm"] = np.zeros(len(data))
-
-    if no_roll:
-        data["roll_deg"] = np.zeros(len(data))
-    if no_pitch:
-        data["pitch_deg"] = np.zeros(len(data))
-    if no_yaw:
-        data["yaw_deg"] = np.zeros(len(data))
-
-    data = data[["x_mm", "y_mm", "z_mm", "roll_deg", "pitch_deg", "yaw_deg"]]
-
-    if data.values.mean() == 0.0:
-        typer.echo("Warning! Your data is all zero! Nothign to process")
-        typer.Exit(-1)
-
-    data["roll_deg"] = np.deg2rad(data["roll_deg"])
-    data["pitch_deg"] = np.deg2rad(data["pitch_deg"])
-    data["yaw_deg"] = np.deg2rad(data["yaw_deg"])
-
+    missing = missing_columns(no_x, no_y, no_z, no_roll, no_pitch, no_yaw)
+    rotations = rotation_cache(rotation_resolution)
     proj_estimator = GNSSProjectionEstimator(
-        offset_x=offset_x, offset_y=offset_y, offset_z=offset_z
+        offset_x=offset_x,
+        offset_y=offset_y,
+        offset_z=offset_z,
+        rotation_cache=rotations,
+        dtype=np.float32 if float32 else np.float64,
     )
+    profiler = Profiler(enabled=profile or profile_output is not None)
+    output_path = output_path or Path(f"output-{data_path.name}")
+    if follow:
+        reject_in_follow(
+            {
+                "--attitude": attitude_path is not None,
+                "--chunk-size": chunk_size is not None,
+                "--cache": cache,
+            }
+        )
+        run_follow(
+            data_path,
+            output_path,
+            "proj",
+            [proj_estimator],
+            missing,
+            checkpoint_path,
+            poll_interval,
+            idle_timeout,
+            profiler,
+        )
+        report_profile(profiler, profile, profile_output, rotations)
+        return
+    try:
+        if cache and chunk_size is None:
+            projections = cached_projections(
+                ResultCache(cache_dir, cache_size * 2**20),
+                data_path,
+                output_path,
+                proj_estimator,
+                missing,
+                profiler=profiler,
+                attitude_path=attitude_path,
+            )
+        else:
+            projections = run_projections(
+                data_path,
+                output_path,
+                proj_estimator,
+                missing,
+                chunk_size,
+                profiler=profiler,
+                attitude_path=attitude_path,
+            )
+    except ValueError as error:
+        typer.echo(f"Warning! {error}")
+        raise typer.Exit(1)
 
-    projections = proj_estimator.predict(data.values)
-    projections_df = pd.DataFrame(projections, columns=["x_mm", "y_mm", "z_mm"])
-    projections_df.to_csv(str(output_path or f"output-{data_path.name}"), index=False)
+    if visualize and projections is not None:
+        from gnss_localization.visualizations import save_projections_animation
 
-    if visualize:
-        animation = animate_projections(projections)
-        animation.save("projections.gif")
+        with profiler.stage("visualize", len(projections)):
+            try:
+                save_projections_animation(
+                    projections,
+                    animation_path,
+                    frame_stride=frame_stride,
+                    max_frames=max_frames,
+                    max_points=max_points,
+                    jobs=render_jobs,
+                )
+            except ValueError as error:
+                typer.echo(f"Warning! {error}")
+                raise typer.Exit(1)
+    report_profile(profiler, profile, profile_output, rotations)
 
 
 @app.command("heading")
 def compute_headings(
     data_path: Path = typer.Option(
-        Path("./data.csv"), "--data", help="Path to file with moving data"
+        Path("./data.csv"),
+        "--data",
+        help="Path to file with moving data: CSV, .nmea log, .npy records or .npz"
+        " columns",
     ),
     output_path: Optional[Path] = typer.Option(
-        None, "--output", help="Path to results"
+        None,
+        "--output",
+        help="Path to results, format is chosen by extension: .csv, .npy or .npz",
     ),
     no_x: bool = typer.Option(
         False,
@@ -152,12 +394,274 @@ def compute_headings(
     ),
     offset_y: float = typer.Option(
         0,
-        "--offset-x",
+        "--offset-y",
         help="Ofset of the GNSS modyle by Y axis from the center of the vehicle",
     ),
     offset_z: float = typer.Option(
         1500,
+        "--offset-z",
+        help="Ofset of the GNSS modyle by Z axis from the center of the vehicle",
+    ),
+    north_direction: Tuple[float, float, float] = typer.Option(
+        (None, None, None),
+        "--north",
+        help="Vector of north direction. If None the north computer from vehicle"
+        " main direction",
+    ),
+    window: Optional[int] = typer.Option(
+        None,
+        "--window",
+        help="Compute every heading from the direction of motion over the last"
+        " this many points instead of the direction from the first point",
+    ),
+    visualize: bool = typer.Option(
+        True, "--visualize/--no-visualize", help="Write visualization on disk"
+    ),
+    raster: Optional[bool] = typer.Option(
+        None,
+        "--raster/--no-raster",
+        help="Plot trajectory and headings as 2D histograms and min/max envelope."
+        " By default used for more than 100000 points",
+    ),
+    chunk_size: Optional[int] = typer.Option(
+        None,
+        "--chunk-size",
+        min=1,
+        help="Stream the data in chunks of this many rows to bound memory usage."
+        " Visualization is skipped in this mode",
+    ),
+    attitude_path: Optional[Path] = typer.Option(
+        None,
+        "--attitude",
+        help="File with separately timestamped attitude (time_s, roll_deg,"
+        " pitch_deg, yaw_deg), resampled onto the time_s column of --data",
+    ),
+    follow: bool = typer.Option(
+        False,
+        "--follow",
+        help="Keep processing rows appended to a growing CSV log and append results"
+        " to CSV output, resuming from a checkpoint after restart. Visualization"
+        " is skipped in this mode",
+    ),
+    checkpoint_path: Optional[Path] = typer.Option(
+        None,
+        "--checkpoint",
+        help="Checkpoint of --follow mode, defaults to <output>.checkpoint.json",
+    ),
+    poll_interval: float = typer.Option(
+        0.2, "--poll-interval", min=0.01, help="Seconds between checks for new rows"
+    ),
+    idle_timeout: Optional[float] = typer.Option(
+        None,
+        "--idle-timeout",
+        help="Stop --follow mode after this many seconds without new rows",
+    ),
+    cache: bool = typer.Option(
+        False,
+        "--cache/--no-cache",
+        help="Reuse results of earlier runs over the same data and offsets, and"
+        " process only rows appended to CSV files since then. Ignored with"
+        " --chunk-size",
+    ),
+    cache_dir: Optional[Path] = typer.Option(
+        None,
+        "--cache-dir",
+        help="Cache directory, defaults to $GNSSL_CACHE_DIR or ~/.cache/gnssl",
+    ),
+    cache_size: int = typer.Option(
+        1024,
+        "--cache-size",
+        min=1,
+        help="Size of the cache in MB, least recently used results are removed",
+    ),
+    smooth: bool = typer.Option(
+        False,
+        "--smooth",
+        help="Smooth vehicle coordinates with constant velocity Kalman filter and"
+        " backward pass before computing headings, using the time_s column. With"
+        " --chunk-size only the forward filter is used. Disables --cache",
+    ),
+    measurement_noise: float = typer.Option(
+        50.0,
+        "--measurement-noise",
+        help="Standard deviation of GNSS positions in mm for --smooth",
+    ),
+    acceleration_noise: float = typer.Option(
+        1000.0,
+        "--acceleration-noise",
+        help="Standard deviation of vehicle acceleration in mm/s^2 for --smooth,"
+        " larger values follow turns more closely",
+    ),
+    rotation_resolution: Optional[float] = typer.Option(
+        None,
+        "--rotation-resolution",
+        help="Reuse rotations of attitudes equal up to this many radians, e.g."
+        " 1e-4. Moves results by at most offset length * resolution * 0.87",
+    ),
+    float32: bool = typer.Option(
+        False,
+        "--float32",
+        help="Compute and store in single precision to halve memory. Projections"
+        " stay within 0.001 mm, coordinates are rounded to 0.5 mm up to 8.4 km"
+        " from the origin, 1 mm up to 16.8 km and so on",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print time, rows per second and peak memory of every stage",
+    ),
+    profile_output: Optional[Path] = typer.Option(
+        None, "--profile-output", help="Write JSON trace of the stages to this path"
+    ),
+):
+    missing = missing_columns(no_x, no_y, no_z, no_roll, no_pitch, no_yaw)
+    if any(d is None for d in north_direction):
+        north_direction = None
+
+    rotations = rotation_cache(rotation_resolution)
+    coord_estimator = GNSSVehicleCoordinatesEstimator(
+        offset_x,
+        offset_y,
+        offset_z,
+        rotations,
+        dtype=np.float32 if float32 else np.float64,
+    )
+    try:
+        heading_estimator = GNSSHeadingEstimator(
+            offset_x=offset_x,
+            offset_y=offset_y,
+            offset_z=offset_z,
+            north_direction=north_direction,
+            window=window,
+        )
+    except ValueError as error:
+        typer.echo(f"Warning! {error}")
+        raise typer.Exit(1)
+    try:
+        smoother = (
+            GNSSTrackSmoother(measurement_noise, acceleration_noise) if smooth else None
+        )
+    except ValueError as error:
+        typer.echo(f"Warning! {error}")
+        raise typer.Exit(1)
+    profiler = Profiler(enabled=profile or profile_output is not None)
+    output_path = output_path or Path(f"output-{data_path.name}")
+    if follow:
+        reject_in_follow(
+            {
+                "--attitude": attitude_path is not None,
+                "--chunk-size": chunk_size is not None,
+                "--cache": cache,
+                "--smooth": smooth,
+                "--window": window is not None,
+            }
+        )
+        run_follow(
+            data_path,
+            output_path,
+            "heading",
+            [coord_estimator, heading_estimator],
+            missing,
+            checkpoint_path,
+            poll_interval,
+            idle_timeout,
+            profiler,
+        )
+        report_profile(profiler, profile, profile_output, rotations)
+        return
+    try:
+        if cache and chunk_size is None and smoother is None:
+            results = cached_headings(
+                ResultCache(cache_dir, cache_size * 2**20),
+                data_path,
+                output_path,
+                coord_estimator,
+                heading_estimator,
+                missing,
+                profiler=profiler,
+                attitude_path=attitude_path,
+            )
+        else:
+            results = run_headings(
+                data_path,
+                output_path,
+                coord_estimator,
+                heading_estimator,
+                missing,
+                chunk_size,
+                profiler=profiler,
+                attitude_path=attitude_path,
+                smoother=smoother,
+            )
+    except ValueError as error:
+        typer.echo(f"Warning! {error}")
+        raise typer.Exit(1)
+
+    if visualize and results is not None:
+        from gnss_localization.visualizations import plot_headings
+
+        with profiler.stage("visualize", len(results[0])):
+            fig = plot_headings(*results, raster=raster)
+            fig.savefig("headings.png")
+    report_profile(profiler, profile, profile_output, rotations)
+
+
+@app.command("run")
+def compute_all(
+    data_path: Path = typer.Option(
+        Path("./data.csv"),
+        "--data",
+        help="Path to file with moving data: CSV, .nmea log, .npy records or .npz"
+        " columns",
+    ),
+    output_path: Optional[Path] = typer.Option(
+        None,
+        "--output",
+        help="Path to results, format is chosen by extension: .csv, .npy or .npz",
+    ),
+    no_x: bool = typer.Option(
+        False,
+        "--no-x",
+        help="Creates a zero valued column for X coordinate if X is unavailable",
+    ),
+    no_y: bool = typer.Option(
+        False,
+        "--no-y",
+        help="Creates a zero valued column for Y coordinate if Y is unavailable",
+    ),
+    no_z: bool = typer.Option(
+        True,
+        "--no-z",
+        help="Creates a zero valued column for Z coordinate if Z is unavailable",
+    ),
+    no_roll: bool = typer.Option(
+        False,
+        "--no-roll",
+        help="Creates a zero valued column for roll angle if roll is unavailable",
+    ),
+    no_pitch: bool = typer.Option(
+        False,
+        "--no-pitch",
+        help="Creates a zero valued column for pitch angle if pitch is unavailable",
+    ),
+    no_yaw: bool = typer.Option(
+        True,
+        "--no-yaw",
+        help="Creates a zero valued column for yaw angle if yaw is unavailable",
+    ),
+    offset_x: float = typer.Option(
+        0,
         "--offset-x",
+        help="Ofset of the GNSS modyle by X axis from the center of the vehicle",
+    ),
+    offset_y: float = typer.Option(
+        0,
+        "--offset-y",
+        help="Ofset of the GNSS modyle by Y axis from the center of the vehicle",
+    ),
+    offset_z: float = typer.Option(
+        1500,
+        "--offset-z",
         help="Ofset of the GNSS modyle by Z axis from the center of the vehicle",
     ),
     north_direction: Tuple[float, float, float] = typer.Option(
@@ -166,55 +670,323 @@ def compute_headings(
         help="Vector of north direction. If None the north computer from vehicle"
         " main direction",
     ),
+    window: Optional[int] = typer.Option(
+        None,
+        "--window",
+        help="Compute every heading from the direction of motion over the last"
+        " this many points instead of the direction from the first point",
+    ),
+    separate: bool = typer.Option(
+        False,
+        "--separate",
+        help="Write projections, vehicle coordinates and headings to separate"
+        " files named after --output with -projections, -coordinates and"
+        " -headings suffixes",
+    ),
     visualize: bool = typer.Option(
-        True, "--visualize", help="Write visualization on disk"
+        False,
+        "--visualize/--no-visualize",
+        help="Write headings plot and projections animation on disk",
+    ),
+    raster: Optional[bool] = typer.Option(
+        None,
+        "--raster/--no-raster",
+        help="Plot trajectory and headings as 2D histograms and min/max envelope."
+        " By default used for more than 100000 points",
+    ),
+    chunk_size: Optional[int] = typer.Option(
+        None,
+        "--chunk-size",
+        min=1,
+        help="Stream the data in chunks of this many rows to bound memory usage."
+        " Visualization is skipped in this mode",
+    ),
+    attitude_path: Optional[Path] = typer.Option(
+        None,
+        "--attitude",
+        help="File with separately timestamped attitude (time_s, roll_deg,"
+        " pitch_deg, yaw_deg), resampled onto the time_s column of --data",
+    ),
+    rotation_resolution: Optional[float] = typer.Option(
+        None,
+        "--rotation-resolution",
+        help="Reuse rotations of attitudes equal up to this many radians, e.g."
+        " 1e-4. Moves results by at most offset length * resolution * 0.87",
+    ),
+    float32: bool = typer.Option(
+        False,
+        "--float32",
+        help="Compute and store in single precision to halve memory. Projections"
+        " stay within 0.001 mm, coordinates are rounded to 0.5 mm up to 8.4 km"
+        " from the origin, 1 mm up to 16.8 km and so on",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print time, rows per second and peak memory of every stage",
+    ),
+    profile_output: Optional[Path] = typer.Option(
+        None, "--profile-output", help="Write JSON trace of the stages to this path"
     ),
 ):
-    data = pd.read_csv(str(data_path))
-    print("HERE")
-    if no_x:
-        data["x_mm"] = np.zeros(len(data))
-    if no_y:
-        data["y_mm"] = np.zeros(len(data))
-    if no_z:
-        data["z_mm"] = np.zeros(len(data))
-
-    if no_roll:
-        data["roll_deg"] = np.zeros(len(data))
-    if no_pitch:
-        data["pitch_deg"] = np.zeros(len(data))
-    if no_yaw:
-        data["yaw_deg"] = np.zeros(len(data))
-
-    data = data[["x_mm", "y_mm", "z_mm", "roll_deg", "pitch_deg", "yaw_deg"]]
-
-    if data.values.mean() == 0.0:
-        typer.echo("Warning! Your data is all zero! Nothign to process")
-        typer.Exit(-1)
-
-    data["roll_deg"] = np.deg2rad(data["roll_deg"])
-    data["pitch_deg"] = np.deg2rad(data["pitch_deg"])
-    data["yaw_deg"] = np.deg2rad(data["yaw_deg"])
+    missing = missing_columns(no_x, no_y, no_z, no_roll, no_pitch, no_yaw)
+    if any(d is None for d in north_direction):
+        north_direction = None
+
+    rotations = rotation_cache(rotation_resolution)
+    coord_estimator = GNSSVehicleCoordinatesEstimator(
+        offset_x,
+        offset_y,
+        offset_z,
+        rotations,
+        dtype=np.float32 if float32 else np.float64,
+    )
+    try:
+        heading_estimator = GNSSHeadingEstimator(
+            offset_x=offset_x,
+            offset_y=offset_y,
+            offset_z=offset_z,
+            north_direction=north_direction,
+            window=window,
+        )
+    except ValueError as error:
+        typer.echo(f"Warning! {error}")
+        raise typer.Exit(1)
+    profiler = Profiler(enabled=profile or profile_output is not None)
+    try:
+        results = run_pipeline(
+            data_path,
+            output_path or Path(f"output-{data_path.name}"),
+            coord_estimator,
+            heading_estimator,
+            missing,
+            chunk_size,
+            profiler=profiler,
+            attitude_path=attitude_path,
+            separate=separate,
+        )
+    except ValueError as error:
+        typer.echo(f"Warning! {error}")
+        raise typer.Exit(1)
+
+    if visualize and results is not None:
+        from gnss_localization.visualizations import (
+            plot_headings,
+            save_projections_animation,
+        )
+
+        with profiler.stage("visualize", len(results)):
+            fig = plot_headings(results[:, 3:6], results[1:, 6], raster=raster)
+            fig.savefig("headings.png")
+            save_projections_animation(
+                results[:, :3],
+                Path("projections.gif"),
+                max_frames=300,
+                max_points=2000,
+                jobs=os.cpu_count() or 1,
+            )
+    report_profile(profiler, profile, profile_output, rotations)
 
+
+@app.command("batch")
+def compute_batch(
+    data_pattern: str = typer.Option(
+        ...,
+        "--data",
+        help="Directory with files of moving data or glob pattern, e.g."
+        " 'logs/**/*.csv'",
+    ),
+    output_dir: Path = typer.Option(
+        Path("./output"), "--output-dir", help="Directory for results and manifest"
+    ),
+    mode: BatchMode = typer.Option(
+        BatchMode.proj, "--mode", help="Compute projections or headings"
+    ),
+    jobs: int = typer.Option(
+        os.cpu_count() or 1, "--jobs", min=1, help="Number of worker processes"
+    ),
+    output_format: str = typer.Option(
+        ".csv", "--output-format", help="Extension of results: .csv, .npy or .npz"
+    ),
+    no_x: bool = typer.Option(
+        False,
+        "--no-x",
+        help="Creates a zero valued column for X coordinate if X is unavailable",
+    ),
+    no_y: bool = typer.Option(
+        False,
+        "--no-y",
+        help="Creates a zero valued column for Y coordinate if Y is unavailable",
+    ),
+    no_z: bool = typer.Option(
+        True,
+        "--no-z",
+        help="Creates a zero valued column for Z coordinate if Z is unavailable",
+    ),
+    no_roll: bool = typer.Option(
+        False,
+        "--no-roll",
+        help="Creates a zero valued column for roll angle if roll is unavailable",
+    ),
+    no_pitch: bool = typer.Option(
+        False,
+        "--no-pitch",
+        help="Creates a zero valued column for pitch angle if pitch is unavailable",
+    ),
+    no_yaw: bool = typer.Option(
+        True,
+        "--no-yaw",
+        help="Creates a zero valued column for yaw angle if yaw is unavailable",
+    ),
+    offset_x: float = typer.Option(
+        0,
+        "--offset-x",
+        help="Ofset of the GNSS modyle by X axis from the center of the vehicle",
+    ),
+    offset_y: float = typer.Option(
+        0,
+        "--offset-y",
+        help="Ofset of the GNSS modyle by Y axis from the center of the vehicle",
+    ),
+    offset_z: float = typer.Option(
+        1500,
+        "--offset-z",
+        help="Ofset of the GNSS modyle by Z axis from the center of the vehicle",
+    ),
+    north_direction: Tuple[float, float, float] = typer.Option(
+        (None, None, None),
+        "--north",
+        help="Vector of north direction. If None the north computer from vehicle"
+        " main direction of each file",
+    ),
+    chunk_size: Optional[int] = typer.Option(
+        None,
+        "--chunk-size",
+        min=1,
+        help="Stream each file in chunks of this many rows to bound memory usage",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print time, rows per second and peak memory of every stage, summed"
+        " over files",
+    ),
+    profile_output: Optional[Path] = typer.Option(
+        None, "--profile-output", help="Write JSON trace of the stages to this path"
+    ),
+):
+    missing = missing_columns(no_x, no_y, no_z, no_roll, no_pitch, no_yaw)
     if any(d is None for d in north_direction):
         north_direction = None
 
-    coord_estimator = GNSSVehicleCoordinatesEstimator(offset_x, offset_y, offset_z)
-    heading_estimator = GNSSHeadingEstimator(
-        offset_x=offset_x,
-        offset_y=offset_y,
-        offset_z=offset_z,
-        north_direction=north_direction,
+    if mode == BatchMode.proj:
+        estimators = [GNSSProjectionEstimator(offset_x, offset_y, offset_z)]
+    else:
+        try:
+            estimators = [
+                GNSSVehicleCoordinatesEstimator(offset_x, offset_y, offset_z),
+                GNSSHeadingEstimator(offset_x, offset_y, offset_z, north_direction),
+            ]
+        except ValueError as error:
+            typer.echo(f"Warning! {error}")
+            raise typer.Exit(1)
+    inputs = find_inputs(data_pattern)
+    if not inputs:
+        typer.echo(f"Warning! No data files found for {data_pattern}")
+        raise typer.Exit(1)
+
+    manifest = run_batch(
+        inputs,
+        output_dir,
+        mode.value,
+        estimators,
+        missing,
+        chunk_size,
+        jobs,
+        output_format,
+        profile or profile_output is not None,
+    )
+    typer.echo(
+        f"Processed {manifest['files_total']} files, {manifest['rows']} rows in"
+        f" {manifest['seconds']:.2f} s with {jobs} jobs,"
+        f" {manifest['files_failed']} failed"
+    )
+    if "stages" in manifest:
+        profiler = Profiler()
+        profiler.merge(manifest["stages"])
+        report_profile(profiler, profile, profile_output)
+    for entry in manifest["files"]:
+        if entry["status"] != "ok":
+            typer.echo(f"Failed {entry['input']}: {entry['error']}")
+    if manifest["files_failed"]:
+        raise typer.Exit(1)
+
+
+@app.command("serve")
+def serve(
+    socket_path: Optional[Path] = typer.Option(
+        None, "--socket", help="Listen on this Unix socket instead of TCP"
+    ),
+    host: str = typer.Option("127.0.0.1", "--host", help="TCP host"),
+    port: int = typer.Option(8765, "--port", help="TCP port"),
+    offset_x: float = typer.Option(
+        0,
+        "--offset-x",
+        help="Ofset of the GNSS modyle by X axis from the center of the vehicle",
+    ),
+    offset_y: float = typer.Option(
+        0,
+        "--offset-y",
+        help="Ofset of the GNSS modyle by Y axis from the center of the vehicle",
+    ),
+    offset_z: float = typer.Option(
+        1500,
+        "--offset-z",
+        help="Ofset of the GNSS modyle by Z axis from the center of the vehicle",
+    ),
+    north_direction: Tuple[float, float, float] = typer.Option(
+        ..., "--north", help="Vector of north direction"
+    ),
+    max_wait_ms: float = typer.Option(
+        0.5,
+        "--max-wait-ms",
+        min=0,
+        help="Milliseconds a request waits for others to be processed together",
+    ),
+    max_rows: int = typer.Option(
+        8192, "--max-rows", min=1, help="Upper bound on rows processed together"
+    ),
+):
+    import asyncio
+
+    from gnss_localization.service import EstimatorService
+
+    try:
+        heading_estimator = GNSSHeadingEstimator(
+            offset_x, offset_y, offset_z, north_direction
+        )
+    except ValueError as error:
+        typer.echo(f"Warning! {error}")
+        raise typer.Exit(1)
+    service = EstimatorService(
+        GNSSProjectionEstimator(offset_x, offset_y, offset_z),
+        GNSSVehicleCoordinatesEstimator(offset_x, offset_y, offset_z),
+        heading_estimator,
+        max_wait=max_wait_ms / 1000,
+        max_rows=max_rows,
     )
 
-    vehicle_coordinates = coord_estimator.predict(data.values)
-    headings = heading_estimator.predict(vehicle_coordinates)
-    headings_df = pd.DataFrame(headings, columns=["angle"])
-    headings_df.to_csv(str(output_path or data_path.name), index=False)
+    async def serve_forever():
+        server = await service.start(socket_path, host, port)
+        address = socket_path or f"{host}:{port}"
+        typer.echo(f"Serving estimators on {address}")
+        async with server:
+            await server.serve_forever()
 
-    if visualize:
-        fig = plot_headings(vehicle_coordinates, headings)
-        fig.savefig("headings.png")
+    try:
+        asyncio.run(serve_forever())
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
@@ -1,8 +1,15 @@
 import numpy as np
+from concurrent.futures import Executor
+from numpy.typing import DTypeLike
 from typing import List, Optional, Tuple, Union
 
-from gnss_localization.projection_estimator import GNSSProjectionEstimator
-from gnss_localization.projection_matrix import build_projection_matrix
+from gnss_localization.parallel import run_chunked
+from gnss_localization.projection_estimator import (
+    GNSSProjectionEstimator,
+    angle_axes,
+    axes_rows,
+)
+from gnss_localization.rotation_cache import RotationCache
 
 
 class GNSSVehicleCoordinatesEstimator:
@@ -11,6 +18,8 @@ class GNSSVehicleCoordinatesEstimator:
         offset_x: float,
         offset_y: float,
         offset_z: float,
+        rotation_cache: Optional[RotationCache] = None,
+        dtype: DTypeLike = np.float64,
     ) -> None:
         """Calculates the heading of body using data from GNSS module.
 
@@ -23,12 +32,21 @@ class GNSSVehicleCoordinatesEstimator:
             the centre of moving plane (height)
             north_direction (Optional[Tuple[float, float, float]]): Basis vector of
             north direction. If None the vector would be computed from moving plane data
+            rotation_cache (Optional[RotationCache], optional): Reuse rotations of
+            repeating attitudes, see `GNSSProjectionEstimator`. Defaults to None.
+            dtype (DTypeLike, optional): Precision of computation and results.
+            np.float32 halves memory, but coordinates are rounded to 24 bits: to
+            0.5 mm up to 8.4 km from the origin, 1 mm up to 16.8 km and so on.
+            Defaults to np.float64.
         """
 
         self.offset_x = offset_x
         self.offset_y = offset_y
         self.offset_z = offset_z
-        self.proj_estimator = GNSSProjectionEstimator(offset_x, offset_y, offset_z)
+        self.dtype = np.dtype(dtype)
+        self.proj_estimator = GNSSProjectionEstimator(
+            offset_x, offset_y, offset_z, rotation_cache, dtype
+        )
 
     def compute_north_from_data(self, data: np.ndarray) -> Tuple[float, float, float]:
         """Compute north direction from data of moving plane
@@ -43,12 +61,24 @@ class GNSSVehicleCoordinatesEstimator:
         north_vector = np.array(north_vector)
         return tuple(north_vector.tolist())
 
-    def predict(self, inputs: Union[np.ndarray, List[float]]) -> np.ndarray:
+    def predict(
+        self,
+        inputs: Union[np.ndarray, List[float]],
+        out: Optional[np.ndarray] = None,
+        n_jobs: int = 1,
+        executor: Optional[Executor] = None,
+    ) -> np.ndarray:
         """Computes the vehicle coordinates for each GNSS point
 
         Args:
             inputs (Union[np.ndarray, List[float]]): Single data point in format
             (x, y, z, roll, pitch, yaw) or array of these points
+            out (Optional[np.ndarray], optional): Preallocated array of shape Nx3
+            for the results, reused between calls in hot loops. Defaults to None.
+            n_jobs (int, optional): Threads computing chunks of rows, -1 for one
+            per core, see `GNSSProjectionEstimator.predict`. Defaults to 1.
+            executor (Optional[Executor], optional): Thread pool reused between
+            calls instead of n_jobs. Defaults to None.
 
         Raises:
             AssertionError: If input schema unsupported
@@ -72,13 +102,61 @@ class GNSSVehicleCoordinatesEstimator:
                 "Wrong input type. Possible options are list of 6 elements or numpy"
                 " array of shape Nx6"
             )
-        gnss_coordinates = self.proj_estimator.predict(inputs)
-        vehicle_coordinates = np.asanyarray(
-            [
-                build_projection_matrix(0, 0, 0) @ (plane_coordinates - gnss_coords)
-                for gnss_coords, plane_coordinates in zip(
-                    gnss_coordinates, inputs[:, :3]
-                )
-            ]
-        )
-        return vehicle_coordinates
+        if n_jobs == 1 and executor is None:
+            vehicle_coordinates = self.proj_estimator.predict(inputs, out=out)
+            np.subtract(inputs[:, :3], vehicle_coordinates, out=vehicle_coordinates)
+            return vehicle_coordinates
+
+        if out is None:
+            out = np.empty((len(inputs), 3), dtype=self.dtype)
+        assert out.shape == (len(inputs), 3), "Output must have shape Nx3"
+        if self.proj_estimator.rotation_cache is not None:
+            n_jobs, executor = 1, None
+        angles = angle_axes(inputs)
+
+        def predict_rows(rows: slice) -> None:
+            # rotation and subtraction of a chunk while it is still in cache
+            chunk = inputs[rows]
+            self.proj_estimator.predict_axes(*axes_rows(angles, rows), out=out[rows])
+            np.subtract(chunk[:, :3], out[rows], out=out[rows])
+
+        run_chunked(predict_rows, len(inputs), n_jobs, executor)
+        return out
+
+    def predict_axes(
+        self,
+        x: Union[np.ndarray, float],
+        y: Union[np.ndarray, float],
+        z: Union[np.ndarray, float],
+        roll: Union[np.ndarray, float],
+        pitch: Union[np.ndarray, float],
+        yaw: Union[np.ndarray, float],
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Computes the vehicle coordinates from separate axes, some of them
+        constant
+
+        Axes that are not measured can be passed as scalars instead of columns of
+        zeros, the rotations around missing angles are then skipped.
+
+        Args:
+            x (Union[np.ndarray, float]): X coordinates of shape (N,) or scalar
+            y (Union[np.ndarray, float]): Y coordinates of shape (N,) or scalar
+            z (Union[np.ndarray, float]): Z coordinates of shape (N,) or scalar
+            roll (Union[np.ndarray, float]): Roll angles of shape (N,) or scalar
+            pitch (Union[np.ndarray, float]): Pitch angles of shape (N,) or scalar
+            yaw (Union[np.ndarray, float]): Yaw angles of shape (N,) or scalar
+            out (Optional[np.ndarray], optional): Preallocated array of shape Nx3
+            for the results. Defaults to None.
+
+        Returns:
+            np.ndarray: Vehicle coordinates
+        """
+        axes = (x, y, z, roll, pitch, yaw)
+        if out is None:
+            shape = np.broadcast_shapes(*(np.shape(axis) for axis in axes))
+            out = np.empty(shape + (3,), dtype=self.dtype)
+        projections = self.proj_estimator.predict_axes(roll, pitch, yaw, out=out)
+        for i, coordinate in enumerate((x, y, z)):
+            np.subtract(coordinate, projections[..., i], out=projections[..., i])
+        return projections
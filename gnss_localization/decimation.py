@@ -0,0 +1,100 @@
+import numpy as np
+from typing import Optional, Tuple
+
+
+def lttb(points: np.ndarray, n_out: int) -> np.ndarray:
+    """Select points of a path with Largest-Triangle-Three-Buckets algorithm
+
+    The path is split into `n_out - 2` buckets and from every bucket the point
+    forming the largest triangle with the previously selected point and the mean
+    of the next bucket is kept, so turns and spikes survive the decimation. The
+    first and the last points are always kept. The loop runs over buckets and the
+    points of a bucket are processed at once, so the cost is O(N + n_out).
+
+    Args:
+        points (np.ndarray): Path of shape NxK, only the first two columns are used
+        n_out (int): Number of points to keep, at least 3
+
+    Returns:
+        np.ndarray: Sorted indices of kept points
+    """
+    n_points = len(points)
+    if n_out >= n_points or n_points < 3:
+        return np.arange(n_points)
+    if n_out < 3:
+        raise ValueError("LTTB keeps at least 3 points")
+
+    x, y = points[:, 0], points[:, 1]
+    edges = np.linspace(1, n_points - 1, n_out - 1).astype(int)
+    starts, ends = edges[:-1], edges[1:]
+    # mean of every bucket, the mean of the last bucket is the last point
+    sums_x = np.add.reduceat(x[: n_points - 1], starts)
+    sums_y = np.add.reduceat(y[: n_points - 1], starts)
+    counts = ends - starts
+    next_x = np.append(sums_x[1:] / counts[1:], x[-1])
+    next_y = np.append(sums_y[1:] / counts[1:], y[-1])
+
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n_points - 1
+    previous = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        a_x, a_y = x[previous], y[previous]
+        areas = np.abs(
+            (a_x - next_x[bucket]) * (y[start:end] - a_y)
+            - (a_x - x[start:end]) * (next_y[bucket] - a_y)
+        )
+        previous = start + int(np.argmax(areas))
+        indices[bucket + 1] = previous
+    return indices
+
+
+def frame_indices(
+    n_samples: int, frame_stride: int = 1, max_frames: Optional[int] = None
+) -> np.ndarray:
+    """Indices of samples shown as animation frames
+
+    Args:
+        n_samples (int): Number of samples
+        frame_stride (int, optional): Show every `frame_stride` sample.
+        Defaults to 1.
+        max_frames (Optional[int], optional): Upper bound on number of frames, the
+        stride is increased to meet it. Defaults to None.
+
+    Returns:
+        np.ndarray: Indices of samples, the last sample is always included
+    """
+    if max_frames is not None and max_frames > 1:
+        frame_stride = max(frame_stride, -(-(n_samples - 1) // (max_frames - 1)))
+    frames = np.arange(0, n_samples, max(frame_stride, 1))
+    if len(frames) and frames[-1] != n_samples - 1:
+        frames = np.append(frames, n_samples - 1)
+    return frames
+
+
+def minmax_envelope(
+    x: np.ndarray, values: np.ndarray, bins: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Minimum and maximum of values in equal width bins of x
+
+    NaN values are ignored, bins without values are NaN.
+
+    Args:
+        x (np.ndarray): Positions of values
+        values (np.ndarray): Values to aggregate
+        bins (int): Number of bins
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Centres of bins, minimum and
+        maximum in every bin
+    """
+    edges = np.linspace(x.min(), x.max(), bins + 1)
+    width = (edges[-1] - edges[0]) / bins or 1.0
+    index = np.clip(((x - edges[0]) / width).astype(int), 0, bins - 1)
+    low = np.full(bins, np.inf)
+    high = np.full(bins, -np.inf)
+    np.fmin.at(low, index, values)
+    np.fmax.at(high, index, values)
+    empty = ~np.isfinite(low)
+    low[empty] = np.nan
+    high[empty] = np.nan
+    return (edges[:-1] + edges[1:]) / 2, low, high
@@ -0,0 +1,135 @@
+import numpy as np
+from typing import List, Optional, Sequence, Tuple, Union
+
+from gnss_localization.heading_estimator import compute_headings
+from gnss_localization.projection_matrix import rotate_vector
+
+
+class GNSSFleetEstimator:
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        north_directions: Optional[np.ndarray] = None,
+    ) -> None:
+        """Calculates projections, vehicle coordinates and headings for many vehicles.
+
+        Every vehicle has its own GNSS module offset, and all vehicles are processed
+        in a single vectorized pass instead of one estimator per vehicle.
+
+        Args:
+            offsets (np.ndarray): Offsets of the origin of GNSS module from the
+            centre of moving plane for each vehicle, shape Vx3
+            north_directions (Optional[np.ndarray], optional): Basis vector of north
+            direction, either one for the whole fleet (shape 3) or one per vehicle
+            (shape Vx3). If None the vector of each vehicle is computed from its
+            first and last positions, and a vehicle which returns to its first
+            position gets NaN headings. Defaults to None.
+        """
+        self.offsets = np.asarray(offsets, dtype=float).reshape(-1, 3)
+        self.north_directions = (
+            None
+            if north_directions is None
+            else np.broadcast_to(
+                np.asarray(north_directions, dtype=float), self.offsets.shape
+            )
+        )
+
+    def predict(
+        self,
+        inputs: Union[np.ndarray, Sequence[np.ndarray]],
+        lengths: Optional[Sequence[int]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Computes GNSS projections, vehicle coordinates and headings of the fleet
+
+        Args:
+            inputs (Union[np.ndarray, Sequence[np.ndarray]]): Data points in format
+            (x, y, z, roll, pitch, yaw) as array of shape VxTx6, or ragged data as
+            concatenated array of shape Mx6 together with `lengths`, or list of V
+            arrays of shape Tx6
+            lengths (Optional[Sequence[int]], optional): Number of points of each
+            vehicle in concatenated ragged array. Defaults to None.
+
+        Raises:
+            AssertionError: If input schema unsupported
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: GNSS projections and vehicle
+            coordinates of shape VxTx3 and headings of shape Vx(T-1), measured from
+            the first point of each vehicle. For ragged data the arrays are
+            concatenated over vehicles, with one heading less per vehicle
+        """
+        if not isinstance(inputs, np.ndarray):
+            lengths = [len(vehicle_inputs) for vehicle_inputs in inputs]
+            inputs = np.concatenate(inputs)
+        assert inputs.shape[-1] == 6, "Input must contain 6 elements per point"
+
+        if lengths is None:
+            assert inputs.ndim == 3, "Input must have shape VxTx6"
+            assert len(inputs) == len(self.offsets), "Offsets must have shape Vx3"
+            return self._predict_dense(inputs)
+
+        lengths = np.asarray(lengths)
+        assert inputs.ndim == 2, "Ragged input must have shape Mx6"
+        assert len(lengths) == len(self.offsets), "Offsets must have shape Vx3"
+        assert lengths.sum() == len(inputs), "Lengths must sum to number of points"
+        assert np.all(lengths > 0), "Every vehicle must have at least one point"
+        return self._predict_ragged(inputs, lengths)
+
+    def _predict_dense(
+        self, inputs: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        offsets = self.offsets[:, np.newaxis, :]
+        projections = rotate_vector(
+            inputs[..., 3], inputs[..., 4], inputs[..., 5], offsets
+        )
+        vehicle_coordinates = inputs[..., :3] - projections
+
+        origins = vehicle_coordinates[:, :1]
+        north = self._north(origins[:, 0], vehicle_coordinates[:, -1])
+        headings = compute_headings(
+            vehicle_coordinates[:, 1:] - origins, north[:, np.newaxis, :]
+        )
+        return projections, vehicle_coordinates, headings
+
+    def _predict_ragged(
+        self, inputs: np.ndarray, lengths: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        vehicles = np.repeat(np.arange(len(lengths)), lengths)
+        projections = rotate_vector(
+            inputs[:, 3], inputs[:, 4], inputs[:, 5], self.offsets[vehicles]
+        )
+        vehicle_coordinates = inputs[:, :3] - projections
+
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        origins = vehicle_coordinates[starts]
+        north = self._north(origins, vehicle_coordinates[ends - 1])
+        tails = np.ones(len(inputs), dtype=bool)
+        tails[starts] = False
+        vehicles = vehicles[tails]
+        headings = compute_headings(
+            vehicle_coordinates[tails] - origins[vehicles], north[vehicles]
+        )
+        return projections, vehicle_coordinates, headings
+
+    def _north(self, first: np.ndarray, last: np.ndarray) -> np.ndarray:
+        """North vector of each vehicle, given or from its first and last points"""
+        if self.north_directions is not None:
+            return self.north_directions
+        north = np.zeros((len(first), 3))
+        north[:, :2] = last[:, :2] - first[:, :2]
+        return north
+
+    @staticmethod
+    def split(results: np.ndarray, lengths: Sequence[int]) -> List[np.ndarray]:
+        """Split concatenated ragged results into per vehicle arrays
+
+        Args:
+            results (np.ndarray): Concatenated results of `predict`
+            lengths (Sequence[int]): Number of results of each vehicle, one less
+            than number of points for headings
+
+        Returns:
+            List[np.ndarray]: Results of each vehicle
+        """
+        return np.split(results, np.cumsum(lengths)[:-1])
@@ -0,0 +1,233 @@
+import io
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Collection, Dict, Optional, Sequence
+
+import numpy as np
+
+from gnss_localization.pipeline import (
+    HEADING_COLUMNS,
+    INPUT_COLUMNS,
+    PROJECTION_COLUMNS,
+    prepare_inputs,
+    write_results,
+)
+from gnss_localization.profiling import Profiler
+
+
+def default_checkpoint_path(output_path: Path) -> Path:
+    """Checkpoint next to the results: `output.csv.checkpoint.json`"""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.name}.checkpoint.json")
+
+
+def _follow_params(mode: str, estimators: Sequence[Any], missing: Collection[str]):
+    """Parameters that must not change when a follow run is resumed"""
+    rotations = getattr(estimators[0], "proj_estimator", estimators[0]).rotation_cache
+    params = {
+        "mode": mode,
+        "offsets": [
+            estimators[0].offset_x,
+            estimators[0].offset_y,
+            estimators[0].offset_z,
+        ],
+        "rotation_resolution": None if rotations is None else rotations.resolution,
+        "missing": sorted(missing),
+        "dtype": estimators[0].dtype.str,
+    }
+    if mode == "heading":
+        params["north"] = [float(value) for value in estimators[1].north_vector]
+    return params
+
+
+def _read_checkpoint(checkpoint_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(checkpoint_path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def _write_checkpoint(checkpoint_path: Path, checkpoint: Dict[str, Any]) -> None:
+    temporary = checkpoint_path.with_name(f"{checkpoint_path.name}.tmp")
+    with open(temporary, "w") as file:
+        json.dump(checkpoint, file, indent=2)
+    os.replace(temporary, checkpoint_path)
+
+
+def follow_log(
+    data_path: Path,
+    output_path: Path,
+    mode: str,
+    estimators: Sequence[Any],
+    missing: Collection[str] = (),
+    checkpoint_path: Optional[Path] = None,
+    poll_interval: float = 0.2,
+    idle_timeout: Optional[float] = None,
+    profiler: Optional[Profiler] = None,
+) -> Dict[str, Any]:
+    """Process CSV log while it grows and append results to CSV output
+
+    Only complete lines appended since the previous poll are parsed. After every
+    increment the byte offset of the log, the size of the output and the heading
+    origin are saved to a checkpoint, so a restarted process resumes where the
+    previous one stopped. Output written after the last checkpoint, e.g. by a
+    killed process, is truncated on resume.
+
+    Args:
+        data_path (Path): Path to growing CSV file with moving data
+        output_path (Path): Path to CSV results
+        mode (str): "proj" for GNSS projections or "heading" for vehicle headings
+        estimators (Sequence[Any]): Configured `GNSSProjectionEstimator` for "proj"
+        mode, or `GNSSVehicleCoordinatesEstimator` and `GNSSHeadingEstimator` with
+        north vector for "heading" mode
+        missing (Collection[str], optional): Columns that are unavailable.
+        Defaults to ().
+        checkpoint_path (Optional[Path], optional): Path to checkpoint. Defaults
+        to `default_checkpoint_path(output_path)`.
+        poll_interval (float, optional): Seconds between checks for new lines.
+        Defaults to 0.2.
+        idle_timeout (Optional[float], optional): Stop after this many seconds
+        without new lines. If None run until interrupted. Defaults to None.
+        profiler (Optional[Profiler], optional): If set, stages of every increment
+        are recorded. Defaults to None.
+
+    Raises:
+        ValueError: If files are not CSV, north vector is not set in "heading"
+        mode, the log or parameters do not match the checkpoint, or the output
+        of the checkpoint is missing
+
+    Returns:
+        Dict[str, Any]: Final checkpoint
+    """
+    import pandas as pd
+
+    data_path, output_path = Path(data_path), Path(output_path)
+    if data_path.suffix != ".csv" or output_path.suffix != ".csv":
+        raise ValueError("Follow mode supports only CSV data and results")
+    if mode == "heading" and estimators[1].north_vector is None:
+        raise ValueError(
+            "Follow mode needs a north vector, it can not be derived from a log"
+            " that is still growing"
+        )
+    checkpoint_path = Path(checkpoint_path or default_checkpoint_path(output_path))
+    profiler = Profiler(enabled=False) if profiler is None else profiler
+    params = _follow_params(mode, estimators, missing)
+    columns = [column for column in INPUT_COLUMNS if column not in missing]
+
+    checkpoint = _read_checkpoint(checkpoint_path)
+    if checkpoint is None:
+        checkpoint = {
+            "data": str(data_path),
+            "params": params,
+            "header": None,
+            "offset": 0,
+            "rows": 0,
+            "output_size": None,
+            "origin": None,
+        }
+    elif checkpoint["params"] != params:
+        raise ValueError(
+            f"Parameters differ from the checkpoint {checkpoint_path}, remove it"
+            " to start over"
+        )
+    else:
+        if checkpoint["header"] is not None:
+            with open(data_path, "rb") as file:
+                header = file.readline().decode()
+            if header != checkpoint["header"]:
+                raise ValueError(
+                    f"{data_path} does not start with the header from the"
+                    f" checkpoint {checkpoint_path}"
+                )
+        if checkpoint["output_size"] is not None:
+            if not output_path.exists():
+                raise ValueError(
+                    f"{output_path} from the checkpoint {checkpoint_path} is"
+                    " missing, remove the checkpoint to start over"
+                )
+            with open(output_path, "r+b") as file:
+                file.truncate(checkpoint["output_size"])
+
+    idle_since = time.monotonic()
+    while True:
+        appended = _read_appended(data_path, checkpoint)
+        end = appended.rfind(b"\n") + 1
+
+        if end:
+            with profiler.stage("read") as event:
+                data = pd.read_csv(
+                    io.BytesIO(checkpoint["header"].encode() + appended[:end]),
+                    usecols=columns,
+                    skipinitialspace=True,
+                )
+                event["rows"] = len(data)
+            if len(data):
+                _process(
+                    data, output_path, mode, estimators, missing, checkpoint, profiler
+                )
+            checkpoint["offset"] += end
+            checkpoint["output_size"] = (
+                os.path.getsize(output_path) if output_path.exists() else None
+            )
+            _write_checkpoint(checkpoint_path, checkpoint)
+            idle_since = time.monotonic()
+        elif idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+            return checkpoint
+        else:
+            time.sleep(poll_interval)
+
+
+def _read_appended(data_path: Path, checkpoint: Dict[str, Any]) -> bytes:
+    """Bytes after the checkpoint offset, empty until the header is complete"""
+    size = os.path.getsize(data_path) if data_path.exists() else 0
+    if size < checkpoint["offset"]:
+        raise ValueError(f"{data_path} is shorter than the checkpoint offset")
+    if size == checkpoint["offset"]:
+        return b""
+    with open(data_path, "rb") as file:
+        if checkpoint["header"] is None:
+            header = file.readline()
+            if not header.endswith(b"\n"):
+                return b""
+            checkpoint["header"] = header.decode()
+            checkpoint["offset"] = len(header)
+        file.seek(checkpoint["offset"])
+        return file.read(size - checkpoint["offset"])
+
+
+def _process(
+    data,
+    output_path: Path,
+    mode: str,
+    estimators: Sequence[Any],
+    missing: Collection[str],
+    checkpoint: Dict[str, Any],
+    profiler: Profiler,
+) -> None:
+    """Run estimators over one increment and append results"""
+    append = checkpoint["output_size"] is not None
+    with profiler.stage("prepare", len(data)):
+        inputs = prepare_inputs(data, missing, estimators[0].dtype)
+    if mode == "proj":
+        with profiler.stage("predict", len(inputs)):
+            results = estimators[0].predict(inputs)
+        columns = PROJECTION_COLUMNS
+    else:
+        coord_estimator, heading_estimator = estimators
+        origin = checkpoint["origin"]
+        with profiler.stage("coordinates", len(inputs)):
+            vehicle_coordinates = coord_estimator.predict(inputs)
+        with profiler.stage("headings", len(vehicle_coordinates)):
+            results = heading_estimator.predict(
+                vehicle_coordinates,
+                origin=None if origin is None else np.array(origin),
+            )
+        if origin is None:
+            checkpoint["origin"] = vehicle_coordinates[0].tolist()
+        columns = HEADING_COLUMNS
+    with profiler.stage("write", len(results)):
+        write_results(results, columns, output_path, append=append)
+    checkpoint["rows"] += len(inputs)
@@ -1,9 +1,192 @@
+import math
 import numpy as np
+from concurrent.futures import Executor
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import List, Optional, Tuple, Union
 
-from gnss_localization.projection_estimator import GNSSProjectionEstimator
-from gnss_localization.projection_matrix import build_projection_matrix
-from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+from gnss_localization.parallel import run_chunked
+
+
+def compute_headings(
+    displacements: np.ndarray,
+    north_vector: Union[Tuple[float, float, float], np.ndarray],
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Signed heading of displacement vectors relative to north direction
+
+    Headings are measured in the XY plane clockwise from the north vector, so a
+    displacement along the north vector gives 0 and a displacement to its right
+    gives 90 degrees.
+
+    Args:
+        displacements (np.ndarray): Displacement vectors of shape (..., 2) or
+        (..., 3), only X and Y components are used
+        north_vector (Union[Tuple[float, float, float], np.ndarray]): Basis vector
+        of north direction, or array of vectors broadcastable to displacements
+        out (Optional[np.ndarray], optional): Preallocated array for the headings.
+        Defaults to None.
+
+    Returns:
+        np.ndarray: Heading in degrees in range [0, 360) for each displacement.
+        Displacements of zero length have no direction and get NaN, as well as
+        displacements measured from a north vector of zero length in XY plane
+    """
+    north_vector = np.asarray(north_vector, dtype=float)
+    north_x, north_y = north_vector[..., 0], north_vector[..., 1]
+
+    d_x, d_y = displacements[..., 0], displacements[..., 1]
+    headings = np.arctan2(
+        d_x * north_y - d_y * north_x, d_x * north_x + d_y * north_y, out=out
+    )
+    np.rad2deg(headings, out=headings)
+    np.mod(headings, 360.0, out=headings)
+    headings[headings == 360.0] = 0.0
+    headings[(d_x == 0) & (d_y == 0)] = np.nan
+    no_north = (north_x == 0.0) & (north_y == 0.0)
+    if np.any(no_north):
+        headings[np.broadcast_to(no_north, headings.shape)] = np.nan
+    return headings
+
+
+def compute_window_headings(
+    coordinates: np.ndarray,
+    window: int,
+    north_vector: Union[Tuple[float, float, float], np.ndarray],
+    out: Optional[np.ndarray] = None,
+    n_jobs: int = 1,
+    executor: Optional[Executor] = None,
+) -> np.ndarray:
+    """Heading of the direction of motion over the last `window` points
+
+    The direction is the least squares slope of X and Y over the point index in
+    the window, so it depends only on recent points and is robust to noise of
+    single points. Windows are strided views of the coordinates, nothing is
+    copied per window.
+
+    Args:
+        coordinates (np.ndarray): Points of shape (N, 2) or (N, 3)
+        window (int): Number of points in the window, at least 2
+        north_vector (Union[Tuple[float, float, float], np.ndarray]): Basis vector
+        of north direction
+        out (Optional[np.ndarray], optional): Preallocated array of shape (N,) for
+        the headings. Defaults to None.
+        n_jobs (int, optional): Threads computing chunks of rows, -1 for one per
+        core. Defaults to 1.
+        executor (Optional[Executor], optional): Thread pool reused between calls
+        instead of n_jobs. Defaults to None.
+
+    Raises:
+        ValueError: If window is shorter than 2 points
+
+    Returns:
+        np.ndarray: Heading of every point in degrees clockwise from north in range
+        [0, 360). The first `window - 1` points and points without motion in
+        their window get NaN
+    """
+    if window < 2:
+        raise ValueError("Heading window must contain at least 2 points")
+    if out is None:
+        out = np.empty(len(coordinates))
+    out[: window - 1] = np.nan
+    if len(coordinates) < window:
+        return out
+
+    weights = np.arange(window) - (window - 1) / 2
+    weights /= np.dot(weights, weights)
+    windows = sliding_window_view(coordinates[:, :2], window, axis=0)
+    headings = out[window - 1 :]
+    run_chunked(
+        lambda rows: compute_headings(
+            windows[rows] @ weights, north_vector, out=headings[rows]
+        ),
+        len(windows),
+        n_jobs,
+        executor,
+    )
+    return out
+
+
+class OnlineNorthEstimator:
+    def __init__(self) -> None:
+        """Main direction of travel updated in O(1) per sample
+
+        The north vector is the principal axis of the XY positions seen so far,
+        oriented from the first towards the last position. Only the mean and the
+        covariance of the positions are kept, so long and streaming tracks never
+        revisit history, and unlike the first and the last positions alone the
+        axis is not thrown off by a curved route.
+        """
+        self.count = 0
+        self.mean_x = self.mean_y = 0.0
+        self._sxx = self._sxy = self._syy = 0.0
+        self.first: Optional[Tuple[float, float]] = None
+        self.last: Optional[Tuple[float, float]] = None
+
+    def reset(self) -> None:
+        """Forget all positions"""
+        self.__init__()
+
+    def update(self, x: float, y: float) -> None:
+        """Add single position
+
+        Args:
+            x (float): X coordinate
+            y (float): Y coordinate
+        """
+        self.count += 1
+        d_x, d_y = x - self.mean_x, y - self.mean_y
+        self.mean_x += d_x / self.count
+        self.mean_y += d_y / self.count
+        self._sxx += d_x * (x - self.mean_x)
+        self._sxy += d_x * (y - self.mean_y)
+        self._syy += d_y * (y - self.mean_y)
+        if self.first is None:
+            self.first = (x, y)
+        self.last = (x, y)
+
+    def update_batch(self, points: np.ndarray) -> None:
+        """Add positions of a chunk, same as `update` for every point
+
+        Args:
+            points (np.ndarray): Positions of shape (N, 2) or (N, 3)
+        """
+        if not len(points):
+            return
+        x, y = points[:, 0], points[:, 1]
+        count = len(points)
+        mean_x, mean_y = float(x.mean()), float(y.mean())
+        d_x, d_y = x - mean_x, y - mean_y
+        total = self.count + count
+        delta_x, delta_y = mean_x - self.mean_x, mean_y - self.mean_y
+        weight = self.count * count / total
+        self._sxx += float(d_x @ d_x) + delta_x * delta_x * weight
+        self._sxy += float(d_x @ d_y) + delta_x * delta_y * weight
+        self._syy += float(d_y @ d_y) + delta_y * delta_y * weight
+        self.mean_x += delta_x * count / total
+        self.mean_y += delta_y * count / total
+        self.count = total
+        if self.first is None:
+            self.first = (float(x[0]), float(y[0]))
+        self.last = (float(x[-1]), float(y[-1]))
+
+    @property
+    def north_vector(self) -> Optional[Tuple[float, float, float]]:
+        """Unit vector along the principal axis, None until the positions spread"""
+        a, b, c = self._sxx, self._sxy, self._syy
+        # eigenvector of the larger eigenvalue of [[a, b], [b, c]]
+        larger = (a + c) / 2 + math.hypot((a - c) / 2, b)
+        n_x, n_y = (larger - c, b) if a >= c else (b, larger - a)
+        length = math.hypot(n_x, n_y)
+        if length == 0.0:
+            return None
+        if self.first is not None and self.last is not None:
+            if (
+                n_x * (self.last[0] - self.first[0])
+                + n_y * (self.last[1] - self.first[1])
+                < 0
+            ):
+                length = -length
+        return (n_x / length, n_y / length, 0.0)
 
 
 class GNSSHeadingEstimator:
@@ -13,6 +196,7 @@ class GNSSHeadingEstimator:
         offset_y: float,
         offset_z: float,
         north_direction: Optional[Tuple[float, float, float]],
+        window: Optional[int] = None,
     ) -> None:
         """Calculates the heading of body using data from GNSS module.
 
@@ -25,12 +209,27 @@ class GNSSHeadingEstimator:
             the centre of moving plane (height)
             north_direction (Optional[Tuple[float, float, float]]): Basis vector of
             north direction. If None the vector would be computed from moving plane data
+            as the direction from the first to the last point. If they coincide,
+            e.g. on a closed loop, there is no direction and all headings are NaN
+            window (Optional[int], optional): If set, every heading is the direction
+            of motion over the last `window` points instead of the direction from
+            the origin, see `compute_window_headings`. Defaults to None.
+
+        Raises:
+            ValueError: If north vector has zero length in XY plane or window is
+            shorter than 2 points
         """
+        if north_direction is not None and not any(north_direction[:2]):
+            raise ValueError("North vector must have non zero X or Y component")
 
         self.offset_x = offset_x
         self.offset_y = offset_y
         self.offset_z = offset_z
         self.north_vector = north_direction
+        if window is not None and window < 2:
+            raise ValueError("Heading window must contain at least 2 points")
+        self.window = window
+        self._history: Optional[np.ndarray] = None
 
     def compute_north_from_data(self, data: np.ndarray) -> Tuple[float, float, float]:
         """Compute north direction from data of moving plane
@@ -46,27 +245,41 @@ class GNSSHeadingEstimator:
         return tuple(north_vector.tolist())
 
     def predict(
-        self, vehicle_coordinates: Union[np.ndarray, List[float]]
+        self,
+        vehicle_coordinates: Union[np.ndarray, List[float]],
+        origin: Optional[np.ndarray] = None,
+        n_jobs: int = 1,
+        executor: Optional[Executor] = None,
     ) -> np.ndarray:
         """Computes the heading angle for each point
 
         Args:
             vehicle_coordinates (Union[np.ndarray, List[float]]):
-            Single data point in format (x, y, z, roll, pitch, yaw) or array of these
-            points
+            Single data point in format (x, y, z) or array of these points
+            origin (Optional[np.ndarray], optional): Point the headings are measured
+            from. If None the first point is used as origin and gets no heading.
+            Pass the first point of a track to process it in chunks. With a window
+            the value is not used, passing it means that the points continue the
+            track of the previous call. Defaults to None.
+            n_jobs (int, optional): Threads computing chunks of rows, -1 for one
+            per core. Defaults to 1.
+            executor (Optional[Executor], optional): Thread pool reused between
+            calls instead of n_jobs. Defaults to None.
 
         Raises:
             AssertionError: If input schema unsupported
             ValueError: Wrong input type
 
         Returns:
-            np.ndarray: Heading for each point
+            np.ndarray: Heading for each point except the origin, in degrees
+            clockwise from north in range [0, 360). Points that coincide with the
+            origin get NaN
         """
         if isinstance(vehicle_coordinates, (list, tuple)):
             assert (
                 len(vehicle_coordinates) == 3
             ), "Input must contain 3 elements: (x, y, z)"
-            vehicle_coordinates = np.array([list(vehicle_coordinates)]).reshape(-1, 6)
+            vehicle_coordinates = np.array([list(vehicle_coordinates)]).reshape(-1, 3)
         elif isinstance(vehicle_coordinates, np.ndarray):
             assert (
                 vehicle_coordinates.shape[1] == 3
@@ -79,13 +292,55 @@ class GNSSHeadingEstimator:
             )
         if self.north_vector is None:
             self.north_vector = self.compute_north_from_data(vehicle_coordinates)
-        headings_cos = np.array(
-            [
-                (self.north_vector @ coordinates)
-                / (np.linalg.norm(self.north_vector) * np.linalg.norm(coordinates))
-                for coordinates in (vehicle_coordinates - vehicle_coordinates[0])
-            ]
-        )[1:]
-        headings = np.arccos(headings_cos)
-        headings = np.rad2deg(headings)
+        if self.window is not None:
+            headings = self._predict_window(
+                vehicle_coordinates, origin is not None, n_jobs, executor
+            )
+            return headings if origin is not None else headings[1:]
+        if origin is None:
+            origin = vehicle_coordinates[0]
+            vehicle_coordinates = vehicle_coordinates[1:]
+        if n_jobs == 1 and executor is None:
+            return compute_headings(vehicle_coordinates - origin, self.north_vector)
+
+        headings = np.empty(
+            len(vehicle_coordinates),
+            dtype=np.result_type(vehicle_coordinates, origin, np.float64),
+        )
+        run_chunked(
+            lambda rows: compute_headings(
+                vehicle_coordinates[rows] - origin, self.north_vector, headings[rows]
+            ),
+            len(vehicle_coordinates),
+            n_jobs,
+            executor,
+        )
+        return headings
+
+    def _predict_window(
+        self,
+        vehicle_coordinates: np.ndarray,
+        continued: bool,
+        n_jobs: int,
+        executor: Optional[Executor],
+    ) -> np.ndarray:
+        """Window headings of every point, the first points of a continued track
+        use the last points of the previous call"""
+        window = self.window
+        history = self._history if continued and self._history is not None else None
+        headings = compute_window_headings(
+            vehicle_coordinates,
+            window,
+            self.north_vector,
+            n_jobs=n_jobs,
+            executor=executor,
+        )
+        if history is not None:
+            head = np.concatenate([history, vehicle_coordinates[: window - 1]])
+            head_headings = compute_window_headings(head, window, self.north_vector)
+            headings[: len(head) - len(history)] = head_headings[len(history) :]
+            tail = np.concatenate([history, vehicle_coordinates[-(window - 1) :]])
+        else:
+            tail = vehicle_coordinates
+        self._history = tail[-(window - 1) :].copy()
         return headings
@@ -0,0 +1,391 @@
+import io
+import numpy as np
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+NMEA_COLUMNS = (
+    "time_s",
+    "x_mm",
+    "y_mm",
+    "z_mm",
+    "roll_deg",
+    "pitch_deg",
+    "yaw_deg",
+)
+NMEA_BYTES_PER_ROW = 160
+# hhmmss.sss and longer fractions
+TIME_FIELD_WIDTH = 16
+WGS84_A = 6378137.0
+WGS84_E2 = 6.69437999014e-3
+
+_HEX_DIGITS = np.full(256, -1, dtype=np.int16)
+for _value, _digit in enumerate(b"0123456789ABCDEF"):
+    _HEX_DIGITS[_digit] = _value
+    _HEX_DIGITS[bytes([_digit]).lower()[0]] = _value
+
+
+def _sentence_code(name: bytes) -> int:
+    return (name[0] << 16) | (name[1] << 8) | name[2]
+
+
+GGA, RMC, HDT = _sentence_code(b"GGA"), _sentence_code(b"RMC"), _sentence_code(b"HDT")
+
+
+def _split_sentences(buffer: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Find sentences in the buffer and validate their checksums
+
+    Args:
+        buffer (np.ndarray): Raw bytes as uint8 array
+
+    Returns:
+        Tuple[np.ndarray, ...]: Start offsets, checksum delimiter offsets and type
+        codes of valid sentences, and start offsets of invalid sentences
+    """
+    newlines = np.flatnonzero(buffer == ord("\n"))
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(buffer)]))
+    non_empty = ends > starts
+    starts, ends = starts[non_empty], ends[non_empty]
+    ends -= buffer[ends - 1] == ord("\r")
+    non_empty = ends > starts
+    starts, ends = starts[non_empty], ends[non_empty]
+
+    stars = np.flatnonzero(buffer == ord("*"))
+    if not len(stars):
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, empty.astype(np.int32), starts
+    star = stars[np.minimum(np.searchsorted(stars, starts), len(stars) - 1)]
+    valid = (
+        (buffer[starts] == ord("$"))
+        & (star > starts + 6)
+        & (star < ends)
+        & (ends - star == 3)
+    )
+    bounds = np.empty(2 * len(starts), dtype=np.intp)
+    bounds[0::2] = np.minimum(starts + 1, len(buffer) - 1)
+    bounds[1::2] = np.where(valid, star, bounds[0::2])
+    checksums = np.bitwise_xor.reduceat(buffer, bounds)[0::2] if len(bounds) else star
+    digits = np.minimum(star + 1, len(buffer) - 2)
+    high, low = _HEX_DIGITS[buffer[digits]], _HEX_DIGITS[buffer[digits + 1]]
+    valid &= (high >= 0) & (low >= 0) & (checksums == high * 16 + low)
+
+    invalid = starts[~valid]
+    starts, star = starts[valid], star[valid]
+    codes = (
+        (buffer[starts + 3].astype(np.int32) << 16)
+        | (buffer[starts + 4].astype(np.int32) << 8)
+        | buffer[starts + 5]
+    )
+    return starts, star, codes, invalid
+
+
+def _read_fields(
+    buffer: np.ndarray, starts: np.ndarray, stars: np.ndarray, fields: Tuple[int, ...]
+) -> np.ndarray:
+    """Parse numeric fields of the selected sentences with a single CSV pass
+
+    Args:
+        buffer (np.ndarray): Raw bytes as uint8 array
+        starts (np.ndarray): Start offsets of the sentences
+        stars (np.ndarray): Offsets of checksum delimiters of the sentences
+        fields (Tuple[int, ...]): Indices of comma separated fields to parse
+
+    Returns:
+        np.ndarray: Array of shape NxK with NaN for empty fields
+    """
+    if not len(starts):
+        return np.empty((0, len(fields)))
+    lengths = stars - starts + 1
+    newlines = np.cumsum(lengths) - 1
+    text = buffer[
+        np.arange(newlines[-1] + 1)
+        + np.repeat(starts - newlines + lengths - 1, lengths)
+    ]
+    text[newlines] = ord("\n")
+    commas = np.searchsorted(np.flatnonzero(text == ord(",")), newlines)
+    n_fields = max(int(np.diff(commas, prepend=0).max()) + 1, max(fields) + 1)
+    import pandas as pd
+
+    values = pd.read_csv(
+        io.BytesIO(text.tobytes()),
+        header=None,
+        names=range(n_fields),
+        usecols=list(fields),
+        dtype=np.float64,
+        engine="c",
+    )
+    return values[list(fields)].to_numpy()
+
+
+def _field_chars(
+    buffer: np.ndarray, starts: np.ndarray, stars: np.ndarray, fields: Tuple[int, ...]
+) -> np.ndarray:
+    """First character of comma separated fields of every sentence
+
+    Args:
+        buffer (np.ndarray): Raw bytes as uint8 array
+        starts (np.ndarray): Start offsets of the sentences
+        stars (np.ndarray): Offsets of checksum delimiters of the sentences
+        fields (Tuple[int, ...]): Indices of the fields
+
+    Returns:
+        np.ndarray: Characters as uint8 array of shape NxK, 0 if the sentence has
+        no such field
+    """
+    chars = np.zeros((len(starts), len(fields)), dtype=np.uint8)
+    if not len(starts):
+        return chars
+    commas = np.flatnonzero(buffer[starts[0] : stars[-1]] == ord(",")) + starts[0]
+    first = np.searchsorted(commas, starts)
+    n_commas = np.searchsorted(commas, stars) - first
+    for i, field in enumerate(fields):
+        present = n_commas >= field
+        chars[present, i] = buffer[commas[first[present] + field - 1] + 1]
+    return chars
+
+
+def _time_fields(
+    buffer: np.ndarray, starts: np.ndarray, stars: np.ndarray
+) -> np.ndarray:
+    """Unparsed time fields of GGA and RMC sentences, to tell epochs apart
+
+    Args:
+        buffer (np.ndarray): Raw bytes as uint8 array
+        starts (np.ndarray): Start offsets of the sentences
+        stars (np.ndarray): Offsets of checksum delimiters of the sentences
+
+    Returns:
+        np.ndarray: Characters as uint8 array of shape Nx`TIME_FIELD_WIDTH`,
+        padded with zeros after the field
+    """
+    offsets = starts[:, np.newaxis] + 7 + np.arange(TIME_FIELD_WIDTH)
+    chars = buffer[np.minimum(offsets, stars[:, np.newaxis])]
+    chars[np.cumsum((chars == ord(",")) | (chars == ord("*")), axis=1) > 0] = 0
+    return chars
+
+
+def _degrees(values: np.ndarray, hemispheres: np.ndarray, negative: str) -> np.ndarray:
+    """Convert NMEA (d)ddmm.mmmm angles to signed decimal degrees"""
+    whole = np.floor(values / 100.0)
+    degrees = whole + (values - whole * 100.0) / 60.0
+    return np.where(hemispheres == ord(negative), -degrees, degrees)
+
+
+def _seconds_of_day(values: np.ndarray) -> np.ndarray:
+    """Convert NMEA hhmmss.sss times to seconds since midnight"""
+    hours = np.floor(values / 10000.0)
+    minutes = np.floor(values / 100.0) - hours * 100.0
+    return hours * 3600.0 + minutes * 60.0 + (values - np.floor(values / 100.0) * 100.0)
+
+
+class NMEAParser:
+    def __init__(self, origin: Optional[Tuple[float, float, float]] = None) -> None:
+        """Bulk parser of NMEA GGA, RMC and HDT sentences.
+
+        Sentences are located, checksummed and split with array operations over
+        the raw bytes, and numeric fields of each sentence type are parsed in one
+        pass of the pandas C parser, so no Python object is built per sentence.
+
+        Consecutive GGA and RMC sentences with the same time field form a position
+        epoch. Its position comes from the GGA sentence, or from RMC if the epoch
+        has no GGA, and is converted to local east (x), north (y) and up (z)
+        coordinates in millimetres around the origin. RMC has no altitude, such
+        epochs keep the altitude of the previous GGA epoch, or zero before the
+        first one. Yaw is the latest HDT heading at each position epoch and is NaN
+        before the first HDT sentence. Roll and pitch are not part of these
+        sentences and are zero.
+
+        Args:
+            origin (Optional[Tuple[float, float, float]], optional): Latitude and
+            longitude in degrees and altitude in metres of local coordinates origin.
+            If None the first position is used. Defaults to None.
+        """
+        self.origin = origin
+        self.invalid_sentences = 0
+        self._pending = b""
+        self._last_yaw = np.nan
+        self._last_altitude = 0.0
+        self._last_time = None
+        self._day_offset = 0.0
+
+    def feed(self, data: bytes, final: bool = False) -> "pd.DataFrame":
+        """Parse next block of the stream
+
+        Every complete line is consumed, except for the last position epoch, which
+        may continue in the next block. Its position sentences and its latest
+        heading are kept until the next call together with the incomplete line,
+        so the result does not depend on how the stream is split into blocks.
+
+        Args:
+            data (bytes): Next block of raw NMEA data
+            final (bool, optional): No more data follows. Defaults to False.
+
+        Returns:
+            pd.DataFrame: Parsed epochs with columns from `NMEA_COLUMNS`
+        """
+        text = self._pending + data
+        complete = len(text) if final else text.rfind(b"\n") + 1
+        self._pending = text[complete:]
+        buffer = np.frombuffer(text, dtype=np.uint8, count=complete)
+        starts, stars, codes, invalid = _split_sentences(buffer)
+        self.invalid_sentences += len(invalid)
+        positions = np.flatnonzero((codes == GGA) | (codes == RMC))
+        times = _time_fields(buffer, starts[positions], stars[positions])
+        new_epoch = np.ones(len(times), dtype=bool)
+        new_epoch[1:] = np.any(times[1:] != times[:-1], axis=1)
+        groups = np.flatnonzero(new_epoch)
+
+        if not final and len(groups):
+            # carry the open epoch: its position sentences and its latest heading
+            first = positions[groups[-1]]
+            headings = np.flatnonzero(codes[first:] == HDT)[-1:] + first
+            carried = np.sort(np.concatenate((positions[groups[-1] :], headings)))
+            self._pending = (
+                b"".join(
+                    text[starts[i] : stars[i] + 3] + b"\n" for i in carried.tolist()
+                )
+                + self._pending
+            )
+            starts, stars, codes = starts[:first], stars[:first], codes[:first]
+            positions, groups = positions[: groups[-1]], groups[:-1]
+        return self._epochs(buffer, starts, stars, codes, positions, groups)
+
+    def _epochs(
+        self,
+        buffer: np.ndarray,
+        starts: np.ndarray,
+        stars: np.ndarray,
+        codes: np.ndarray,
+        positions: np.ndarray,
+        groups: np.ndarray,
+    ) -> "pd.DataFrame":
+        import pandas as pd
+
+        headings = np.flatnonzero(codes == HDT)
+        yaw = _read_fields(buffer, starts[headings], stars[headings], (1,))[:, 0]
+        next_epochs = np.append(positions[groups[1:]], len(starts))[: len(groups)]
+        latest = np.searchsorted(headings, next_epochs) - 1
+        epoch_yaw = np.full(len(groups), self._last_yaw)
+        if len(yaw):
+            known = latest >= 0
+            epoch_yaw[known] = yaw[latest[known]]
+            self._last_yaw = yaw[-1]
+
+        # the first GGA sentence of every epoch, or its first RMC
+        gga = codes[positions] == GGA
+        epoch_ids = np.repeat(np.arange(len(groups)), np.diff(groups, append=len(gga)))
+        chosen = np.lexsort((~gga, epoch_ids))[groups]
+        gga, sentences = gga[chosen], positions[chosen]
+        time, lat, lon, alt = np.zeros((4, len(sentences)))
+        fixed = np.zeros(len(sentences), dtype=bool)
+        hemispheres = np.zeros((len(sentences), 2), dtype=np.uint8)
+        gga_starts, gga_stars = starts[sentences[gga]], stars[sentences[gga]]
+        time[gga], lat[gga], lon[gga], quality, alt[gga] = _read_fields(
+            buffer, gga_starts, gga_stars, (1, 2, 4, 6, 9)
+        ).T
+        fixed[gga] = quality > 0
+        hemispheres[gga] = _field_chars(buffer, gga_starts, gga_stars, (3, 5))
+        rmc_starts, rmc_stars = starts[sentences[~gga]], stars[sentences[~gga]]
+        time[~gga], lat[~gga], lon[~gga] = _read_fields(
+            buffer, rmc_starts, rmc_stars, (1, 3, 5)
+        ).T
+        status, hemispheres[~gga, 0], hemispheres[~gga, 1] = _field_chars(
+            buffer, rmc_starts, rmc_stars, (2, 4, 6)
+        ).T
+        fixed[~gga] = status == ord("A")
+        lat = _degrees(lat, hemispheres[:, 0], "S")
+        lon = _degrees(lon, hemispheres[:, 1], "W")
+        fixed &= ~(np.isnan(time) | np.isnan(lat) | np.isnan(lon) | np.isnan(alt))
+
+        altitudes = np.concatenate(([self._last_altitude], alt))
+        measured = np.concatenate(([True], gga & fixed))
+        previous = np.maximum.accumulate(
+            np.where(measured, np.arange(len(measured)), 0)
+        )
+        alt[~gga] = altitudes[previous[1:]][~gga]
+        self._last_altitude = float(altitudes[previous[-1]])
+        time, lat, lon, alt = time[fixed], lat[fixed], lon[fixed], alt[fixed]
+
+        if self.origin is None and len(lat):
+            self.origin = (float(lat[0]), float(lon[0]), float(alt[0]))
+        epoch_time = self._unwrap_days(_seconds_of_day(time))
+        x, y, z = self._local_coordinates(lat, lon, alt)
+        zeros = np.zeros(len(x))
+        return pd.DataFrame(
+            dict(
+                zip(
+                    NMEA_COLUMNS,
+                    (epoch_time, x, y, z, zeros, zeros, epoch_yaw[fixed]),
+                )
+            )
+        )
+
+    def _unwrap_days(self, seconds: np.ndarray) -> np.ndarray:
+        """Make UTC times of day monotonic across midnight"""
+        if not len(seconds):
+            return seconds
+        previous = np.concatenate(
+            ([seconds[0] if self._last_time is None else self._last_time], seconds)
+        )
+        rollovers = np.cumsum(np.diff(previous) < -43200.0) * 86400.0
+        times = seconds + rollovers + self._day_offset
+        self._day_offset += rollovers[-1]
+        self._last_time = seconds[-1]
+        return times
+
+    def _local_coordinates(
+        self, lat: np.ndarray, lon: np.ndarray, alt: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Project geodetic coordinates on the tangent plane at the origin"""
+        if self.origin is None:
+            return lat, lon, alt
+        lat0, lon0, alt0 = self.origin
+        sin_lat0 = np.sin(np.deg2rad(lat0))
+        denominator = np.sqrt(1.0 - WGS84_E2 * sin_lat0**2)
+        meridian = WGS84_A * (1.0 - WGS84_E2) / denominator**3 + alt0
+        prime_vertical = WGS84_A / denominator + alt0
+        x = np.deg2rad(lon - lon0) * prime_vertical * np.cos(np.deg2rad(lat0))
+        y = np.deg2rad(lat - lat0) * meridian
+        return x * 1000.0, y * 1000.0, (alt - alt0) * 1000.0
+
+
+def read_nmea(
+    path: Path,
+    chunk_size: Optional[int] = None,
+    origin: Optional[Tuple[float, float, float]] = None,
+) -> Union["pd.DataFrame", Iterator["pd.DataFrame"]]:
+    """Read NMEA log as table in the layout of CSV moving data
+
+    Args:
+        path (Path): Path to file with NMEA sentences
+        chunk_size (Optional[int], optional): Approximate number of rows per chunk.
+        If None the whole file is read at once. Defaults to None.
+        origin (Optional[Tuple[float, float, float]], optional): Latitude and
+        longitude in degrees and altitude in metres of local coordinates origin.
+        If None the first position is used. Defaults to None.
+
+    Returns:
+        Union[pd.DataFrame, Iterator[pd.DataFrame]]: Table with columns from
+        `NMEA_COLUMNS` or iterator over its chunks
+    """
+    parser = NMEAParser(origin)
+    if chunk_size is None:
+        with open(path, "rb") as file:
+            return parser.feed(file.read(), final=True)
+    return _iter_nmea(path, parser, chunk_size * NMEA_BYTES_PER_ROW)
+
+
+def _iter_nmea(
+    path: Path, parser: NMEAParser, block_size: int
+) -> Iterator["pd.DataFrame"]:
+    with open(path, "rb") as file:
+        while True:
+            block = file.read(block_size)
+            chunk = parser.feed(block, final=not block)
+            if len(chunk):
+                yield chunk
+            if not block:
+                return
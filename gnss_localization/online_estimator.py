@@ -0,0 +1,128 @@
+import math
+import numpy as np
+from typing import Optional, Tuple
+
+from gnss_localization.heading_estimator import OnlineNorthEstimator
+
+
+class GNSSOnlineEstimator:
+    def __init__(
+        self,
+        offset_x: float,
+        offset_y: float,
+        offset_z: float,
+        north_direction: Optional[Tuple[float, float, float]],
+    ) -> None:
+        """Computes GNSS projection, vehicle coordinates and heading sample by sample.
+
+        Streaming counterpart of `GNSSProjectionEstimator`,
+        `GNSSVehicleCoordinatesEstimator` and `GNSSHeadingEstimator` for real-time
+        loops. Offsets are unpacked once and every `update` writes into the same
+        preallocated buffer, so no arrays are created per sample.
+
+        Args:
+            offset_x (float): Offset of the origin of GNSS module in X direction from
+            the centre of moving plane
+            offset_y (float): Offset of the origin of GNSS module in Y direction from
+            the centre of moving plane
+            offset_z (float): Offset of the origin of GNSS module in Z direction from
+            the centre of moving plane (height)
+            north_direction (Optional[Tuple[float, float, float]]): Basis vector of
+            north direction. If None it is the main direction of the track so far,
+            updated with every sample by `OnlineNorthEstimator`
+
+        Raises:
+            ValueError: If north vector has zero length in XY plane
+        """
+        self.offset_x = float(offset_x)
+        self.offset_y = float(offset_y)
+        self.offset_z = float(offset_z)
+        self.north_vector = north_direction
+        self.north_estimator: Optional[OnlineNorthEstimator] = None
+        if north_direction is None:
+            self.north_estimator = OnlineNorthEstimator()
+        else:
+            self._north_x = float(north_direction[0])
+            self._north_y = float(north_direction[1])
+            if self._north_x == 0.0 and self._north_y == 0.0:
+                raise ValueError("North vector must have non zero X or Y component")
+
+        self._buffer = np.empty(6)
+        self.projection = self._buffer[:3]
+        self.vehicle_coordinates = self._buffer[3:]
+        self.origin: Optional[Tuple[float, float]] = None
+
+    def reset(self) -> None:
+        """Forget the origin, the next sample starts a new track"""
+        self.origin = None
+        if self.north_estimator is not None:
+            self.north_estimator.reset()
+
+    def update(
+        self,
+        x: float,
+        y: float,
+        z: float,
+        roll: float,
+        pitch: float,
+        yaw: float,
+    ) -> Tuple[np.ndarray, np.ndarray, float]:
+        """Process single data point
+
+        The returned arrays are views of an internal buffer and are overwritten by
+        the next call, copy them if they have to be kept.
+
+        Args:
+            x (float): X coordinate of GNSS module
+            y (float): Y coordinate of GNSS module
+            z (float): Z coordinate of GNSS module
+            roll (float): Rotation around X axis in radians
+            pitch (float): Rotation around Y axis in radians
+            yaw (float): Rotation around Z axis in radians
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, float]: Projection of GNSS module, vehicle
+            coordinates and heading in degrees clockwise from north. The heading of
+            the first sample and of samples at the origin is NaN, as well as
+            headings before the estimated north direction is defined
+        """
+        cos_y, sin_y = math.cos(yaw), math.sin(yaw)
+        a_x = cos_y * self.offset_x + sin_y * self.offset_y
+        a_y = cos_y * self.offset_y - sin_y * self.offset_x
+        cos_p, sin_p = math.cos(pitch), math.sin(pitch)
+        p_x = cos_p * a_x + sin_p * self.offset_z
+        b_z = cos_p * self.offset_z - sin_p * a_x
+        cos_r, sin_r = math.cos(roll), math.sin(roll)
+        p_y = cos_r * a_y + sin_r * b_z
+        p_z = cos_r * b_z - sin_r * a_y
+
+        v_x, v_y = x - p_x, y - p_y
+        self._buffer[:] = (p_x, p_y, p_z, v_x, v_y, z - p_z)
+        if self.north_estimator is not None:
+            self.north_estimator.update(v_x, v_y)
+            north = self.north_estimator.north_vector
+            if north is None:
+                self._north_x = self._north_y = 0.0
+            else:
+                self._north_x, self._north_y = north[0], north[1]
+
+        if self.origin is None:
+            self.origin = (v_x, v_y)
+            return self.projection, self.vehicle_coordinates, math.nan
+        d_x, d_y = v_x - self.origin[0], v_y - self.origin[1]
+        if (d_x == 0.0 and d_y == 0.0) or (
+            self._north_x == 0.0 and self._north_y == 0.0
+        ):
+            return self.projection, self.vehicle_coordinates, math.nan
+        heading = (
+            math.degrees(
+                math.atan2(
+                    d_x * self._north_y - d_y * self._north_x,
+                    d_x * self._north_x + d_y * self._north_y,
+                )
+            )
+            % 360.0
+        )
+        if heading == 360.0:
+            heading = 0.0
+        return self.projection, self.vehicle_coordinates, heading
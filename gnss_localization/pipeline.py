@@ -0,0 +1,650 @@
+import numpy as np
+from numpy.typing import DTypeLike
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Collection, Dict, Iterator, Optional, Tuple, Union
+
+from gnss_localization.binary_io import (
+    load_columns,
+    load_records,
+    save_columns,
+    save_records,
+)
+from gnss_localization.heading_estimator import GNSSHeadingEstimator
+from gnss_localization.nmea import read_nmea
+from gnss_localization.profiling import Profiler
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+from gnss_localization.smoothing import GNSSTrackSmoother
+from gnss_localization.time_sync import (
+    ANGLE_COLUMNS,
+    TIME_COLUMN,
+    synchronize,
+    synchronize_chunks,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+INPUT_COLUMNS = ("x_mm", "y_mm", "z_mm", "roll_deg", "pitch_deg", "yaw_deg")
+PROJECTION_COLUMNS = ("x_mm", "y_mm", "z_mm")
+HEADING_COLUMNS = ("angle",)
+COORDINATE_COLUMNS = ("x_mm", "y_mm", "z_mm")
+PIPELINE_COLUMNS = (
+    "proj_x_mm",
+    "proj_y_mm",
+    "proj_z_mm",
+    "vehicle_x_mm",
+    "vehicle_y_mm",
+    "vehicle_z_mm",
+    "angle",
+)
+
+Data = Union["pd.DataFrame", np.ndarray]
+
+
+def prepare_inputs(
+    data: Data, missing: Collection[str] = (), dtype: DTypeLike = np.float64
+) -> np.ndarray:
+    """Build estimator inputs from table with moving data
+
+    The columns are copied once into a single Nx6 array and angles are converted
+    from degrees to radians in place.
+
+    Args:
+        data (Data): Moving data with columns from `INPUT_COLUMNS`, either table or
+        structured array
+        missing (Collection[str], optional): Columns that are unavailable and
+        filled with zeros. Defaults to ().
+        dtype (DTypeLike, optional): Type of inputs, e.g. `dtype` of the
+        estimator. Defaults to np.float64.
+
+    Returns:
+        np.ndarray: Array of shape Nx6 in format (x, y, z, roll, pitch, yaw)
+    """
+    inputs = np.empty((len(data), len(INPUT_COLUMNS)), dtype=dtype)
+    for i, column in enumerate(INPUT_COLUMNS):
+        if column in missing:
+            inputs[:, i] = 0.0
+        else:
+            inputs[:, i] = np.asarray(data[column])
+    np.deg2rad(inputs[:, 3:], out=inputs[:, 3:])
+    return inputs
+
+
+def import_pandas(profiler: Profiler) -> None:
+    """Import pandas as a stage of its own, so the first read is timed without it
+
+    Args:
+        profiler (Profiler): Profiler recording the "import" stage
+    """
+    if "pandas" in sys.modules:
+        return
+    with profiler.stage("import"):
+        import pandas  # pylint: disable=unused-import
+
+
+def read_table(
+    data_path: Path, columns: Collection[str], chunk_size: Optional[int] = None
+) -> Union[Data, Iterator[Data]]:
+    """Read table, skipping unneeded columns
+
+    The format is chosen by file extension: CSV text, .nmea log with GGA/RMC/HDT
+    sentences, .npy file with float64 records which is memory-mapped, or .npz file
+    with one array per column.
+
+    Args:
+        data_path (Path): Path to file
+        columns (Collection[str]): Required columns. NMEA logs always provide
+        `NMEA_COLUMNS`
+        chunk_size (Optional[int], optional): Number of rows per chunk. If None the
+        whole file is read at once. Defaults to None.
+
+    Raises:
+        ValueError: If required columns are absent in the file
+
+    Returns:
+        Union[Data, Iterator[Data]]: Table or iterator over its chunks
+    """
+    import pandas as pd
+
+    suffix = Path(data_path).suffix
+    if suffix == ".nmea":
+        return read_nmea(data_path, chunk_size)
+    if suffix == ".npy":
+        data = load_records(data_path)
+        absent = set(columns) - set(data.dtype.names or ())
+    elif suffix == ".npz":
+        values, names = load_columns(data_path)
+        data = pd.DataFrame(values, columns=names)
+        absent = set(columns) - set(names)
+    else:
+        return pd.read_csv(
+            str(data_path),
+            usecols=list(columns),
+            skipinitialspace=True,
+            chunksize=chunk_size,
+        )
+    if absent:
+        raise ValueError(f"Columns {sorted(absent)} are absent in {data_path}")
+    if chunk_size is None:
+        return data
+    return (data[i : i + chunk_size] for i in range(0, len(data), chunk_size))
+
+
+def read_data(
+    data_path: Path,
+    missing: Collection[str] = (),
+    chunk_size: Optional[int] = None,
+    attitude_path: Optional[Path] = None,
+    with_time: bool = False,
+) -> Union[Data, Iterator[Data]]:
+    """Read moving data, skipping unavailable columns
+
+    If attitude is recorded separately, it is resampled onto timestamps of
+    positions and positions outside of the time span of attitude are dropped.
+
+    Args:
+        data_path (Path): Path to file with moving data, see `read_table` for
+        supported formats
+        missing (Collection[str], optional): Columns that are unavailable.
+        Defaults to ().
+        chunk_size (Optional[int], optional): Number of rows per chunk. If None the
+        whole file is read at once. Defaults to None.
+        attitude_path (Optional[Path], optional): Path to file with `time_s` and
+        angle columns. If set, positions need `time_s` column and their angles
+        are ignored. Defaults to None.
+        with_time (bool, optional): Read `time_s` column too. Defaults to False.
+
+    Raises:
+        ValueError: If required columns are absent in the file
+
+    Returns:
+        Union[Data, Iterator[Data]]: Table with moving data or iterator over its
+        chunks
+    """
+    columns = [column for column in INPUT_COLUMNS if column not in missing]
+    if attitude_path is None:
+        if with_time:
+            columns = [TIME_COLUMN] + columns
+        return read_table(data_path, columns, chunk_size)
+
+    positions = read_table(
+        data_path,
+        [TIME_COLUMN] + [column for column in columns if column not in ANGLE_COLUMNS],
+        chunk_size,
+    )
+    attitude = read_table(
+        attitude_path,
+        [TIME_COLUMN] + [column for column in columns if column in ANGLE_COLUMNS],
+        chunk_size,
+    )
+    if chunk_size is None:
+        return synchronize(positions, attitude, missing)
+    return synchronize_chunks(positions, attitude, missing)
+
+
+def write_results(
+    results: np.ndarray, columns: Tuple[str, ...], output_path: Path, append: bool
+) -> None:
+    """Write results to disk
+
+    The format is chosen by file extension: .npy file with float64 records,
+    .npz file with one array per column, or CSV text otherwise.
+
+    Args:
+        results (np.ndarray): Array with one column per name in `columns`
+        columns (Tuple[str, ...]): Names of the columns
+        output_path (Path): Path to results
+        append (bool): Append rows to existing file instead of overwriting it
+
+    Raises:
+        ValueError: If rows are appended to .npz file
+    """
+    suffix = Path(output_path).suffix
+    if suffix == ".npy":
+        save_records(output_path, results, columns, append)
+    elif suffix == ".npz":
+        if append:
+            raise ValueError("Results can not be appended to .npz file, use .npy")
+        save_columns(output_path, results, columns)
+    else:
+        import pandas as pd
+
+        pd.DataFrame(
+            results.reshape(len(results), len(columns)), columns=columns
+        ).to_csv(
+            str(output_path),
+            index=False,
+            mode="a" if append else "w",
+            header=not append,
+        )
+
+
+def check_inputs(inputs: np.ndarray) -> None:
+    """Make sure that there is something to process
+
+    Args:
+        inputs (np.ndarray): Estimator inputs
+
+    Raises:
+        ValueError: If all values are zero
+    """
+    if not np.any(inputs):
+        raise ValueError("Your data is all zero! Nothing to process")
+
+
+def check_chunked_inputs(nonzero: bool, output_path: Path) -> None:
+    """Counterpart of `check_inputs` in chunked mode, after the last chunk
+
+    Args:
+        nonzero (bool): Whether any chunk had a non zero value
+        output_path (Path): Results of the chunks, removed if there was nothing to
+        process
+
+    Raises:
+        ValueError: If all values of all chunks are zero
+    """
+    if not nonzero:
+        if Path(output_path).exists():
+            Path(output_path).unlink()
+        raise ValueError("Your data is all zero! Nothing to process")
+
+
+def run_projections(
+    data_path: Path,
+    output_path: Path,
+    estimator: GNSSProjectionEstimator,
+    missing: Collection[str] = (),
+    chunk_size: Optional[int] = None,
+    stats: Optional[Dict[str, float]] = None,
+    profiler: Optional[Profiler] = None,
+    attitude_path: Optional[Path] = None,
+) -> Optional[np.ndarray]:
+    """Compute GNSS projections for file with moving data and write them to disk
+
+    Args:
+        data_path (Path): Path to file with moving data
+        output_path (Path): Path to results
+        estimator (GNSSProjectionEstimator): Configured projection estimator
+        missing (Collection[str], optional): Columns that are unavailable.
+        Defaults to ().
+        chunk_size (Optional[int], optional): If set the file is processed in
+        chunks of this many rows and peak memory does not depend on file size.
+        Defaults to None.
+        stats (Optional[Dict[str, float]], optional): If set, number of processed
+        rows is stored under "rows" key. Defaults to None.
+        profiler (Optional[Profiler], optional): If set, reading, preparing of
+        inputs, estimation and writing are recorded as separate stages.
+        Defaults to None.
+        attitude_path (Optional[Path], optional): Path to separately recorded
+        attitude, which is resampled onto timestamps of positions, see
+        `read_data`. Defaults to None.
+
+    Returns:
+        Optional[np.ndarray]: Projections, or None in chunked mode
+    """
+    stats = {} if stats is None else stats
+    profiler = Profiler(enabled=False) if profiler is None else profiler
+    import_pandas(profiler)
+    if chunk_size is None:
+        with profiler.stage("read") as event:
+            data = read_data(data_path, missing, attitude_path=attitude_path)
+            event["rows"] = len(data)
+        with profiler.stage("prepare", len(data)):
+            inputs = prepare_inputs(data, missing, estimator.dtype)
+        check_inputs(inputs)
+        with profiler.stage("predict", len(inputs)):
+            projections = estimator.predict(inputs)
+        with profiler.stage("write", len(projections)):
+            write_results(projections, PROJECTION_COLUMNS, output_path, append=False)
+        stats["rows"] = len(inputs)
+        return projections
+
+    nonzero = False
+    stats["rows"] = 0
+    chunks = profiler.iterate(
+        "read", read_data(data_path, missing, chunk_size, attitude_path)
+    )
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        with profiler.stage("prepare", len(chunk)):
+            inputs = prepare_inputs(chunk, missing, estimator.dtype)
+        nonzero = nonzero or bool(np.any(inputs))
+        with profiler.stage("predict", len(inputs)):
+            projections = estimator.predict(inputs)
+        with profiler.stage("write", len(projections)):
+            write_results(
+                projections, PROJECTION_COLUMNS, output_path, append=stats["rows"] > 0
+            )
+        stats["rows"] += len(projections)
+    check_chunked_inputs(nonzero, output_path)
+    return None
+
+
+def compute_north_from_file(
+    data_path: Path,
+    estimator: GNSSVehicleCoordinatesEstimator,
+    missing: Collection[str] = (),
+    chunk_size: Optional[int] = None,
+    attitude_path: Optional[Path] = None,
+) -> Tuple[float, float, float]:
+    """Compute north direction from the first and the last vehicle positions
+
+    The file is scanned chunk by chunk, so only two rows are kept in memory.
+
+    Args:
+        data_path (Path): Path to file with moving data
+        estimator (GNSSVehicleCoordinatesEstimator): Configured coordinates
+        estimator
+        missing (Collection[str], optional): Columns that are unavailable.
+        Defaults to ().
+        chunk_size (Optional[int], optional): Number of rows per chunk.
+        Defaults to None.
+        attitude_path (Optional[Path], optional): Path to separately recorded
+        attitude. Defaults to None.
+
+    Returns:
+        Tuple[float, float, float]: North vector
+    """
+    first, last = None, None
+    for chunk in read_data(data_path, missing, chunk_size, attitude_path):
+        if not len(chunk):
+            continue
+        if first is None:
+            first = prepare_inputs(chunk[:1], missing)
+        last = prepare_inputs(chunk[-1:], missing)
+    if first is None:
+        raise ValueError("Your data is empty! Nothing to process")
+    endpoints = np.vstack([first, last])
+    return estimator.compute_north_from_data(estimator.predict(endpoints))
+
+
+def smooth_coordinates(
+    smoother: GNSSTrackSmoother,
+    data: Data,
+    vehicle_coordinates: np.ndarray,
+    whole_track: bool = True,
+) -> np.ndarray:
+    """Smooth vehicle coordinates using timestamps of the moving data
+
+    Args:
+        smoother (GNSSTrackSmoother): Configured smoother
+        data (Data): Moving data with `time_s` column
+        vehicle_coordinates (np.ndarray): Vehicle coordinates of shape Nx3
+        whole_track (bool, optional): Smooth with samples before and after every
+        point. If False the data is the next chunk of a track and only earlier
+        samples are used. Defaults to True.
+
+    Returns:
+        np.ndarray: Smoothed vehicle coordinates of the same type
+    """
+    times = np.asarray(data[TIME_COLUMN], dtype=float)
+    if whole_track:
+        positions, _ = smoother.smooth(times, vehicle_coordinates)
+    else:
+        positions, _ = smoother.filter(times, vehicle_coordinates)
+    return positions.astype(vehicle_coordinates.dtype, copy=False)
+
+
+def run_headings(
+    data_path: Path,
+    output_path: Path,
+    coord_estimator: GNSSVehicleCoordinatesEstimator,
+    heading_estimator: GNSSHeadingEstimator,
+    missing: Collection[str] = (),
+    chunk_size: Optional[int] = None,
+    stats: Optional[Dict[str, float]] = None,
+    profiler: Optional[Profiler] = None,
+    attitude_path: Optional[Path] = None,
+    smoother: Optional[GNSSTrackSmoother] = None,
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Compute vehicle headings for file with moving data and write them to disk
+
+    In chunked mode the north vector, if not set, is computed in a first pass over
+    the file, so the results are identical to the in-memory mode.
+
+    With a smoother, vehicle coordinates are smoothed before the headings are
+    computed. The whole track is smoothed in memory, in chunked mode every point
+    is filtered with the samples before it only. In both modes the north vector,
+    if not set, is computed from the coordinates before smoothing.
+
+    Args:
+        data_path (Path): Path to file with moving data
+        output_path (Path): Path to results
+        coord_estimator (GNSSVehicleCoordinatesEstimator): Configured coordinates
+        estimator
+        heading_estimator (GNSSHeadingEstimator): Configured heading estimator
+        missing (Collection[str], optional): Columns that are unavailable.
+        Defaults to ().
+        chunk_size (Optional[int], optional): If set the file is processed in
+        chunks of this many rows and peak memory does not depend on file size.
+        Defaults to None.
+        stats (Optional[Dict[str, float]], optional): If set, number of processed
+        rows is stored under "rows" key. Defaults to None.
+        profiler (Optional[Profiler], optional): If set, reading, preparing of
+        inputs, estimation and writing are recorded as separate stages.
+        Defaults to None.
+        attitude_path (Optional[Path], optional): Path to separately recorded
+        attitude, which is resampled onto timestamps of positions, see
+        `read_data`. Defaults to None.
+        smoother (Optional[GNSSTrackSmoother], optional): If set, vehicle
+        coordinates are smoothed using `time_s` column. Defaults to None.
+
+    Returns:
+        Optional[Tuple[np.ndarray, np.ndarray]]: Vehicle coordinates and headings,
+        or None in chunked mode
+    """
+    stats = {} if stats is None else stats
+    profiler = Profiler(enabled=False) if profiler is None else profiler
+    import_pandas(profiler)
+    with_time = smoother is not None
+    if chunk_size is None:
+        with profiler.stage("read") as event:
+            data = read_data(
+                data_path, missing, attitude_path=attitude_path, with_time=with_time
+            )
+            event["rows"] = len(data)
+        with profiler.stage("prepare", len(data)):
+            inputs = prepare_inputs(data, missing, coord_estimator.dtype)
+        check_inputs(inputs)
+        with profiler.stage("coordinates", len(inputs)):
+            vehicle_coordinates = coord_estimator.predict(inputs)
+        if smoother is not None:
+            if heading_estimator.north_vector is None:
+                heading_estimator.north_vector = (
+                    heading_estimator.compute_north_from_data(vehicle_coordinates)
+                )
+            with profiler.stage("smooth", len(vehicle_coordinates)):
+                vehicle_coordinates = smooth_coordinates(
+                    smoother, data, vehicle_coordinates
+                )
+        with profiler.stage("headings", len(vehicle_coordinates)):
+            headings = heading_estimator.predict(vehicle_coordinates)
+        with profiler.stage("write", len(headings)):
+            write_results(headings, HEADING_COLUMNS, output_path, append=False)
+        stats["rows"] = len(inputs)
+        return vehicle_coordinates, headings
+
+    if heading_estimator.north_vector is None:
+        with profiler.stage("north"):
+            heading_estimator.north_vector = compute_north_from_file(
+                data_path, coord_estimator, missing, chunk_size, attitude_path
+            )
+    if smoother is not None:
+        smoother.reset()
+    origin, nonzero = None, False
+    stats["rows"] = 0
+    chunks = profiler.iterate(
+        "read", read_data(data_path, missing, chunk_size, attitude_path, with_time)
+    )
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        with profiler.stage("prepare", len(chunk)):
+            inputs = prepare_inputs(chunk, missing, coord_estimator.dtype)
+        nonzero = nonzero or bool(np.any(inputs))
+        with profiler.stage("coordinates", len(inputs)):
+            vehicle_coordinates = coord_estimator.predict(inputs)
+        if smoother is not None:
+            with profiler.stage("smooth", len(vehicle_coordinates)):
+                vehicle_coordinates = smooth_coordinates(
+                    smoother, chunk, vehicle_coordinates, whole_track=False
+                )
+        with profiler.stage("headings", len(vehicle_coordinates)):
+            headings = heading_estimator.predict(vehicle_coordinates, origin=origin)
+        with profiler.stage("write", len(headings)):
+            write_results(
+                headings, HEADING_COLUMNS, output_path, append=origin is not None
+            )
+        if origin is None:
+            origin = vehicle_coordinates[0].copy()
+        stats["rows"] += len(vehicle_coordinates)
+    check_chunked_inputs(nonzero, output_path)
+    return None
+
+
+def predict_all(
+    inputs: np.ndarray,
+    coord_estimator: GNSSVehicleCoordinatesEstimator,
+    heading_estimator: GNSSHeadingEstimator,
+    origin: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Compute GNSS projections, vehicle coordinates and headings at once
+
+    The rotation of every point is computed once: vehicle coordinates are
+    derived from the projections instead of rotating the offset again.
+
+    Args:
+        inputs (np.ndarray): Estimator inputs of shape Nx6
+        coord_estimator (GNSSVehicleCoordinatesEstimator): Configured coordinates
+        estimator
+        heading_estimator (GNSSHeadingEstimator): Configured heading estimator
+        origin (Optional[np.ndarray], optional): Point headings are measured from.
+        If None the first point is used and its heading is NaN. Defaults to None.
+
+    Returns:
+        np.ndarray: Array of shape Nx7 with columns from `PIPELINE_COLUMNS`
+    """
+    results = np.empty((len(inputs), len(PIPELINE_COLUMNS)), coord_estimator.dtype)
+    projections = coord_estimator.proj_estimator.predict(inputs, out=results[:, :3])
+    np.subtract(inputs[:, :3], projections, out=results[:, 3:6])
+    headings = heading_estimator.predict(results[:, 3:6], origin=origin)
+    if origin is None:
+        results[:1, 6] = np.nan
+        results[1:, 6] = headings
+    else:
+        results[:, 6] = headings
+    return results
+
+
+def write_pipeline_results(
+    results: np.ndarray, output_path: Path, separate: bool, append: bool
+) -> None:
+    """Write results of `predict_all` to one file or to three files
+
+    Separate files are named after `output_path` with "-projections",
+    "-coordinates" and "-headings" suffixes and have the layout of `gnssl proj`
+    and `gnssl heading` results, so the NaN heading of the first point is
+    skipped.
+    """
+    if not separate:
+        write_results(results, PIPELINE_COLUMNS, output_path, append)
+        return
+    output_path = Path(output_path)
+    for name, columns, values in (
+        ("projections", PROJECTION_COLUMNS, results[:, :3]),
+        ("coordinates", COORDINATE_COLUMNS, results[:, 3:6]),
+        ("headings", HEADING_COLUMNS, results[int(not append) :, 6:]),
+    ):
+        path = output_path.with_name(f"{output_path.stem}-{name}{output_path.suffix}")
+        write_results(values, columns, path, append)
+
+
+def run_pipeline(
+    data_path: Path,
+    output_path: Path,
+    coord_estimator: GNSSVehicleCoordinatesEstimator,
+    heading_estimator: GNSSHeadingEstimator,
+    missing: Collection[str] = (),
+    chunk_size: Optional[int] = None,
+    stats: Optional[Dict[str, float]] = None,
+    profiler: Optional[Profiler] = None,
+    attitude_path: Optional[Path] = None,
+    separate: bool = False,
+) -> Optional[np.ndarray]:
+    """Compute GNSS projections, vehicle coordinates and headings in one pass
+
+    The file is parsed once and every rotation is computed once, see
+    `predict_all`.
+
+    Args:
+        data_path (Path): Path to file with moving data
+        output_path (Path): Path to results
+        coord_estimator (GNSSVehicleCoordinatesEstimator): Configured coordinates
+        estimator
+        heading_estimator (GNSSHeadingEstimator): Configured heading estimator
+        missing (Collection[str], optional): Columns that are unavailable.
+        Defaults to ().
+        chunk_size (Optional[int], optional): If set the file is processed in
+        chunks of this many rows and peak memory does not depend on file size.
+        Defaults to None.
+        stats (Optional[Dict[str, float]], optional): If set, number of processed
+        rows is stored under "rows" key. Defaults to None.
+        profiler (Optional[Profiler], optional): If set, reading, preparing of
+        inputs, estimation and writing are recorded as separate stages.
+        Defaults to None.
+        attitude_path (Optional[Path], optional): Path to separately recorded
+        attitude, which is resampled onto timestamps of positions, see
+        `read_data`. Defaults to None.
+        separate (bool, optional): Write projections, vehicle coordinates and
+        headings to separate files, see `write_pipeline_results`.
+        Defaults to False.
+
+    Returns:
+        Optional[np.ndarray]: Array of shape Nx7 with columns from
+        `PIPELINE_COLUMNS`, or None in chunked mode
+    """
+    stats = {} if stats is None else stats
+    profiler = Profiler(enabled=False) if profiler is None else profiler
+    import_pandas(profiler)
+    if chunk_size is None:
+        with profiler.stage("read") as event:
+            data = read_data(data_path, missing, attitude_path=attitude_path)
+            event["rows"] = len(data)
+        with profiler.stage("prepare", len(data)):
+            inputs = prepare_inputs(data, missing, coord_estimator.dtype)
+        check_inputs(inputs)
+        with profiler.stage("predict", len(inputs)):
+            results = predict_all(inputs, coord_estimator, heading_estimator)
+        with profiler.stage("write", len(results)):
+            write_pipeline_results(results, output_path, separate, append=False)
+        stats["rows"] = len(inputs)
+        return results
+
+    if heading_estimator.north_vector is None:
+        with profiler.stage("north"):
+            heading_estimator.north_vector = compute_north_from_file(
+                data_path, coord_estimator, missing, chunk_size, attitude_path
+            )
+    origin = None
+    stats["rows"] = 0
+    chunks = profiler.iterate(
+        "read", read_data(data_path, missing, chunk_size, attitude_path)
+    )
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        with profiler.stage("prepare", len(chunk)):
+            inputs = prepare_inputs(chunk, missing, coord_estimator.dtype)
+        with profiler.stage("predict", len(inputs)):
+            results = predict_all(inputs, coord_estimator, heading_estimator, origin)
+        with profiler.stage("write", len(results)):
+            write_pipeline_results(
+                results, output_path, separate, append=origin is not None
+            )
+        if origin is None:
+            origin = results[0, 3:6].copy()
+        stats["rows"] += len(results)
+    return None
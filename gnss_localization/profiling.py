@@ -0,0 +1,163 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+StageCallback = Callable[[str, Dict[str, float]], None]
+
+
+class Profiler:
+    def __init__(
+        self,
+        enabled: bool = True,
+        trace_memory: bool = True,
+        callback: Optional[StageCallback] = None,
+    ) -> None:
+        """Records wall time, rows and peak allocated memory of pipeline stages.
+
+        Pass it to `run_projections` or `run_headings` and read `stages` or
+        `events` afterwards, or set `callback` to export every stage as soon as it
+        finishes. A disabled profiler records nothing and costs
+        next to nothing, so the pipeline always runs through one.
+
+        Args:
+            enabled (bool, optional): Record stages. Defaults to True.
+            trace_memory (bool, optional): Measure peak memory with `tracemalloc`,
+            which slows down code allocating many small Python objects, like CSV
+            parsing. Defaults to True.
+            callback (Optional[StageCallback], optional): Called with stage name
+            and event after every stage. Defaults to None.
+        """
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.callback = callback
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.events: List[Dict[str, Any]] = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0) -> Iterator[Dict[str, float]]:
+        """Measure block of code as a pipeline stage
+
+        Stages with the same name are accumulated, e.g. over chunks. The number of
+        rows can be set inside the block through the yielded event when it is not
+        known in advance. Stages should not be nested, otherwise peak memory of
+        the inner stage is hidden from the outer one.
+
+        Args:
+            name (str): Stage name
+            rows (int, optional): Number of processed rows. Defaults to 0.
+
+        Yields:
+            Dict[str, float]: Event of the stage
+        """
+        event = {"rows": rows}
+        if not self.enabled:
+            yield event
+            return
+
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield event
+        finally:
+            seconds = time.perf_counter() - start
+            peak_mb = 0.0
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak_mb = max(peak - baseline, 0) / 2**20
+            if tracing:
+                tracemalloc.stop()
+            event.update(start=start - self._start, seconds=seconds, peak_mb=peak_mb)
+            self._record(name, event)
+
+    def iterate(self, name: str, iterable: Iterable[Any]) -> Iterator[Any]:
+        """Measure producing every item of iterable, e.g. reading of chunks
+
+        Args:
+            name (str): Stage name
+            iterable (Iterable[Any]): Lazy iterable
+
+        Yields:
+            Any: Items of iterable
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as event:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                event["rows"] = len(item)
+            yield item
+
+    def _record(self, name: str, event: Dict[str, float]) -> None:
+        self.events.append({"stage": name, **event})
+        stats = self.stages.setdefault(
+            name, {"calls": 0, "seconds": 0.0, "rows": 0, "peak_mb": 0.0}
+        )
+        stats["calls"] += 1
+        stats["seconds"] += event["seconds"]
+        stats["rows"] += event["rows"]
+        stats["peak_mb"] = max(stats["peak_mb"], event["peak_mb"])
+        if self.callback is not None:
+            self.callback(name, event)
+
+    def merge(self, stages: Dict[str, Dict[str, float]]) -> None:
+        """Accumulate stages of another profiler, e.g. of a worker process
+
+        Args:
+            stages (Dict[str, Dict[str, float]]): `stages` of another profiler
+        """
+        for name, other in stages.items():
+            stats = self.stages.setdefault(
+                name, {"calls": 0, "seconds": 0.0, "rows": 0, "peak_mb": 0.0}
+            )
+            for key in ("calls", "seconds", "rows"):
+                stats[key] += other[key]
+            stats["peak_mb"] = max(stats["peak_mb"], other["peak_mb"])
+
+    def summary(self) -> str:
+        """Table with time, share of total time, rows per second and peak memory
+        of every stage
+
+        Returns:
+            str: Summary table
+        """
+        total = sum(stats["seconds"] for stats in self.stages.values())
+        lines = [
+            f"{'stage':<16}{'calls':>8}{'seconds':>12}{'share':>8}"
+            f"{'rows/s':>14}{'peak MB':>10}"
+        ]
+        for name, stats in self.stages.items():
+            share = stats["seconds"] / total if total else 0.0
+            rate = ""
+            if stats["rows"] and stats["seconds"]:
+                rate = f"{stats['rows'] / stats['seconds']:.0f}"
+            lines.append(
+                f"{name:<16}{stats['calls']:>8}{stats['seconds']:>12.4f}"
+                f"{share:>8.1%}{rate:>14}{stats['peak_mb']:>10.1f}"
+            )
+        lines.append(f"{'total':<16}{'':>8}{total:>12.4f}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Stages and individual events in JSON serializable form"""
+        return {"stages": self.stages, "events": self.events}
+
+    def save(self, path: Path) -> None:
+        """Write JSON trace with stages and individual events
+
+        Args:
+            path (Path): Path to JSON file
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
@@ -1,4 +1,6 @@
 import numpy as np
+from numpy.typing import DTypeLike
+from typing import Optional, Union
 
 
 def build_projection_matrix(roll: float, pitch: float, yaw: float) -> np.ndarray:
@@ -35,3 +37,115 @@ def build_projection_matrix(roll: float, pitch: float, yaw: float) -> np.ndarray
             ]
         )
     )
+
+
+def build_projection_matrices(
+    roll: np.ndarray, pitch: np.ndarray, yaw: np.ndarray
+) -> np.ndarray:
+    """Stack of projection matrices for arrays of Euler angles
+
+    Equivalent to calling `build_projection_matrix` for every element, but the
+    trigonometry and the matrix products are evaluated for the whole batch at once.
+
+    Args:
+        roll (np.ndarray): Rotations around X axis in radians, shape (N,)
+        pitch (np.ndarray): Rotations around Y axis in radians, shape (N,)
+        yaw (np.ndarray): Rotations around Z axis in radians, shape (N,)
+
+    Returns:
+        np.ndarray: Projection matrices with rotation coeffs, shape (N, 3, 3)
+    """
+    roll, pitch, yaw = np.broadcast_arrays(
+        np.asarray(roll, dtype=float),
+        np.asarray(pitch, dtype=float),
+        np.asarray(yaw, dtype=float),
+    )
+    cos_r, sin_r = np.cos(roll), np.sin(roll)
+    cos_p, sin_p = np.cos(pitch), np.sin(pitch)
+    cos_y, sin_y = np.cos(yaw), np.sin(yaw)
+
+    matrices = np.empty(roll.shape + (3, 3))
+    matrices[..., 0, 0] = cos_p * cos_y
+    matrices[..., 0, 1] = cos_p * sin_y
+    matrices[..., 0, 2] = sin_p
+    matrices[..., 1, 0] = -sin_r * sin_p * cos_y - cos_r * sin_y
+    matrices[..., 1, 1] = -sin_r * sin_p * sin_y + cos_r * cos_y
+    matrices[..., 1, 2] = sin_r * cos_p
+    matrices[..., 2, 0] = -cos_r * sin_p * cos_y + sin_r * sin_y
+    matrices[..., 2, 1] = -cos_r * sin_p * sin_y - sin_r * cos_y
+    matrices[..., 2, 2] = cos_r * cos_p
+    return matrices
+
+
+def rotate_vector(
+    roll: Union[np.ndarray, float],
+    pitch: Union[np.ndarray, float],
+    yaw: Union[np.ndarray, float],
+    vector: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    dtype: DTypeLike = np.float64,
+) -> np.ndarray:
+    """Rotate vector by a batch of attitudes without building the matrices
+
+    Computes `build_projection_matrix(roll[i], pitch[i], yaw[i]) @ vector[i]` for
+    every element by applying the yaw, pitch and roll rotations one after another.
+    Angles may be scalars, e.g. for axes that are not measured. A rotation by a
+    scalar zero is skipped, so with yaw fixed at 0 only four trigonometric terms
+    are evaluated per element instead of six.
+
+    Args:
+        roll (Union[np.ndarray, float]): Rotations around X axis in radians, shape
+        (N,) or scalar
+        pitch (Union[np.ndarray, float]): Rotations around Y axis in radians, shape
+        (N,) or scalar
+        yaw (Union[np.ndarray, float]): Rotations around Z axis in radians, shape
+        (N,) or scalar
+        vector (np.ndarray): Vector to rotate, shape (3,) or one vector per
+        attitude with shape (N, 3)
+        out (Optional[np.ndarray], optional): Array of shape (N, 3) to write results
+        into. Defaults to None.
+        dtype (DTypeLike, optional): Precision of computation, ignored if `out` is
+        given. Defaults to np.float64.
+
+    Returns:
+        np.ndarray: Rotated vectors, shape (N, 3)
+    """
+    if out is not None:
+        dtype = out.dtype
+    roll = np.asarray(roll, dtype=dtype)
+    pitch = np.asarray(pitch, dtype=dtype)
+    yaw = np.asarray(yaw, dtype=dtype)
+    vector = np.asarray(vector, dtype=dtype)
+    v_x, v_y, v_z = vector[..., 0], vector[..., 1], vector[..., 2]
+    if out is None:
+        shape = np.broadcast_shapes(roll.shape, pitch.shape, yaw.shape, v_x.shape)
+        out = np.empty(shape + (3,), dtype=dtype)
+
+    if _is_zero(yaw):
+        a_x, a_y = v_x, v_y
+    else:
+        cos_y, sin_y = np.cos(yaw), np.sin(yaw)
+        a_x = cos_y * v_x + sin_y * v_y
+        a_y = cos_y * v_y - sin_y * v_x
+
+    if _is_zero(pitch):
+        out[..., 0] = a_x
+        b_z = v_z
+    else:
+        cos_p, sin_p = np.cos(pitch), np.sin(pitch)
+        out[..., 0] = cos_p * a_x + sin_p * v_z
+        b_z = cos_p * v_z - sin_p * a_x
+
+    if _is_zero(roll):
+        out[..., 1] = a_y
+        out[..., 2] = b_z
+    else:
+        cos_r, sin_r = np.cos(roll), np.sin(roll)
+        out[..., 1] = cos_r * a_y + sin_r * b_z
+        out[..., 2] = cos_r * b_z - sin_r * a_y
+    return out
+
+
+def _is_zero(angle: np.ndarray) -> bool:
+    """Whether angle is a scalar zero, so its rotation is the identity"""
+    return angle.ndim == 0 and angle == 0
@@ -0,0 +1,355 @@
+import asyncio
+import functools
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from gnss_localization.heading_estimator import GNSSHeadingEstimator, compute_headings
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+
+REQUEST = struct.Struct("<IBI")
+RESPONSE = struct.Struct("<IBI")
+OP_PROJECTION, OP_COORDINATES, OP_HEADING = 0, 1, 2
+STATUS_OK, STATUS_ERROR = 0, 1
+# number of values in request and response rows of every operation
+WIDTHS = {OP_PROJECTION: (6, 3), OP_COORDINATES: (6, 3), OP_HEADING: (9, 4)}
+FLOAT = np.dtype("<f8")
+
+
+class MicroBatcher:
+    def __init__(self, function, max_wait: float, max_rows: int) -> None:
+        """Coalesces concurrent requests into one vectorized call
+
+        The first request of a batch waits up to `max_wait` seconds for others,
+        then all queued rows are processed by one call of `function`.
+
+        Args:
+            function (Callable[[np.ndarray], np.ndarray]): Vectorized function of
+            rows
+            max_wait (float): Seconds to wait for more requests
+            max_rows (int): Batch is processed as soon as it has this many rows
+        """
+        self.function = function
+        self.max_wait = max_wait
+        self.max_rows = max_rows
+        self.batches = 0
+        self.requests = 0
+        self._queue: "asyncio.Queue[Tuple[np.ndarray, asyncio.Future]]" = (
+            asyncio.Queue()
+        )
+
+    async def submit(self, rows: np.ndarray) -> np.ndarray:
+        """Process rows as part of the next batch
+
+        Args:
+            rows (np.ndarray): Request rows
+
+        Returns:
+            np.ndarray: Result rows
+        """
+        return await self.submit_nowait(rows)
+
+    def submit_nowait(self, rows: np.ndarray) -> asyncio.Future:
+        """Queue rows for the next batch without waiting for results
+
+        Args:
+            rows (np.ndarray): Request rows
+
+        Returns:
+            asyncio.Future: Future of result rows
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((rows, future))
+        return future
+
+    def _drain(self, batch: List[Tuple[np.ndarray, asyncio.Future]], rows: int) -> int:
+        while rows < self.max_rows and not self._queue.empty():
+            item = self._queue.get_nowait()
+            batch.append(item)
+            rows += len(item[0])
+        return rows
+
+    async def run(self) -> None:
+        """Process batches until cancelled"""
+        while True:
+            batch = [await self._queue.get()]
+            rows = self._drain(batch, len(batch[0][0]))
+            if rows < self.max_rows and self.max_wait > 0:
+                await asyncio.sleep(self.max_wait)
+                self._drain(batch, rows)
+
+            self.batches += 1
+            self.requests += len(batch)
+            try:
+                results = self.function(np.concatenate([item[0] for item in batch]))
+            except Exception as error:  # pylint: disable=broad-except
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            ends = np.cumsum([len(item[0]) for item in batch])
+            for (_, future), part in zip(batch, np.split(results, ends[:-1])):
+                if not future.done():
+                    future.set_result(part)
+
+
+class EstimatorService:
+    def __init__(
+        self,
+        proj_estimator: GNSSProjectionEstimator,
+        coord_estimator: GNSSVehicleCoordinatesEstimator,
+        heading_estimator: GNSSHeadingEstimator,
+        max_wait: float = 0.0005,
+        max_rows: int = 8192,
+    ) -> None:
+        """Serves estimators to other processes over a Unix socket or TCP
+
+        Requests and responses are length-prefixed binary frames. A request is a
+        `REQUEST` header (request id, operation, number of rows) followed by the
+        rows as little-endian float64. A response is a `RESPONSE` header (request
+        id, status, number of rows) followed by the result rows, or by UTF-8 error
+        message of that many bytes if status is `STATUS_ERROR`. `WIDTHS` holds the
+        number of values in request and response rows of every operation, the
+        layout of the rows is described in README. Responses on one connection
+        may come out of order, they are matched to requests by id.
+
+        Args:
+            proj_estimator (GNSSProjectionEstimator): Configured estimator of GNSS
+            projections
+            coord_estimator (GNSSVehicleCoordinatesEstimator): Configured estimator
+            of vehicle coordinates
+            heading_estimator (GNSSHeadingEstimator): Configured estimator of
+            headings with north vector
+            max_wait (float, optional): Seconds the first request of a batch waits
+            for others. Defaults to 0.0005.
+            max_rows (int, optional): Upper bound on rows of a batch. Defaults to
+            8192.
+
+        Raises:
+            ValueError: If north vector of heading estimator is not set
+        """
+        if heading_estimator.north_vector is None:
+            raise ValueError(
+                "Service needs a north vector, it can not be derived from single"
+                " samples"
+            )
+        self.proj_estimator = proj_estimator
+        self.coord_estimator = coord_estimator
+        self.heading_estimator = heading_estimator
+        self.max_wait = max_wait
+        self.max_rows = max_rows
+        self.batchers: Dict[int, MicroBatcher] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def _headings(self, rows: np.ndarray) -> np.ndarray:
+        results = np.empty((len(rows), 4))
+        vehicle_coordinates = self.coord_estimator.predict(
+            rows[:, :6], out=results[:, :3]
+        )
+        results[:, 3] = compute_headings(
+            vehicle_coordinates - rows[:, 6:], self.heading_estimator.north_vector
+        )
+        return results
+
+    async def start(
+        self, path: Optional[Path] = None, host: str = "127.0.0.1", port: int = 0
+    ) -> asyncio.AbstractServer:
+        """Start batchers and listen on Unix socket or TCP port
+
+        Args:
+            path (Optional[Path], optional): Path to Unix socket. If None TCP is
+            used. Defaults to None.
+            host (str, optional): TCP host. Defaults to "127.0.0.1".
+            port (int, optional): TCP port, 0 picks a free one. Defaults to 0.
+
+        Returns:
+            asyncio.AbstractServer: Started server
+        """
+        functions = {
+            OP_PROJECTION: self.proj_estimator.predict,
+            OP_COORDINATES: self.coord_estimator.predict,
+            OP_HEADING: self._headings,
+        }
+        for operation, function in functions.items():
+            batcher = MicroBatcher(function, self.max_wait, self.max_rows)
+            self.batchers[operation] = batcher
+            self._tasks.append(asyncio.ensure_future(batcher.run()))
+        if path is not None:
+            return await asyncio.start_unix_server(self._handle, path=str(path))
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def stop(self) -> None:
+        """Cancel batchers"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        pending = set()
+        try:
+            while True:
+                header = await reader.readexactly(REQUEST.size)
+                request_id, operation, n_rows = REQUEST.unpack(header)
+                if operation not in WIDTHS:
+                    # the size of the payload is unknown, the stream can not continue
+                    _write_error(writer, request_id, f"Unknown operation {operation}")
+                    break
+                width = WIDTHS[operation][0]
+                payload = await reader.readexactly(n_rows * width * FLOAT.itemsize)
+                rows = np.frombuffer(payload, dtype=FLOAT).reshape(n_rows, width)
+                future = self.batchers[operation].submit_nowait(rows)
+                future.add_done_callback(
+                    functools.partial(_write_response, writer, request_id)
+                )
+                pending.add(future)
+                future.add_done_callback(pending.discard)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            writer.close()
+
+
+def _write_response(
+    writer: asyncio.StreamWriter, request_id: int, future: asyncio.Future
+) -> None:
+    if writer.is_closing() or future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        _write_error(writer, request_id, str(error) or type(error).__name__)
+        return
+    results = future.result()
+    writer.write(
+        RESPONSE.pack(request_id, STATUS_OK, len(results))
+        + np.ascontiguousarray(results, dtype=FLOAT).tobytes()
+    )
+
+
+def _write_error(writer: asyncio.StreamWriter, request_id: int, message: str) -> None:
+    encoded = message.encode()
+    writer.write(RESPONSE.pack(request_id, STATUS_ERROR, len(encoded)) + encoded)
+
+
+class ServiceClient:
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Client of `EstimatorService`, create it with `connect`
+
+        Requests can be sent concurrently from many tasks over one connection.
+        """
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._pending: Dict[int, Tuple[int, asyncio.Future]] = {}
+        self._error: Optional[ConnectionError] = None
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(
+        cls, path: Optional[Path] = None, host: str = "127.0.0.1", port: int = 0
+    ) -> "ServiceClient":
+        """Connect to service on Unix socket or TCP port
+
+        Args:
+            path (Optional[Path], optional): Path to Unix socket. If None TCP is
+            used. Defaults to None.
+            host (str, optional): TCP host. Defaults to "127.0.0.1".
+            port (int, optional): TCP port. Defaults to 0.
+
+        Returns:
+            ServiceClient: Connected client
+        """
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(str(path))
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, operation: int, rows: np.ndarray) -> np.ndarray:
+        """Send rows of an operation and wait for results
+
+        Args:
+            operation (int): `OP_PROJECTION`, `OP_COORDINATES` or `OP_HEADING`
+            rows (np.ndarray): Request rows, see `WIDTHS` and the protocol section
+            of README for their layout
+
+        Raises:
+            ValueError: If service failed to process the request
+            ConnectionError: If connection to service was lost
+
+        Returns:
+            np.ndarray: Result rows
+        """
+        if self._error is not None:
+            raise self._error
+        rows = np.ascontiguousarray(rows, dtype=FLOAT)
+        if rows.ndim == 1:
+            rows = rows.reshape(1, -1)
+        request_id = self._next_id
+        self._next_id = (self._next_id + 1) % 2**32
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = (operation, future)
+        self._writer.write(
+            REQUEST.pack(request_id, operation, len(rows)) + rows.tobytes()
+        )
+        await self._writer.drain()
+        return await future
+
+    async def projection(self, sample: np.ndarray) -> np.ndarray:
+        """GNSS projections of (x, y, z, roll, pitch, yaw) sample or rows"""
+        return await self.request(OP_PROJECTION, sample)
+
+    async def coordinates(self, sample: np.ndarray) -> np.ndarray:
+        """Vehicle coordinates of (x, y, z, roll, pitch, yaw) sample or rows"""
+        return await self.request(OP_COORDINATES, sample)
+
+    async def heading(self, sample: np.ndarray, origin: np.ndarray) -> np.ndarray:
+        """Vehicle coordinates and heading from origin of sample or rows"""
+        rows = np.column_stack(
+            (np.reshape(sample, (-1, 6)), np.reshape(origin, (-1, 3)))
+        )
+        return await self.request(OP_HEADING, rows)
+
+    async def _receive(self) -> None:
+        try:
+            while True:
+                header = await self._reader.readexactly(RESPONSE.size)
+                request_id, status, size = RESPONSE.unpack(header)
+                pending = self._pending.pop(request_id, None)
+                if status != STATUS_OK:
+                    message = (await self._reader.readexactly(size)).decode()
+                    if pending is not None and not pending[1].done():
+                        pending[1].set_exception(ValueError(message))
+                    continue
+                if pending is None:
+                    raise ConnectionError(f"Response to unknown request {request_id}")
+                operation, future = pending
+                width = WIDTHS[operation][1]
+                payload = await self._reader.readexactly(size * width * FLOAT.itemsize)
+                # the caller may have stopped waiting, e.g. on timeout
+                if not future.done():
+                    future.set_result(
+                        np.frombuffer(payload, dtype=FLOAT).reshape(size, width)
+                    )
+        except Exception as error:  # pylint: disable=broad-except
+            self._error = ConnectionError(f"Connection lost: {error}")
+            for _, future in self._pending.values():
+                if not future.done():
+                    future.set_exception(self._error)
+            self._pending.clear()
+
+    async def close(self) -> None:
+        """Close connection"""
+        self._writer.close()
+        self._receiver.cancel()
+        await asyncio.gather(self._receiver, return_exceptions=True)
@@ -0,0 +1,407 @@
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Covariance of the constant velocity model is the same for X, Y and Z, it is kept
+# as (var_p, cov_pv, var_v) and general 2x2 matrices as (m00, m01, m10, m11)
+
+
+def _matmul(x, y):
+    return (
+        x[0] * y[0] + x[1] * y[2],
+        x[0] * y[1] + x[1] * y[3],
+        x[2] * y[0] + x[3] * y[2],
+        x[2] * y[1] + x[3] * y[3],
+    )
+
+
+def _general(s):
+    return (s[0], s[1], s[1], s[2])
+
+
+def _transpose(x):
+    return (x[0], x[2], x[1], x[3])
+
+
+def _element(dt, real, q: float, r: float):
+    """Filtering element of one step for associative combination
+
+    Elements (A, C, J) of Särkkä and García-Fernández, "Temporal parallelization of
+    Bayesian smoothers", 2021, restricted to the covariance, which does not depend
+    on measurements. Steps with `real` equal to 0 are identity elements.
+    """
+    q0, q1, q2 = q * dt**3 / 3, q * dt**2 / 2, q * dt
+    s = q0 + r
+    k0, k1 = q0 / s, q1 / s
+    w = real / s
+    return (
+        (1 - k0, (1 - k0) * dt, -k1, 1 - k1 * dt),
+        (q0 * r / s, q1 * r / s, q2 - q1 * q1 / s),
+        (w, w * dt, w * dt * dt),
+    )
+
+
+def _combine(first, second):
+    """Element of two consecutive elements, `first` is applied first"""
+    a_i, c_i, j_i = first
+    a_j, c_j, j_j = second
+    cj = _matmul(_general(c_i), _general(j_j))
+    det = (1 + cj[0]) * (1 + cj[3]) - cj[1] * cj[2]
+    m = ((1 + cj[3]) / det, -cj[1] / det, -cj[2] / det, (1 + cj[0]) / det)
+    am = _matmul(a_j, m)
+    c = _matmul(_matmul(am, _general(c_i)), _transpose(a_j))
+    j = _matmul(_matmul(_transpose(a_i), _matmul(_transpose(m), _general(j_j))), a_i)
+    return (
+        _matmul(am, a_i),
+        (c[0] + c_j[0], c[1] + c_j[1], c[3] + c_j[2]),
+        (j[0] + j_i[0], j[1] + j_i[1], j[3] + j_i[2]),
+    )
+
+
+def _covariance_step(covariance, dt, real, q: float, r: float):
+    """Prediction and update of the covariance
+
+    Returns:
+        Filtered covariance, predicted covariance and gains of position and
+        velocity
+    """
+    a, b, c = covariance
+    a = a + dt * (2 * b + dt * c) + q * dt**3 / 3
+    b = b + dt * c + q * dt**2 / 2
+    c = c + q * dt
+    s = a + r
+    k0, k1 = a / s * real, b / s * real
+    return (a - k0 * a, b - k0 * b, c - k1 * b), (a, b, c), k0, k1
+
+
+def _mean_step(p, v, y, dt, k0, k1):
+    p = p + dt * v
+    e = y - p
+    return p + k0 * e, v + k1 * e
+
+
+def _blocks(values: np.ndarray, n_blocks: int, block: int) -> np.ndarray:
+    """Zero padded copy of shape (block, n_blocks, ...), step j of every block is
+    contiguous"""
+    padded = np.zeros((n_blocks * block,) + values.shape[1:])
+    padded[: len(values)] = values
+    shape = (n_blocks, block) + values.shape[1:]
+    return np.ascontiguousarray(np.swapaxes(padded.reshape(shape), 0, 1))
+
+
+def _unblock(values: np.ndarray, n_rows: int) -> np.ndarray:
+    return np.swapaxes(values, 0, 1).reshape((-1,) + values.shape[2:])[:n_rows]
+
+
+def kalman_scan(
+    dt: np.ndarray,
+    measurements: np.ndarray,
+    position: np.ndarray,
+    velocity: np.ndarray,
+    covariance: Tuple[float, float, float],
+    q: float,
+    r: float,
+    smooth: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, Tuple[float, float, float]]:
+    """Constant velocity Kalman filter, optionally with Rauch-Tung-Striebel pass
+
+    Steps are split into about sqrt(N) blocks that are processed side by side, so
+    every Python level iteration does NumPy work on all blocks at once and the
+    total work stays linear. The state at the start of every block is found by
+    combining block summaries: associative filtering elements for the covariance
+    and affine maps for the means. Memory is about 200 bytes per step.
+
+    Args:
+        dt (np.ndarray): Time steps in seconds, shape (N,)
+        measurements (np.ndarray): Positions measured after every step, (N, 3)
+        position (np.ndarray): Filtered position before the first step, (3,)
+        velocity (np.ndarray): Filtered velocity before the first step, (3,)
+        covariance (Tuple[float, float, float]): Variance of position, covariance
+        of position and velocity and variance of velocity before the first step
+        q (float): Spectral density of acceleration noise
+        r (float): Variance of measurement noise
+        smooth (bool, optional): Run the backward pass. Defaults to False.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, Tuple[float, float, float]]: Positions and
+        velocities of shape (N, 3) after every step, with the backward pass of
+        shape (N + 1, 3) including the initial state, and the filtered covariance
+        after the last step
+    """
+    n_steps = len(dt)
+    block = max(1, math.isqrt(n_steps))
+    n_blocks = max(1, -(-n_steps // block))
+    dts = _blocks(dt[:, np.newaxis], n_blocks, block)
+    real = _blocks(np.ones((n_steps, 1)), n_blocks, block)
+    ys = _blocks(measurements, n_blocks, block)
+
+    # summaries of the covariance over every block
+    total = _element(dts[0], real[0], q, r)
+    for j in range(1, block):
+        total = _combine(total, _element(dts[j], real[j], q, r))
+
+    # covariance and mean at the start of every block, one block after another
+    starts = np.empty((3, n_blocks, 1))
+    current = tuple(float(value) for value in covariance)
+    for i in range(n_blocks):
+        starts[:, i, 0] = current
+        summary = tuple(tuple(value[i, 0] for value in part) for part in total)
+        current = _combine(((0.0,) * 4, current, (0.0,) * 3), summary)[1]
+    final_covariance = current
+
+    covariance_ = tuple(starts)
+    # map of every block from its start state to its end state, p = phi_p @ (p, v)
+    phi_p, phi_v = np.zeros((n_blocks, 2)), np.zeros((n_blocks, 2))
+    phi_p[:, 0] = phi_v[:, 1] = 1.0
+    c_p, c_v = np.zeros((n_blocks, 3)), np.zeros((n_blocks, 3))
+    for j in range(block):
+        covariance_, _, k0, k1 = _covariance_step(covariance_, dts[j], real[j], q, r)
+        phi_p, phi_v = _mean_step(phi_p, phi_v, 0.0, dts[j], k0, k1)
+        c_p, c_v = _mean_step(c_p, c_v, ys[j], dts[j], k0, k1)
+    start_p, start_v = np.empty((n_blocks, 3)), np.empty((n_blocks, 3))
+    p, v = np.asarray(position, dtype=float), np.asarray(velocity, dtype=float)
+    for i in range(n_blocks):
+        start_p[i], start_v[i] = p, v
+        p, v = (
+            phi_p[i, 0] * p + phi_p[i, 1] * v + c_p[i],
+            phi_v[i, 0] * p + phi_v[i, 1] * v + c_v[i],
+        )
+    final_p, final_v = p, v
+
+    # filtered means, for smoothing also the backward maps
+    # x[k - 1] = G[k] x[k] + g[k] of every step and of every block
+    p, v = start_p, start_v
+    covariance_ = tuple(starts)
+    positions = np.empty((block, n_blocks, 3))
+    velocities = np.empty((block, n_blocks, 3))
+    if smooth:
+        gains = np.empty((4, block, n_blocks, 1))
+        offset_p, offset_v = positions, velocities
+        back = (1.0, 0.0, 0.0, 1.0)
+        back_p, back_v = np.zeros((n_blocks, 3)), np.zeros((n_blocks, 3))
+    for j in range(block):
+        filtered, predicted, k0, k1 = _covariance_step(
+            covariance_, dts[j], real[j], q, r
+        )
+        if smooth:
+            a, b, c = covariance_
+            dt_j = dts[j]
+            det = predicted[0] * predicted[2] - predicted[1] * predicted[1]
+            gain = _matmul(
+                (a + dt_j * b, b, b + dt_j * c, c),
+                (
+                    predicted[2] / det,
+                    -predicted[1] / det,
+                    -predicted[1] / det,
+                    predicted[0] / det,
+                ),
+            )
+            gains[:, j] = gain
+            moved = p + dt_j * v
+            g_p = p - gain[0] * moved - gain[1] * v
+            g_v = v - gain[2] * moved - gain[3] * v
+            back_p, back_v = (
+                back[0] * g_p + back[1] * g_v + back_p,
+                back[2] * g_p + back[3] * g_v + back_v,
+            )
+            back = _matmul(back, gain)
+        p, v = _mean_step(p, v, ys[j], dts[j], k0, k1)
+        covariance_ = filtered
+        if smooth:
+            offset_p[j], offset_v[j] = g_p, g_v
+        else:
+            positions[j], velocities[j] = p, v
+    if not smooth:
+        return (
+            _unblock(positions, n_steps),
+            _unblock(velocities, n_steps),
+            final_covariance,
+        )
+
+    # smoothed state at the end of every block, from the last block backwards
+    end_p, end_v = np.empty((n_blocks, 3)), np.empty((n_blocks, 3))
+    p, v = final_p, final_v
+    for i in reversed(range(n_blocks)):
+        end_p[i], end_v[i] = p, v
+        p, v = (
+            back[0][i, 0] * p + back[1][i, 0] * v + back_p[i],
+            back[2][i, 0] * p + back[3][i, 0] * v + back_v[i],
+        )
+    p, v = end_p, end_v
+    for j in reversed(range(block)):
+        gain = gains[:, j]
+        p, v = (
+            gain[0] * p + gain[1] * v + offset_p[j],
+            gain[2] * p + gain[3] * v + offset_v[j],
+        )
+        positions[j], velocities[j] = p, v
+    smoothed_p = np.vstack([_unblock(positions, n_steps), final_p])
+    smoothed_v = np.vstack([_unblock(velocities, n_steps), final_v])
+    return smoothed_p, smoothed_v, final_covariance
+
+
+class GNSSTrackSmoother:
+    def __init__(
+        self,
+        measurement_noise: float = 50.0,
+        acceleration_noise: float = 1000.0,
+        speed_noise: float = 10000.0,
+    ) -> None:
+        """Smooths tracks with constant velocity Kalman filter
+
+        `smooth` runs the filter and the Rauch-Tung-Striebel backward pass over a
+        whole track, `filter` and `update` run the filter only and continue from
+        the previous call, so they work on chunks and on streams of samples.
+        Time steps are taken from timestamps and may vary.
+
+        Args:
+            measurement_noise (float, optional): Standard deviation of measured
+            positions in mm. Defaults to 50.0.
+            acceleration_noise (float, optional): Standard deviation of
+            acceleration in mm/s^2 over one second, larger values follow turns and
+            braking more closely. Defaults to 1000.0.
+            speed_noise (float, optional): Standard deviation of speed at the first
+            sample in mm/s. Defaults to 10000.0.
+
+        Raises:
+            ValueError: If noise is not positive
+        """
+        if min(measurement_noise, acceleration_noise, speed_noise) <= 0:
+            raise ValueError("Noise of the smoother must be positive")
+        self.measurement_noise = measurement_noise
+        self.acceleration_noise = acceleration_noise
+        self.speed_noise = speed_noise
+        self._q = float(acceleration_noise) ** 2
+        self._r = float(measurement_noise) ** 2
+
+        self._buffer = np.empty(6)
+        self.position = self._buffer[:3]
+        self.velocity = self._buffer[3:]
+        self.time: Optional[float] = None
+        self.covariance = (self._r, 0.0, float(speed_noise) ** 2)
+
+    def reset(self) -> None:
+        """Forget the state, the next sample starts a new track"""
+        self.time = None
+        self.covariance = (self._r, 0.0, float(self.speed_noise) ** 2)
+
+    def _steps(self, times: np.ndarray, previous: float) -> np.ndarray:
+        dt = np.diff(times, prepend=previous)
+        if np.any(dt < 0):
+            raise ValueError("Timestamps of the track must not decrease")
+        return dt
+
+    def smooth(
+        self, times: np.ndarray, positions: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Smoothed positions and velocities of a whole track
+
+        Every estimate uses all samples of the track, before and after it. The
+        state of `filter` and `update` is not used or changed.
+
+        Args:
+            times (np.ndarray): Timestamps in seconds, shape (N,)
+            positions (np.ndarray): Positions in mm, shape (N, 3)
+
+        Raises:
+            ValueError: If timestamps decrease
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Positions in mm and velocities in mm/s,
+            shape (N, 3)
+        """
+        times = np.asarray(times, dtype=float)
+        positions = np.asarray(positions, dtype=float)
+        if not len(positions):
+            return np.empty((0, 3)), np.empty((0, 3))
+        smoothed_p, smoothed_v, _ = kalman_scan(
+            self._steps(times[1:], times[0]),
+            positions[1:],
+            positions[0],
+            np.zeros(3),
+            (self._r, 0.0, float(self.speed_noise) ** 2),
+            self._q,
+            self._r,
+            smooth=True,
+        )
+        return smoothed_p, smoothed_v
+
+    def filter(
+        self, times: np.ndarray, positions: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Filtered positions and velocities, continuing from the previous call
+
+        Every estimate uses only samples up to it, so a track processed in chunks
+        gets the same results as in one call.
+
+        Args:
+            times (np.ndarray): Timestamps in seconds, shape (N,)
+            positions (np.ndarray): Positions in mm, shape (N, 3)
+
+        Raises:
+            ValueError: If timestamps decrease
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Positions in mm and velocities in mm/s,
+            shape (N, 3)
+        """
+        times = np.asarray(times, dtype=float)
+        positions = np.asarray(positions, dtype=float)
+        if not len(positions):
+            return np.empty((0, 3)), np.empty((0, 3))
+        if self.time is None:
+            self.update(times[0], *positions[0])
+            first_p, first_v = self.position.copy(), self.velocity.copy()
+            filtered_p, filtered_v = self.filter(times[1:], positions[1:])
+            return np.vstack([first_p, filtered_p]), np.vstack([first_v, filtered_v])
+
+        filtered_p, filtered_v, self.covariance = kalman_scan(
+            self._steps(times, self.time),
+            positions,
+            self.position,
+            self.velocity,
+            self.covariance,
+            self._q,
+            self._r,
+        )
+        self.time = float(times[-1])
+        self._buffer[:3], self._buffer[3:] = filtered_p[-1], filtered_v[-1]
+        return filtered_p, filtered_v
+
+    def update(self, time: float, x: float, y: float, z: float) -> np.ndarray:
+        """Filter single sample
+
+        The returned array is a view of an internal buffer and is overwritten by
+        the next call, copy it if it has to be kept.
+
+        Args:
+            time (float): Timestamp in seconds
+            x (float): X coordinate in mm
+            y (float): Y coordinate in mm
+            z (float): Z coordinate in mm
+
+        Raises:
+            ValueError: If timestamp is earlier than the previous one
+
+        Returns:
+            np.ndarray: Filtered position, velocity is in `velocity`
+        """
+        if self.time is None:
+            self.time = float(time)
+            self._buffer[:] = (x, y, z, 0.0, 0.0, 0.0)
+            return self.position
+        dt = float(time) - self.time
+        if dt < 0:
+            raise ValueError("Timestamps of the track must not decrease")
+        self.covariance, _, k0, k1 = _covariance_step(
+            self.covariance, dt, 1.0, self._q, self._r
+        )
+        state = self._buffer.tolist()
+        for axis, measured in enumerate((x, y, z)):
+            state[axis], state[axis + 3] = _mean_step(
+                state[axis], state[axis + 3], measured, dt, k0, k1
+            )
+        self._buffer[:] = state
+        self.time = float(time)
+        return self.position
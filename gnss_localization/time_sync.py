@@ -0,0 +1,157 @@
+import numpy as np
+from typing import TYPE_CHECKING, Collection, Iterable, Iterator, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+TIME_COLUMN = "time_s"
+ANGLE_COLUMNS = ("roll_deg", "pitch_deg", "yaw_deg")
+
+
+def wrap_angles(angles: np.ndarray) -> np.ndarray:
+    """Wrap angles in degrees to [-180, 180)"""
+    return (angles + 180.0) % 360.0 - 180.0
+
+
+def interpolate_angles(
+    times: np.ndarray, sample_times: np.ndarray, angles: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Linearly interpolate angles sampled at other instants
+
+    Every angle is interpolated along the shorter arc between the two bracketing
+    samples, so 359 and 1 degrees give 0 and not 180 in the middle.
+
+    Args:
+        times (np.ndarray): Instants to interpolate at, shape N
+        sample_times (np.ndarray): Increasing instants of angle samples, shape M
+        angles (np.ndarray): Angles in degrees of shape MxK
+
+    Raises:
+        ValueError: If sample instants are not increasing
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Interpolated angles wrapped to [-180, 180)
+        of shape NxK, and mask of instants covered by samples. Angles at
+        uncovered instants are NaN
+    """
+    if np.any(np.diff(sample_times) < 0):
+        raise ValueError("Attitude timestamps must be increasing")
+    result = np.full((len(times), angles.shape[1]), np.nan)
+    valid = np.zeros(len(times), dtype=bool)
+    if not len(sample_times):
+        return result, valid
+    valid = (times >= sample_times[0]) & (times <= sample_times[-1])
+
+    right = np.clip(np.searchsorted(sample_times, times[valid]), 1, None)
+    right = np.minimum(right, len(sample_times) - 1)
+    left = np.maximum(right - 1, 0)
+    span = sample_times[right] - sample_times[left]
+    weights = np.divide(
+        times[valid] - sample_times[left],
+        span,
+        out=np.zeros(len(span)),
+        where=span > 0,
+    )
+    steps = wrap_angles(angles[right] - angles[left])
+    result[valid] = wrap_angles(angles[left] + weights[:, np.newaxis] * steps)
+    return result, valid
+
+
+def synchronize(
+    positions: "pd.DataFrame",
+    attitude: "pd.DataFrame",
+    missing: Collection[str] = (),
+) -> "pd.DataFrame":
+    """Resample attitude onto timestamps of positions
+
+    Args:
+        positions (pd.DataFrame): Positions with `time_s` column
+        attitude (pd.DataFrame): Attitude with `time_s` column and angles from
+        `ANGLE_COLUMNS`
+        missing (Collection[str], optional): Angles that are unavailable.
+        Defaults to ().
+
+    Returns:
+        pd.DataFrame: Positions with interpolated angles, rows outside of the
+        time span of attitude are dropped
+    """
+    import pandas as pd
+
+    columns = [column for column in ANGLE_COLUMNS if column not in missing]
+    angles, valid = interpolate_angles(
+        np.asarray(positions[TIME_COLUMN], dtype=float),
+        np.asarray(attitude[TIME_COLUMN], dtype=float),
+        np.column_stack([np.asarray(attitude[c], dtype=float) for c in columns])
+        if columns
+        else np.empty((len(attitude), 0)),
+    )
+    result = pd.DataFrame(
+        {
+            name: np.asarray(positions[name])[valid]
+            for name in _names(positions)
+            if name not in ANGLE_COLUMNS
+        }
+    )
+    for i, column in enumerate(columns):
+        result[column] = angles[valid, i]
+    return result
+
+
+def synchronize_chunks(
+    position_chunks: Iterable["pd.DataFrame"],
+    attitude_chunks: Iterable["pd.DataFrame"],
+    missing: Collection[str] = (),
+) -> Iterator["pd.DataFrame"]:
+    """Streaming counterpart of `synchronize`
+
+    Attitude is read only as far as the last timestamp of the current chunk of
+    positions and samples before the bracketing one are dropped, so memory
+    depends on the chunk sizes and the results are identical to `synchronize`.
+
+    Args:
+        position_chunks (Iterable[pd.DataFrame]): Chunks of positions with
+        increasing `time_s`
+        attitude_chunks (Iterable[pd.DataFrame]): Chunks of attitude with
+        increasing `time_s`
+        missing (Collection[str], optional): Angles that are unavailable.
+        Defaults to ().
+
+    Yields:
+        pd.DataFrame: Chunks of positions with interpolated angles
+    """
+    import pandas as pd
+
+    attitude_chunks = iter(attitude_chunks)
+    buffer = None
+    exhausted = False
+    for positions in position_chunks:
+        if not len(positions):
+            continue
+        last_time = float(np.asarray(positions[TIME_COLUMN])[-1])
+        while not exhausted and (
+            buffer is None or buffer[TIME_COLUMN].iat[-1] < last_time
+        ):
+            chunk = next(attitude_chunks, None)
+            if chunk is None:
+                exhausted = True
+            else:
+                chunk = pd.DataFrame({name: chunk[name] for name in _names(chunk)})
+                buffer = (
+                    chunk
+                    if buffer is None
+                    else pd.concat([buffer, chunk], ignore_index=True)
+                )
+        if buffer is None:
+            buffer = pd.DataFrame(
+                {TIME_COLUMN: np.empty(0), **{c: np.empty(0) for c in ANGLE_COLUMNS}}
+            )
+        yield synchronize(positions, buffer, missing)
+
+        keep = np.searchsorted(buffer[TIME_COLUMN].to_numpy(), last_time, "right")
+        buffer = buffer.iloc[max(keep - 1, 0) :].reset_index(drop=True)
+
+
+def _names(data) -> Tuple[str, ...]:
+    """Column names of table or fields of structured array"""
+    names = getattr(data, "columns", None)
+    return tuple(data.dtype.names if names is None else names)
@@ -1,12 +1,20 @@
-from typing import Optional
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.lines import Line2D
 from matplotlib.collections import PatchCollection
 from matplotlib.figure import Figure
 from functools import partial
 from matplotlib.animation import FuncAnimation, Animation
 
+from gnss_localization.decimation import frame_indices, lttb, minmax_envelope
+
 
 def animate_projections(
     gnss_coordinates: np.ndarray,
@@ -15,9 +23,17 @@ def animate_projections(
     gnss_path_line: Optional[Line2D] = None,
     ghss_head_scatter: Optional[PatchCollection] = None,
     gnss_route_line: Optional[Line2D] = None,
+    center: Optional[Tuple[float, float]] = None,
+    frame_stride: int = 1,
+    max_frames: Optional[int] = None,
+    max_points: Optional[int] = None,
 ) -> Animation:
     """Build animation of GNSS module movement
 
+    For long tracks set `max_frames` and `max_points`: only every few samples
+    become a frame and the drawn path is decimated with LTTB, so rendering cost
+    depends on the output length and not on the number of samples.
+
     Args:
         gnss_coordinates (np.ndarray): Coordinates of GNSS module
         i (int, optional): Index of current animation frame. Defaults to -1.
@@ -25,6 +41,10 @@ def animate_projections(
         gnss_path_line (Optional[Line2D], optional): Matplotlib line for GNSS path. Defaults to None.
         ghss_head_scatter (Optional[PatchCollection], optional): Matplotlib scatter fot GNSS head. Defaults to None.
         gnss_route_line (Optional[Line2D], optional): Matplotlib line for GNSS route. Defaults to None.
+        center (Optional[Tuple[float, float]], optional): Centre of the route, computed once from the data if None. Defaults to None.
+        frame_stride (int, optional): Show every `frame_stride` sample as a frame. Defaults to 1.
+        max_frames (Optional[int], optional): Upper bound on number of frames. Defaults to None.
+        max_points (Optional[int], optional): Upper bound on number of points of the drawn path. Defaults to None.
 
     Returns:
         Animation: Animation of GNSS module movement
@@ -36,13 +56,18 @@ def animate_projections(
         ghss_head_scatter = plt.scatter([], [], c="k", marker="o", s=45)
         (gnss_route_line,) = plt.plot([], [], lw=1, c="k")
 
+        x_min, y_min = gnss_coordinates[:, :2].min(axis=0)
+        x_max, y_max = gnss_coordinates[:, :2].max(axis=0)
         plt.title("GNSS movement over time")
         plt.xlabel("$X$")
         plt.ylabel("$Y$")
-        plt.xlim((gnss_coordinates[:, 0].min() - 1, gnss_coordinates[:, 0].max() + 1))
-        plt.ylim((gnss_coordinates[:, 1].min() - 1, gnss_coordinates[:, 1].max() + 1))
+        plt.xlim((x_min - 1, x_max + 1))
+        plt.ylim((y_min - 1, y_max + 1))
 
-        gnss_path_line.set_data(gnss_coordinates[:, 0], gnss_coordinates[:, 1])
+        path = gnss_coordinates
+        if max_points is not None:
+            path = gnss_coordinates[lttb(gnss_coordinates, max_points)]
+        gnss_path_line.set_data(path[:, 0], path[:, 1])
         return FuncAnimation(
             fig=fig,
             func=partial(
@@ -52,36 +77,211 @@ def animate_projections(
                 gnss_path_line=gnss_path_line,
                 ghss_head_scatter=ghss_head_scatter,
                 gnss_route_line=gnss_route_line,
+                center=((x_max + x_min) // 2, (y_max + y_min) // 2),
             ),
             interval=33 * 2,
             blit=True,
-            frames=len(gnss_coordinates),
+            frames=frame_indices(len(gnss_coordinates), frame_stride, max_frames),
         )
     else:
-        x_center = (gnss_coordinates[:, 0].max() + gnss_coordinates[:, 0].min()) // 2
-        y_center = (gnss_coordinates[:, 1].max() + gnss_coordinates[:, 1].min()) // 2
+        if center is None:
+            x_min, y_min = gnss_coordinates[:, :2].min(axis=0)
+            x_max, y_max = gnss_coordinates[:, :2].max(axis=0)
+            center = ((x_max + x_min) // 2, (y_max + y_min) // 2)
         ghss_head_scatter.set_offsets(gnss_coordinates[i, :2])  # update the data.
         gnss_route_line.set_data(
-            [x_center, gnss_coordinates[i, 0]], [y_center, gnss_coordinates[i, 1]]
+            [center[0], gnss_coordinates[i, 0]], [center[1], gnss_coordinates[i, 1]]
         )
         return (gnss_path_line, ghss_head_scatter, gnss_route_line)  # type: ignore
 
 
+def _render_frames(
+    path: np.ndarray,
+    heads: np.ndarray,
+    limits: Tuple[float, float, float, float],
+    center: Tuple[float, float],
+    first_frame: int,
+    frames_dir: str,
+    dpi: int,
+    palette: bool,
+) -> List[str]:
+    """Render chunk of animation frames to PNG files
+
+    Runs in a worker process with a figure bound to the Agg canvas, so no
+    display is needed. The static part of the figure is drawn once and every
+    frame only restores it and draws the GNSS head and route line.
+    """
+    from PIL import Image
+
+    fig = Figure(dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(path[:, 0], path[:, 1], lw=2, c="c", linestyle="dashed")
+    ghss_head_scatter = ax.scatter([], [], c="k", marker="o", s=45, animated=True)
+    (gnss_route_line,) = ax.plot([], [], lw=1, c="k", animated=True)
+    ax.set_title("GNSS movement over time")
+    ax.set_xlabel("$X$")
+    ax.set_ylabel("$Y$")
+    ax.set_xlim(limits[:2])
+    ax.set_ylim(limits[2:])
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+
+    names = []
+    for i, head in enumerate(heads):
+        canvas.restore_region(background)
+        ghss_head_scatter.set_offsets(head[:2])
+        gnss_route_line.set_data([center[0], head[0]], [center[1], head[1]])
+        ax.draw_artist(ghss_head_scatter)
+        ax.draw_artist(gnss_route_line)
+        image = Image.fromarray(np.asarray(canvas.buffer_rgba())).convert("RGB")
+        if palette:
+            image = image.quantize(256, method=Image.Quantize.FASTOCTREE)
+        name = os.path.join(frames_dir, f"frame_{first_frame + i:06d}.png")
+        image.save(name)
+        names.append(name)
+    return names
+
+
+def save_projections_animation(
+    gnss_coordinates: np.ndarray,
+    output_path: Path,
+    fps: int = 15,
+    frame_stride: int = 1,
+    max_frames: Optional[int] = None,
+    max_points: Optional[int] = None,
+    jobs: int = 1,
+    dpi: int = 100,
+) -> Path:
+    """Render animation of GNSS module movement on many processes and save it
+
+    Frames are split into contiguous chunks rendered by a pool of processes with
+    the Agg backend and written as PNG files, which are stitched by `ffmpeg` if it
+    is installed. Without `ffmpeg` only GIF is supported and it is written with
+    Pillow.
+
+    Args:
+        gnss_coordinates (np.ndarray): Coordinates of GNSS module
+        output_path (Path): Path to animation, .mp4 or .gif
+        fps (int, optional): Frames per second. Defaults to 15.
+        frame_stride (int, optional): Show every `frame_stride` sample as a frame. Defaults to 1.
+        max_frames (Optional[int], optional): Upper bound on number of frames. Defaults to None.
+        max_points (Optional[int], optional): Upper bound on number of points of the drawn path. Defaults to None.
+        jobs (int, optional): Number of worker processes. Defaults to 1.
+        dpi (int, optional): Resolution of frames. Defaults to 100.
+
+    Raises:
+        ValueError: If MP4 is requested and `ffmpeg` is not available
+
+    Returns:
+        Path: Path to animation
+    """
+    output_path = Path(output_path)
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None and output_path.suffix != ".gif":
+        raise ValueError(f"ffmpeg is required to write {output_path.suffix} files")
+
+    x_min, y_min = gnss_coordinates[:, :2].min(axis=0)
+    x_max, y_max = gnss_coordinates[:, :2].max(axis=0)
+    limits = (x_min - 1, x_max + 1, y_min - 1, y_max + 1)
+    center = ((x_max + x_min) // 2, (y_max + y_min) // 2)
+    path = gnss_coordinates
+    if max_points is not None:
+        path = gnss_coordinates[lttb(gnss_coordinates, max_points)]
+    heads = gnss_coordinates[
+        frame_indices(len(gnss_coordinates), frame_stride, max_frames), :2
+    ]
+
+    with tempfile.TemporaryDirectory() as frames_dir:
+        palette = ffmpeg is None
+        bounds = np.linspace(0, len(heads), min(jobs, len(heads)) + 1).astype(int)
+        tasks = [
+            (path, heads[start:end], limits, center, start, frames_dir, dpi, palette)
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        if len(tasks) < 2:
+            names = [name for task in tasks for name in _render_frames(*task)]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=len(tasks)) as executor:
+                chunks = executor.map(_render_frames, *zip(*tasks))
+                names = [name for chunk in chunks for name in chunk]
+
+        if ffmpeg is not None:
+            filters = (
+                ["-vf", "split[a][b];[a]palettegen[p];[b][p]paletteuse"]
+                if output_path.suffix == ".gif"
+                else ["-c:v", "libx264", "-pix_fmt", "yuv420p"]
+            )
+            subprocess.run(
+                [ffmpeg, "-y", "-loglevel", "error", "-framerate", str(fps)]
+                + ["-i", os.path.join(frames_dir, "frame_%06d.png")]
+                + filters
+                + [str(output_path)],
+                check=True,
+            )
+        else:
+            from PIL import Image
+
+            Image.open(names[0]).save(
+                output_path,
+                save_all=True,
+                append_images=(Image.open(name) for name in names[1:]),
+                duration=1000 // fps,
+                loop=0,
+            )
+    return output_path
+
+
+RASTER_THRESHOLD = 100_000
+
+
+def _density_image(
+    ax, x: np.ndarray, y: np.ndarray, edges: Tuple[np.ndarray, np.ndarray], cmap: str
+) -> None:
+    """Draw number of points in every cell of a grid, empty cells are transparent"""
+    density, _, _ = np.histogram2d(x, y, bins=edges)
+    image = np.log1p(density.T)
+    ax.imshow(
+        np.ma.masked_equal(image, 0),
+        extent=(edges[0][0], edges[0][-1], edges[1][0], edges[1][-1]),
+        origin="lower",
+        aspect="auto",
+        cmap=cmap,
+        # cells with a single point are still clearly visible
+        vmin=-image.max(),
+        interpolation="nearest",
+    )
+
+
 def plot_headings(
-    vehicle_coordinates: np.ndarray, headings: np.ndarray, res_multiplier: float = 5.0
+    vehicle_coordinates: np.ndarray,
+    headings: np.ndarray,
+    res_multiplier: float = 5.0,
+    raster: Optional[bool] = None,
+    bins: int = 512,
 ) -> Figure:
     """Plot heading angle for each point and route deviations
 
+    In raster mode the trajectory and residuals are drawn as log-scaled 2D
+    histograms and headings as min/max envelope over bins of X coordinate, so
+    render time and figure size do not depend on the number of points.
+
     Args:
         vehicle_coordinates (np.ndarray): Coordinates of vehicle
         headings (np.ndarray): Heading angles for each point
         res_multiplier (float, optional): Multiplier for deviations. Defaults to 5.0.
+        raster (Optional[bool], optional): Aggregate points into bins instead of drawing lines. If None raster mode is used for more than `RASTER_THRESHOLD` points. Defaults to None.
+        bins (int, optional): Number of bins along each axis in raster mode. Defaults to 512.
 
     Returns:
         Figure: Plot of heading angle for each point and route deviations
     """
 
     vehicle_coordinates = vehicle_coordinates[1:]
+    if raster is None:
+        raster = len(vehicle_coordinates) > RASTER_THRESHOLD
     x_perfect = np.linspace(
         vehicle_coordinates[0, 0], vehicle_coordinates[-1, 0], len(vehicle_coordinates)
     )
@@ -90,22 +290,40 @@ def plot_headings(
     )
     diff_x = x_perfect - vehicle_coordinates[:, 0]
     diff_y = y_perfect - vehicle_coordinates[:, 1]
+    x_residuals = x_perfect - diff_x * res_multiplier
+    y_residuals = y_perfect + diff_y * res_multiplier
 
     fig, ax1 = plt.subplots()
-    ax1.plot(
-        vehicle_coordinates[:, 0],
-        vehicle_coordinates[:, 1],
-        lw=2,
-        label="Vehicle coordinates",
-    )
-    ax1.plot(
-        x_perfect - diff_x * res_multiplier,
-        y_perfect + diff_y * res_multiplier,
-        lw=1,
-        linestyle="--",
-        label=f"Residuals x{res_multiplier}",
-    )
-    ax1.arrow(
+    if raster:
+        x_all = np.concatenate([vehicle_coordinates[:, 0], x_residuals])
+        y_all = np.concatenate([vehicle_coordinates[:, 1], y_residuals])
+        edges = (
+            np.linspace(x_all.min(), x_all.max(), bins + 1),
+            np.linspace(y_all.min(), y_all.max(), bins + 1),
+        )
+        _density_image(
+            ax1, vehicle_coordinates[:, 0], vehicle_coordinates[:, 1], edges, "Blues"
+        )
+        _density_image(ax1, x_residuals, y_residuals, edges, "Oranges")
+        handles = [
+            Line2D([], [], lw=2, c="tab:blue", label="Vehicle coordinates"),
+            Line2D([], [], lw=1, c="tab:orange", label=f"Residuals x{res_multiplier}"),
+        ]
+    else:
+        ax1.plot(
+            vehicle_coordinates[:, 0],
+            vehicle_coordinates[:, 1],
+            lw=2,
+            label="Vehicle coordinates",
+        )
+        ax1.plot(
+            x_residuals,
+            y_residuals,
+            lw=1,
+            linestyle="--",
+            label=f"Residuals x{res_multiplier}",
+        )
+    north = ax1.arrow(
         vehicle_coordinates[0, 0],
         vehicle_coordinates[0, 1],
         vehicle_coordinates[-1, 0] - vehicle_coordinates[0, 0],
@@ -121,13 +339,29 @@ def plot_headings(
     ax1.set_ylabel("$Y$ coordinate")
     ax1.tick_params(axis="y")
     ax2 = ax1.twinx()
-    ax2.plot(
-        vehicle_coordinates[:, 0], headings, label="Heading angle", c="r", alpha=0.4
-    )
+    if raster:
+        centers, low, high = minmax_envelope(vehicle_coordinates[:, 0], headings, bins)
+        ax2.fill_between(
+            centers,
+            low,
+            high,
+            step="mid",
+            label="Heading angle",
+            color="r",
+            alpha=0.4,
+            lw=0,
+        )
+    else:
+        ax2.plot(
+            vehicle_coordinates[:, 0], headings, label="Heading angle", c="r", alpha=0.4
+        )
     ax2.set_ylabel("$Heading$ angle")
     ax2.tick_params(axis="y")
     fig.tight_layout()
-    ax1.legend(loc="best")
+    if raster:
+        ax1.legend(handles=handles + [north], loc="best")
+    else:
+        ax1.legend(loc="best")
     ax2.legend(loc="best")
     ax1.set_title("Global heading")
     return fig
@@ -0,0 +1,105 @@
+import json
+import pytest
+import numpy as np
+import pandas as pd
+
+from gnss_localization.batch import MANIFEST_NAME, find_inputs, run_batch
+from gnss_localization.heading_estimator import GNSSHeadingEstimator
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    rng = np.random.default_rng(4)
+    for i in range(4):
+        n_samples = 100 * (i + 1)
+        pd.DataFrame(
+            {
+                "x_mm": np.cumsum(rng.normal(100, 10, n_samples)),
+                "y_mm": np.cumsum(rng.normal(-50 * i, 10, n_samples)),
+                "roll_deg": rng.normal(0, 3, n_samples),
+                "pitch_deg": rng.normal(0, 3, n_samples),
+            }
+        ).to_csv(tmp_path / f"drive-{i}.csv", index=False)
+    (tmp_path / "broken.csv").write_text("a,b\n1,2\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_batch_headings(data_dir, tmp_path, jobs):
+    inputs = find_inputs(str(data_dir / "*.csv"))
+    assert len(inputs) == 5
+    estimators = [
+        GNSSVehicleCoordinatesEstimator(0, 0, 1500),
+        GNSSHeadingEstimator(0, 0, 1500, north_direction=None),
+    ]
+    manifest = run_batch(
+        inputs, tmp_path / "out", "heading", estimators, ["z_mm", "yaw_deg"], jobs=jobs
+    )
+
+    assert manifest["files_failed"] == 1
+    assert manifest["rows"] == 100 + 200 + 300 + 400
+    assert estimators[1].north_vector is None
+    assert json.loads((tmp_path / "out" / MANIFEST_NAME).read_text()) == manifest
+    for i in range(4):
+        headings = pd.read_csv(tmp_path / "out" / f"drive-{i}.csv")
+        assert len(headings) == 100 * (i + 1) - 1
+
+
+def test_batch_profile(data_dir, tmp_path):
+    inputs = find_inputs(str(data_dir))
+    manifest = run_batch(
+        inputs,
+        tmp_path / "out",
+        "proj",
+        [GNSSProjectionEstimator(0, 0, 1500)],
+        ["z_mm", "yaw_deg"],
+        jobs=2,
+        profile=True,
+    )
+
+    assert manifest["stages"]["predict"]["rows"] == manifest["rows"]
+    assert manifest["stages"]["read"]["calls"] == len(inputs)
+    assert all("stages" in entry for entry in manifest["files"])
+
+
+def test_batch_inputs_with_same_stem(data_dir, tmp_path):
+    (data_dir / "a").mkdir()
+    (data_dir / "b").mkdir()
+    source = pd.read_csv(data_dir / "drive-0.csv")
+    source.to_csv(data_dir / "a" / "d.csv", index=False)
+    source[:50].to_csv(data_dir / "b" / "d.csv", index=False)
+    source[:70].to_csv(data_dir / "drive-0-npz.csv", index=False)
+    np.savez(data_dir / "drive-0.npz", **{name: source[name] for name in source})
+    inputs = find_inputs(str(data_dir / "**" / "*.*"))
+    inputs = [path for path in inputs if "broken" not in path.name]
+    manifest = run_batch(
+        inputs,
+        tmp_path / "out",
+        "proj",
+        [GNSSProjectionEstimator(0, 0, 1500)],
+        ["z_mm", "yaw_deg"],
+    )
+
+    out = tmp_path / "out"
+    assert len(pd.read_csv(out / "a" / "d.csv")) == 100
+    assert len(pd.read_csv(out / "b" / "d.csv")) == 50
+    assert len(pd.read_csv(out / "drive-0-csv.csv")) == 100
+    # the suffixed name of the .npz input is taken by another input
+    assert manifest["files_failed"] == 1
+    (failed,) = [entry for entry in manifest["files"] if entry["status"] != "ok"]
+    assert "collides" in failed["error"]
+    assert len({entry["output"] for entry in manifest["files"]}) == len(inputs) - 1
+
+
+def test_batch_output_dir_is_input_dir(data_dir):
+    inputs = [data_dir / "drive-0.csv", data_dir / "drive-1.csv"]
+    before = [path.read_bytes() for path in inputs]
+    manifest = run_batch(
+        inputs, data_dir, "proj", [GNSSProjectionEstimator(0, 0, 1500)], ["z_mm"]
+    )
+
+    assert [path.read_bytes() for path in inputs] == before
+    assert manifest["files_failed"] == 2
+    assert all("overwrite the input" in entry["error"] for entry in manifest["files"])
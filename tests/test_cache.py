@@ -0,0 +1,109 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from gnss_localization.cache import ResultCache, cached_headings, cached_projections
+from gnss_localization.heading_estimator import GNSSHeadingEstimator
+from gnss_localization.pipeline import run_headings
+from gnss_localization.profiling import Profiler
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+
+MISSING = ["z_mm", "yaw_deg"]
+
+
+def make_track(n_samples, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "x_mm": np.cumsum(rng.normal(100, 10, n_samples)),
+            "y_mm": np.cumsum(rng.normal(-20, 10, n_samples)),
+            "roll_deg": rng.normal(0, 3, n_samples),
+            "pitch_deg": rng.normal(0, 3, n_samples),
+        }
+    )
+
+
+def cached_run(cache, data_path, output_path, offset_z=1500):
+    profiler = Profiler(trace_memory=False)
+    results = cached_headings(
+        cache,
+        data_path,
+        output_path,
+        GNSSVehicleCoordinatesEstimator(0, 0, offset_z),
+        GNSSHeadingEstimator(0, 0, offset_z, north_direction=None),
+        MISSING,
+        profiler=profiler,
+    )
+    return results, profiler.stages
+
+
+def test_hit_and_appended_rows(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    data_path = tmp_path / "data.csv"
+    make_track(500, 8).to_csv(data_path, index=False)
+
+    _, stages = cached_run(cache, data_path, tmp_path / "first.csv")
+    assert stages["read"]["rows"] == 500
+    _, stages = cached_run(cache, data_path, tmp_path / "second.csv")
+    assert "read" not in stages
+    assert (tmp_path / "first.csv").read_bytes() == (
+        tmp_path / "second.csv"
+    ).read_bytes()
+
+    make_track(50, 9).to_csv(data_path, index=False, header=False, mode="a")
+    (vehicle_coordinates, headings), stages = cached_run(
+        cache, data_path, tmp_path / "appended.csv"
+    )
+    assert stages["read"]["rows"] == 50
+    expected = run_headings(
+        data_path,
+        tmp_path / "expected.csv",
+        GNSSVehicleCoordinatesEstimator(0, 0, 1500),
+        GNSSHeadingEstimator(0, 0, 1500, north_direction=None),
+        MISSING,
+    )
+    np.testing.assert_array_equal(vehicle_coordinates, expected[0])
+    np.testing.assert_array_equal(headings, expected[1])
+    assert (tmp_path / "appended.csv").read_bytes() == (
+        tmp_path / "expected.csv"
+    ).read_bytes()
+
+
+def test_parameters_and_content_are_keys(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    data_path = tmp_path / "data.csv"
+    make_track(100, 8).to_csv(data_path, index=False)
+
+    cached_run(cache, data_path, tmp_path / "out.csv")
+    _, stages = cached_run(cache, data_path, tmp_path / "out.csv", offset_z=1000)
+    assert stages["read"]["rows"] == 100
+
+    make_track(100, 10).to_csv(data_path, index=False)
+    _, stages = cached_run(cache, data_path, tmp_path / "out.csv")
+    assert stages["read"]["rows"] == 100
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResultCache(tmp_path / "cache", max_bytes=2 * 100 * 3 * 8)
+    paths = []
+    for seed in range(3):
+        paths.append(tmp_path / f"data-{seed}.csv")
+        make_track(100, seed).to_csv(paths[-1], index=False)
+
+    estimator = GNSSProjectionEstimator(0, 0, 1500)
+    for path in paths[:2]:
+        cached_projections(cache, path, tmp_path / "out.csv", estimator, MISSING)
+    # touch the first file, so the second one is the least recently used
+    cached_projections(cache, paths[0], tmp_path / "out.csv", estimator, MISSING)
+    cached_projections(cache, paths[2], tmp_path / "out.csv", estimator, MISSING)
+
+    assert len(list((tmp_path / "cache").glob("*.npy"))) == 2
+    for path, hit in zip(paths, [True, False, True]):
+        profiler = Profiler(trace_memory=False)
+        cached_projections(
+            cache, path, tmp_path / "out.csv", estimator, MISSING, profiler=profiler
+        )
+        assert ("read" not in profiler.stages) == hit
+        if not hit:
+            break
@@ -0,0 +1,45 @@
+import pytest
+import numpy as np
+
+from gnss_localization.decimation import frame_indices, lttb
+
+
+@pytest.mark.parametrize("n_out", [3, 10, 999])
+def test_lttb_keeps_endpoints_and_order(n_out):
+    rng = np.random.default_rng(5)
+    points = np.cumsum(rng.normal(size=(1000, 3)), axis=0)
+    indices = lttb(points, n_out)
+
+    assert len(indices) == n_out
+    assert indices[0] == 0 and indices[-1] == len(points) - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_keeps_spikes():
+    points = np.zeros((10_000, 2))
+    points[:, 0] = np.arange(len(points))
+    points[1234, 1] = 100.0
+    points[8765, 1] = -50.0
+
+    indices = lttb(points, 50)
+    assert 1234 in indices
+    assert 8765 in indices
+
+
+def test_lttb_short_paths_are_unchanged():
+    points = np.ones((5, 3))
+    np.testing.assert_array_equal(lttb(points, 10), np.arange(5))
+
+
+@pytest.mark.parametrize(
+    "n_samples, frame_stride, max_frames, expected",
+    [
+        (10, 3, None, [0, 3, 6, 9]),
+        (11, 3, None, [0, 3, 6, 9, 10]),
+        (1001, 1, 5, [0, 250, 500, 750, 1000]),
+        (5, 1, 300, [0, 1, 2, 3, 4]),
+    ],
+)
+def test_frame_indices(n_samples, frame_stride, max_frames, expected):
+    frames = frame_indices(n_samples, frame_stride, max_frames)
+    np.testing.assert_array_equal(frames, expected)
@@ -0,0 +1,301 @@
+import pytest
+import numpy as np
+
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+from gnss_localization.fleet_estimator import GNSSFleetEstimator
+from gnss_localization.heading_estimator import (
+    GNSSHeadingEstimator,
+    OnlineNorthEstimator,
+    compute_headings,
+    compute_window_headings,
+)
+from gnss_localization.online_estimator import GNSSOnlineEstimator
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.projection_matrix import build_projection_matrix
+
+
+@pytest.fixture
+def inputs():
+    rng = np.random.default_rng(1)
+    return np.hstack(
+        [
+            rng.normal(0, 10_000, size=(50, 3)),
+            np.deg2rad(rng.normal(0, 5, size=(50, 3))),
+        ]
+    )
+
+
+def test_vehicle_coordinates(inputs):
+    estimator = GNSSVehicleCoordinatesEstimator(100, -50, 1500)
+    expected = np.asanyarray(
+        [
+            coordinates
+            - build_projection_matrix(roll, pitch, yaw)
+            @ estimator.proj_estimator.gnss_vector[:, 0]
+            for *coordinates, roll, pitch, yaw in inputs
+        ]
+    )
+    assert np.allclose(estimator.predict(inputs), expected)
+
+
+def test_vehicle_coordinates_out(inputs):
+    estimator = GNSSVehicleCoordinatesEstimator(0, 0, 1500)
+    out = np.empty((len(inputs), 3))
+    result = estimator.predict(inputs, out=out)
+    assert result is out
+    assert np.allclose(out, estimator.predict(inputs))
+
+
+def test_signed_headings():
+    estimator = GNSSHeadingEstimator(0, 0, 1500, north_direction=(0, 1, 0))
+    vehicle_coordinates = np.array(
+        [[0, 0, 0], [0, 10, 0], [10, 0, 5], [0, -10, 0], [-10, 0, 0], [0, 0, 3]]
+    )
+    headings = estimator.predict(vehicle_coordinates)
+    assert np.allclose(headings[:4], [0, 90, 180, 270])
+    assert np.isnan(headings[4])
+
+
+def test_headings_match_arccos_magnitude():
+    rng = np.random.default_rng(2)
+    vehicle_coordinates = np.cumsum(rng.normal(size=(100, 3)), axis=0)
+    vehicle_coordinates[:, 2] = 0
+    estimator = GNSSHeadingEstimator(0, 0, 0, north_direction=None)
+    headings = estimator.predict(vehicle_coordinates)
+
+    north = np.array(estimator.north_vector)
+    displacements = vehicle_coordinates[1:] - vehicle_coordinates[0]
+    cos = (
+        displacements
+        @ north
+        / (np.linalg.norm(north) * np.linalg.norm(displacements, axis=1))
+    )
+    unsigned = np.rad2deg(np.arccos(np.clip(cos, -1, 1)))
+    assert np.all((headings >= 0) & (headings < 360))
+    assert np.allclose(np.minimum(headings, 360 - headings), unsigned)
+
+
+def test_closed_loop_headings():
+    angles = np.linspace(0, 2 * np.pi, 50)
+    loop = np.column_stack([np.sin(angles), 1 - np.cos(angles), np.zeros(50)])
+    loop[-1] = loop[0]
+    estimator = GNSSHeadingEstimator(0, 0, 0, north_direction=None)
+    assert np.all(np.isnan(estimator.predict(loop)))
+    assert estimator.predict(loop[:1]).shape == (0,)
+    with pytest.raises(ValueError):
+        GNSSHeadingEstimator(0, 0, 0, north_direction=(0, 0, 1))
+
+    track = np.cumsum(np.ones((50, 3)), axis=0)
+    fleet_coordinates = np.stack([track, loop])
+    inputs = np.concatenate([fleet_coordinates, np.zeros((2, 50, 3))], axis=-1)
+    _, _, headings = GNSSFleetEstimator(np.zeros((2, 3))).predict(inputs)
+    assert np.allclose(headings[0], 0)
+    assert np.all(np.isnan(headings[1]))
+
+
+def test_online_estimator_matches_batch(inputs):
+    north = (1, 2, 0)
+    online = GNSSOnlineEstimator(100, -50, 1500, north_direction=north)
+    projections, vehicle_coordinates, headings = [], [], []
+    for sample in inputs:
+        projection, coordinates, heading = online.update(*sample)
+        projections.append(projection.copy())
+        vehicle_coordinates.append(coordinates.copy())
+        headings.append(heading)
+
+    expected_coordinates = GNSSVehicleCoordinatesEstimator(100, -50, 1500).predict(
+        inputs
+    )
+    expected_headings = GNSSHeadingEstimator(100, -50, 1500, north).predict(
+        expected_coordinates
+    )
+    assert np.allclose(
+        projections, GNSSProjectionEstimator(100, -50, 1500).predict(inputs)
+    )
+    assert np.allclose(vehicle_coordinates, expected_coordinates)
+    assert np.isnan(headings[0])
+    assert np.allclose(headings[1:], expected_headings)
+
+
+def single_vehicle(offsets, north, inputs):
+    vehicle_coordinates = GNSSVehicleCoordinatesEstimator(*offsets).predict(inputs)
+    return (
+        GNSSProjectionEstimator(*offsets).predict(inputs),
+        vehicle_coordinates,
+        GNSSHeadingEstimator(*offsets, north).predict(vehicle_coordinates),
+    )
+
+
+@pytest.mark.parametrize("north", [None, (0, 1, 0)])
+def test_fleet_dense(inputs, north):
+    fleet_inputs = np.stack([inputs, inputs[::-1], inputs * 0.5])
+    offsets = np.array([[0, 0, 1500], [100, -20, 1200], [-50, 30, 2000]])
+    results = GNSSFleetEstimator(offsets, north).predict(fleet_inputs)
+    assert results[2].shape == (3, len(inputs) - 1)
+    for vehicle, (vehicle_offsets, vehicle_inputs) in enumerate(
+        zip(offsets, fleet_inputs)
+    ):
+        expected = single_vehicle(vehicle_offsets, north, vehicle_inputs)
+        for result, expected_result in zip(results, expected):
+            assert np.allclose(result[vehicle], expected_result)
+
+
+@pytest.mark.parametrize("north", [None, (1, 1, 0)])
+def test_fleet_ragged(inputs, north):
+    fleet_inputs = [inputs[:10], inputs[10:35], inputs[35:]]
+    offsets = np.array([[0, 0, 1500], [100, -20, 1200], [-50, 30, 2000]])
+    lengths = [len(vehicle_inputs) for vehicle_inputs in fleet_inputs]
+    estimator = GNSSFleetEstimator(offsets, north)
+    results = estimator.predict(np.concatenate(fleet_inputs), lengths)
+
+    assert all(
+        np.array_equal(result, list_result)
+        for result, list_result in zip(results, estimator.predict(fleet_inputs))
+    )
+    projections, vehicle_coordinates, headings = results
+    per_vehicle = zip(
+        GNSSFleetEstimator.split(projections, lengths),
+        GNSSFleetEstimator.split(vehicle_coordinates, lengths),
+        GNSSFleetEstimator.split(headings, [length - 1 for length in lengths]),
+    )
+    for vehicle, vehicle_results in enumerate(per_vehicle):
+        expected = single_vehicle(offsets[vehicle], north, fleet_inputs[vehicle])
+        for result, expected_result in zip(vehicle_results, expected):
+            assert np.allclose(result, expected_result)
+
+
+def test_constant_axes_and_float32():
+    rng = np.random.default_rng(3)
+    n_samples = 1000
+    inputs = np.zeros((n_samples, 6))
+    # up to 8.4 km from the origin, where float32 spacing is 1 mm
+    inputs[:, :2] = rng.uniform(-8e6, 8e6, size=(n_samples, 2))
+    inputs[:, 3:5] = np.deg2rad(rng.normal(0, 3, size=(n_samples, 2)))
+    estimator = GNSSVehicleCoordinatesEstimator(120, -40, 1500)
+    expected = estimator.predict(inputs)
+
+    axes = estimator.predict_axes(
+        inputs[:, 0], inputs[:, 1], 0.0, inputs[:, 3], inputs[:, 4], 0.0
+    )
+    np.testing.assert_allclose(axes, expected, rtol=0, atol=1e-9)
+
+    single = GNSSVehicleCoordinatesEstimator(120, -40, 1500, dtype=np.float32)
+    result = single.predict(inputs.astype(np.float32))
+    assert result.dtype == np.float32
+    assert np.abs(result - expected).max() <= 0.5
+    projections = single.proj_estimator.predict(inputs.astype(np.float32))
+    assert np.abs(projections - inputs[:, :3] + expected).max() <= 1e-3
+
+
+def test_threaded_chunks_match_single_thread():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from gnss_localization import parallel
+    from gnss_localization.rotation_cache import RotationCache
+
+    rng = np.random.default_rng(4)
+    n_samples = 1000
+    inputs = np.hstack(
+        [
+            rng.normal(0, 10_000, size=(n_samples, 3)),
+            np.deg2rad(rng.normal(0, 5, size=(n_samples, 3))),
+        ]
+    )
+    inputs[:, 5] = 0.0
+    projection = GNSSProjectionEstimator(120, -40, 1500)
+    coordinates = GNSSVehicleCoordinatesEstimator(120, -40, 1500)
+    heading = GNSSHeadingEstimator(0, 0, 0, (0, 1, 0))
+    cached = GNSSProjectionEstimator(120, -40, 1500, RotationCache(1e-4))
+    vehicle_coordinates = coordinates.predict(inputs)
+    expected = [
+        projection.predict(inputs),
+        vehicle_coordinates,
+        heading.predict(vehicle_coordinates),
+        cached.predict(inputs),
+    ]
+
+    with ThreadPoolExecutor(3) as pool:
+        for kwargs in ({"n_jobs": 4}, {"n_jobs": -1}, {"executor": pool}):
+            # small chunks so that every call is split
+            with pytest.MonkeyPatch.context() as patch:
+                patch.setattr(parallel, "CHUNK_ROWS", 64)
+                results = [
+                    projection.predict(inputs, **kwargs),
+                    coordinates.predict(inputs, **kwargs),
+                    heading.predict(vehicle_coordinates, **kwargs),
+                    cached.predict(inputs, **kwargs),
+                ]
+            for result, expected_result in zip(results, expected):
+                np.testing.assert_array_equal(result, expected_result)
+
+    with pytest.raises(ValueError):
+        projection.predict(inputs, n_jobs=0)
+
+
+def test_window_headings():
+    rng = np.random.default_rng(5)
+    n_samples, window = 400, 9
+    angle = np.cumsum(rng.normal(0, 0.05, n_samples))
+    track = np.zeros((n_samples, 3))
+    track[:, 0] = np.cumsum(1000 * np.sin(angle)) + rng.normal(0, 30, n_samples)
+    track[:, 1] = np.cumsum(1000 * np.cos(angle)) + rng.normal(0, 30, n_samples)
+    north = (0, 1, 0)
+
+    slopes = np.array(
+        [
+            [
+                np.polyfit(np.arange(window), track[i - window + 1 : i + 1, axis], 1)[0]
+                for axis in range(2)
+            ]
+            for i in range(window - 1, n_samples)
+        ]
+    )
+    expected = np.concatenate(
+        [np.full(window - 1, np.nan), compute_headings(slopes, north)]
+    )
+    headings = compute_window_headings(track, window, north)
+    np.testing.assert_allclose(headings, expected, rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(
+        compute_window_headings(track, window, north, n_jobs=2), headings
+    )
+
+    estimator = GNSSHeadingEstimator(0, 0, 0, north, window=window)
+    np.testing.assert_array_equal(estimator.predict(track), headings[1:])
+    # chunks continue the track of the previous call, also chunks shorter than window
+    chunks = [estimator.predict(track[:100])]
+    for chunk in np.split(track[100:], [3, 150, 155]):
+        chunks.append(estimator.predict(chunk, origin=track[0]))
+    np.testing.assert_allclose(np.concatenate(chunks), headings[1:], rtol=0, atol=1e-9)
+    with pytest.raises(ValueError):
+        GNSSHeadingEstimator(0, 0, 0, north, window=1)
+
+
+def test_online_north():
+    rng = np.random.default_rng(6)
+    # points along a curved route heading south-east
+    t = np.linspace(0, 1, 2000)
+    points = np.column_stack([t * 3e5, -t * 1e5 + 2e4 * np.sin(6 * t)])
+    points += rng.normal(0, 100, points.shape)
+
+    single, batch = OnlineNorthEstimator(), OnlineNorthEstimator()
+    assert single.north_vector is None
+    for x, y in points:
+        single.update(x, y)
+    for chunk in np.array_split(points, 7):
+        batch.update_batch(chunk)
+    np.testing.assert_allclose(batch.north_vector, single.north_vector, atol=1e-12)
+
+    _, vectors = np.linalg.eigh(np.cov(points.T))
+    principal = vectors[:, -1] * np.sign(vectors[0, -1])
+    np.testing.assert_allclose(single.north_vector[:2], principal, atol=1e-9)
+    assert single.north_vector[0] > 0
+
+    online = GNSSOnlineEstimator(0, 0, 0, north_direction=None)
+    norths, headings = [], []
+    for x, y in points[:100]:
+        _, vehicle, heading = online.update(x, y, 0, 0, 0, 0)
+        headings.append(heading)
+        norths.append(online.north_estimator.north_vector)
+    assert np.isnan(headings[0])
+    expected = compute_headings(points[1:100] - points[0], np.array(norths[1:]))
+    np.testing.assert_allclose(headings[1:], expected, atol=1e-9)
@@ -0,0 +1,121 @@
+import json
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from gnss_localization.follow import default_checkpoint_path, follow_log
+from gnss_localization.heading_estimator import GNSSHeadingEstimator
+from gnss_localization.pipeline import run_headings, run_projections
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.rotation_cache import RotationCache
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+
+MISSING = ["z_mm", "yaw_deg"]
+NORTH = (0.0, 1.0, 0.0)
+
+
+def make_track(n_samples, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "x_mm": np.cumsum(rng.normal(100, 10, n_samples)),
+            "y_mm": np.cumsum(rng.normal(-20, 10, n_samples)),
+            "roll_deg": rng.normal(0, 3, n_samples),
+            "pitch_deg": rng.normal(0, 3, n_samples),
+        }
+    )
+
+
+def heading_estimators(north=NORTH):
+    return [
+        GNSSVehicleCoordinatesEstimator(0, 0, 1500),
+        GNSSHeadingEstimator(0, 0, 1500, north_direction=north),
+    ]
+
+
+def follow(data_path, output_path, mode="heading", estimators=None):
+    return follow_log(
+        data_path,
+        output_path,
+        mode,
+        estimators or heading_estimators(),
+        MISSING,
+        idle_timeout=0.0,
+        poll_interval=0.01,
+    )
+
+
+@pytest.mark.parametrize("mode", ["proj", "heading"])
+def test_increments_match_full_run(tmp_path, mode):
+    data_path, output_path = tmp_path / "data.csv", tmp_path / "follow.csv"
+    text = make_track(300, 1).to_csv(index=False)
+    estimators = (
+        [GNSSProjectionEstimator(0, 0, 1500)]
+        if mode == "proj"
+        else heading_estimators()
+    )
+
+    # header only, then rows in pieces that break lines in the middle
+    cuts = [text.index("\n") + 1, 1000, 4321, 9000, len(text)]
+    start = 0
+    for cut in cuts:
+        with open(data_path, "a") as file:
+            file.write(text[start:cut])
+        checkpoint = follow(data_path, output_path, mode, estimators)
+        assert checkpoint["offset"] == text.rfind("\n", 0, cut) + 1
+        start = cut
+    assert checkpoint["rows"] == 300
+
+    expected_path = tmp_path / "expected.csv"
+    if mode == "proj":
+        run_projections(data_path, expected_path, estimators[0], MISSING)
+    else:
+        run_headings(data_path, expected_path, *heading_estimators(), MISSING)
+    assert output_path.read_bytes() == expected_path.read_bytes()
+
+
+def test_resume_discards_unchecked_output(tmp_path):
+    data_path, output_path = tmp_path / "data.csv", tmp_path / "follow.csv"
+    track = make_track(200, 2)
+    track.iloc[:120].to_csv(data_path, index=False)
+    follow(data_path, output_path)
+
+    # output of a process killed before it saved the checkpoint
+    with open(output_path, "a") as file:
+        file.write("1.0\n2.0\n")
+    track.iloc[120:].to_csv(data_path, index=False, header=False, mode="a")
+    checkpoint = follow(data_path, output_path)
+    assert checkpoint["rows"] == 200
+
+    expected_path = tmp_path / "expected.csv"
+    run_headings(data_path, expected_path, *heading_estimators(), MISSING)
+    assert output_path.read_bytes() == expected_path.read_bytes()
+
+    # nothing new, nothing is reprocessed
+    assert follow(data_path, output_path)["rows"] == 200
+    assert output_path.read_bytes() == expected_path.read_bytes()
+
+
+def test_checkpoint_mismatch(tmp_path):
+    data_path, output_path = tmp_path / "data.csv", tmp_path / "follow.csv"
+    make_track(50, 3).to_csv(data_path, index=False)
+    follow(data_path, output_path)
+    assert json.loads(default_checkpoint_path(output_path).read_text())["origin"]
+
+    with pytest.raises(ValueError, match="Parameters differ"):
+        follow(data_path, output_path, estimators=heading_estimators((1, 0, 0)))
+    cached = heading_estimators()
+    cached[0] = GNSSVehicleCoordinatesEstimator(0, 0, 1500, RotationCache(1e-4))
+    with pytest.raises(ValueError, match="Parameters differ"):
+        follow(data_path, output_path, estimators=cached)
+    with pytest.raises(ValueError, match="north vector"):
+        follow(data_path, tmp_path / "other.csv", estimators=heading_estimators(None))
+
+    make_track(10, 4).to_csv(data_path, index=False)
+    with pytest.raises(ValueError, match="shorter"):
+        follow(data_path, output_path)
+
+    output_path.unlink()
+    with pytest.raises(ValueError, match="missing"):
+        follow(data_path, output_path)
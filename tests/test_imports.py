@@ -0,0 +1,57 @@
+import subprocess
+import sys
+
+import pytest
+
+# Seconds, generous enough for slow CI machines, numpy alone takes ~0.1 s
+IMPORT_BUDGET = 1.5
+
+
+def import_in_fresh_interpreter(module):
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+        "print(' '.join(sorted(sys.modules)))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    return float(output[0]), set(output[1].split())
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["gnss_localization", "gnss_localization.pipeline", "gnss_localization.cli"],
+)
+def test_heavy_dependencies_are_lazy(module):
+    seconds, modules = import_in_fresh_interpreter(module)
+
+    assert "matplotlib" not in modules
+    assert "pandas" not in modules
+    assert seconds < IMPORT_BUDGET
+
+
+def test_visualizations_load_on_demand():
+    import gnss_localization
+
+    assert callable(gnss_localization.plot_headings)
+    assert callable(gnss_localization.animate_projections)
+    with pytest.raises(AttributeError):
+        gnss_localization.plot_nothing
+
+
+def test_pandas_import_is_profiled_apart():
+    code = (
+        "from gnss_localization.pipeline import import_pandas\n"
+        "from gnss_localization.profiling import Profiler\n"
+        "profiler = Profiler()\n"
+        "import_pandas(profiler)\n"
+        "import_pandas(profiler)\n"
+        "print(profiler.stages['import']['calls'])\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "1"
@@ -0,0 +1,137 @@
+import pytest
+import numpy as np
+from functools import reduce
+
+from gnss_localization.binary_io import load_records, records_view
+from gnss_localization.nmea import NMEAParser, read_nmea
+from gnss_localization.pipeline import prepare_inputs, run_projections
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+
+
+def sentence(body: str) -> str:
+    checksum = reduce(lambda value, char: value ^ ord(char), body, 0)
+    return f"${body}*{checksum:02X}\r\n"
+
+
+def nmea_degrees(value: float, width: int) -> str:
+    degrees = int(abs(value))
+    return f"{degrees:0{width}d}{(abs(value) - degrees) * 60:07.4f}"
+
+
+@pytest.fixture
+def track():
+    n_epochs = 500
+    seconds = 23 * 3600 + 59 * 60 + np.arange(n_epochs) * 0.5
+    lat = 55.75 + np.arange(n_epochs) * 1e-5
+    lon = -37.6 - np.arange(n_epochs) * 2e-5
+    alt = 150 + np.sin(np.arange(n_epochs) / 10)
+    yaw = np.arange(n_epochs) * 0.7 % 360
+    return seconds % 86400, lat, lon, alt, yaw
+
+
+@pytest.fixture
+def nmea_path(tmp_path, track):
+    lines = [sentence("GPHDT,999.0,T")]
+    for second, lat, lon, alt, yaw in zip(*track):
+        hours, rest = divmod(second, 3600)
+        time = f"{int(hours):02d}{int(rest // 60):02d}{rest % 60:05.2f}"
+        lat_text = f"{nmea_degrees(lat, 2)},{'N' if lat >= 0 else 'S'}"
+        lon_text = f"{nmea_degrees(lon, 3)},{'E' if lon >= 0 else 'W'}"
+        gga = f"GPGGA,{time},{lat_text},{lon_text},4,12,0.8,{alt:.3f},M,14.0,M,,"
+        lines.append(sentence(gga))
+        lines.append(sentence(f"GPRMC,{time},A,{lat_text},{lon_text},1.0,0.0,010121,,"))
+        lines.append(sentence(f"GPHDT,{yaw:.2f},T"))
+    lines.insert(10, "$GPHDT,1.0,T*00\r\n")
+    lines.insert(20, sentence("GPGGA,000000.00,,,,,0,0,,,M,,M,,"))
+    path = tmp_path / "track.nmea"
+    path.write_text("".join(lines))
+    return path
+
+
+def test_read_nmea(nmea_path, track):
+    seconds, lat, lon, alt, yaw = track
+    parser = NMEAParser()
+    data = parser.feed(nmea_path.read_bytes(), final=True)
+
+    assert parser.invalid_sentences == 1
+    assert len(data) == len(seconds)
+    assert np.allclose(np.diff(data["time_s"]), 0.5)
+    assert np.allclose(data["yaw_deg"], np.round(yaw, 2))
+    assert np.allclose(data["z_mm"], (alt - alt[0]) * 1000, atol=1)
+    # 1e-5 degrees of latitude are about 1.1 m, longitude shrinks with cos(lat)
+    assert np.allclose(np.diff(data["y_mm"]), 1113, rtol=1e-2)
+    assert np.allclose(
+        np.diff(data["x_mm"]), -2 * 1113 * np.cos(np.deg2rad(55.75)), rtol=1e-2
+    )
+    assert not data[["roll_deg", "pitch_deg"]].to_numpy().any()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 50])
+def test_read_nmea_chunks(nmea_path, chunk_size):
+    expected = read_nmea(nmea_path)
+    chunks = list(read_nmea(nmea_path, chunk_size=chunk_size))
+    assert len(chunks) > 1
+    for column in expected:
+        assert np.array_equal(
+            np.concatenate([chunk[column] for chunk in chunks]), expected[column]
+        )
+
+
+def test_nmea_projections(nmea_path, tmp_path):
+    data = read_nmea(nmea_path)
+    inputs = prepare_inputs(data, ["roll_deg", "pitch_deg"])
+    expected = GNSSProjectionEstimator(0, 0, 1500).predict(inputs)
+    projections = run_projections(
+        nmea_path,
+        tmp_path / "out.npy",
+        GNSSProjectionEstimator(0, 0, 1500),
+        ["roll_deg", "pitch_deg"],
+        chunk_size=100,
+    )
+    assert projections is None
+    assert np.array_equal(
+        records_view(load_records(tmp_path / "out.npy"), ("x_mm", "y_mm", "z_mm")),
+        expected,
+    )
+
+
+def test_position_source_per_epoch(tmp_path):
+    position = "5545.0000,N,03736.0000,W"
+    lines = [
+        sentence(f"GPRMC,1200{second:02d}.00,A,{position},1.0,0.0,010121,,")
+        for second in range(3)
+    ]
+    for second in range(3, 6):
+        time = f"1200{second:02d}.00"
+        lines.append(sentence(f"GPRMC,{time},A,{position},1.0,0.0,010121,,"))
+        lines.append(sentence(f"GPGGA,{time},{position},4,12,0.8,150.0,M,14.0,M,,"))
+        lines.append(sentence(f"GPHDT,{second}.0,T"))
+    path = tmp_path / "mixed.nmea"
+    path.write_text("".join(lines))
+
+    data = read_nmea(path)
+    assert np.array_equal(data["time_s"], 43200 + np.arange(6))
+    assert np.array_equal(data["z_mm"], [0, 0, 0, 150000, 150000, 150000])
+    assert np.array_equal(data["yaw_deg"], [np.nan] * 3 + [3, 4, 5], equal_nan=True)
+    for chunk_size in (1, 2):
+        chunks = list(read_nmea(path, chunk_size=chunk_size))
+        for column in data:
+            assert np.array_equal(
+                np.concatenate([chunk[column] for chunk in chunks]),
+                data[column],
+                equal_nan=True,
+            )
+
+
+def test_lines_without_positions_are_consumed():
+    parser = NMEAParser()
+    heading = sentence("GPHDT,10.0,T").encode()
+    for _ in range(200):
+        assert not len(parser.feed(heading * 10 + heading[:5]))
+        assert len(parser._pending) < 2 * len(heading)
+    gga = sentence("GPGGA,120000.00,5545.0,N,03736.0,W,4,12,0.8,1.0,M,,M,,")
+    parser.feed(heading[5:] + gga.encode())
+    data = parser.feed(b"", final=True)
+    # partial lines are glued to the first heading of the next block
+    assert parser.invalid_sentences == 199
+    assert np.array_equal(data["yaw_deg"], [10.0])
@@ -0,0 +1,181 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from gnss_localization.heading_estimator import GNSSHeadingEstimator
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+from gnss_localization.binary_io import (
+    load_columns,
+    load_records,
+    records_view,
+    save_columns,
+    save_records,
+)
+from gnss_localization.pipeline import (
+    PROJECTION_COLUMNS,
+    run_headings,
+    run_pipeline,
+    run_projections,
+)
+from gnss_localization.profiling import Profiler
+
+MISSING = ["z_mm", "yaw_deg"]
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    rng = np.random.default_rng(3)
+    n_samples = 1000
+    data = pd.DataFrame(
+        {
+            "time_s": np.arange(n_samples) * 0.1,
+            "x_mm": np.cumsum(rng.normal(100, 10, n_samples)),
+            "y_mm": np.cumsum(rng.normal(50, 10, n_samples)),
+            "roll_deg": rng.normal(0, 3, n_samples),
+            "pitch_deg": rng.normal(0, 3, n_samples),
+        }
+    )
+    path = tmp_path / "data.csv"
+    data.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000, 5000])
+def test_chunked_projections(data_path, tmp_path, chunk_size):
+    estimator = GNSSProjectionEstimator(0, 0, 1500)
+    run_projections(data_path, tmp_path / "full.csv", estimator, MISSING)
+    run_projections(data_path, tmp_path / "chunk.csv", estimator, MISSING, chunk_size)
+    assert (tmp_path / "full.csv").read_text() == (tmp_path / "chunk.csv").read_text()
+
+
+@pytest.mark.parametrize("chunk_size", [None, 7])
+def test_all_zero_data(tmp_path, chunk_size):
+    data = pd.DataFrame(
+        np.zeros((20, 4)), columns=["x_mm", "y_mm", "roll_deg", "pitch_deg"]
+    )
+    data.to_csv(tmp_path / "zero.csv", index=False)
+    estimators = [
+        GNSSVehicleCoordinatesEstimator(0, 0, 1500),
+        GNSSHeadingEstimator(0, 0, 1500, None),
+    ]
+    for run, args in (
+        (run_projections, [GNSSProjectionEstimator(0, 0, 1500)]),
+        (run_headings, estimators),
+    ):
+        with pytest.raises(ValueError, match="all zero"):
+            run(tmp_path / "zero.csv", tmp_path / "out.csv", *args, MISSING, chunk_size)
+        assert not (tmp_path / "out.csv").exists()
+
+    # a zero chunk is fine as long as the rest of the data is not
+    data.loc[15:, "x_mm"] = 1.0
+    data.to_csv(tmp_path / "zero.csv", index=False)
+    estimator = GNSSProjectionEstimator(0, 0, 1500)
+    run_projections(tmp_path / "zero.csv", tmp_path / "full.csv", estimator, MISSING)
+    run_projections(tmp_path / "zero.csv", tmp_path / "out.csv", estimator, MISSING, 7)
+    assert (tmp_path / "full.csv").read_text() == (tmp_path / "out.csv").read_text()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000, 5000])
+def test_chunked_headings(data_path, tmp_path, chunk_size):
+    for output, size in (("full.csv", None), ("chunk.csv", chunk_size)):
+        run_headings(
+            data_path,
+            tmp_path / output,
+            GNSSVehicleCoordinatesEstimator(0, 0, 1500),
+            GNSSHeadingEstimator(0, 0, 1500, north_direction=None),
+            MISSING,
+            size,
+        )
+    assert (tmp_path / "full.csv").read_text() == (tmp_path / "chunk.csv").read_text()
+
+
+@pytest.mark.parametrize("chunk_size", [None, 64])
+@pytest.mark.parametrize("suffix", [".npy", ".npz"])
+def test_binary_io(data_path, tmp_path, suffix, chunk_size):
+    data = pd.read_csv(data_path)
+    binary_path = tmp_path / f"data{suffix}"
+    if suffix == ".npy":
+        save_records(binary_path, data.to_numpy(), tuple(data.columns))
+    else:
+        save_columns(binary_path, data.to_numpy(), tuple(data.columns))
+    output_path = tmp_path / ("out.npy" if chunk_size else f"out{suffix}")
+
+    estimator = GNSSProjectionEstimator(0, 0, 1500)
+    expected = run_projections(data_path, tmp_path / "out.csv", estimator, MISSING)
+    run_projections(binary_path, output_path, estimator, MISSING, chunk_size)
+
+    if output_path.suffix == ".npy":
+        records = load_records(output_path)
+        assert records.dtype.names == PROJECTION_COLUMNS
+        projections = records_view(records, PROJECTION_COLUMNS)
+        assert np.shares_memory(projections, records)
+    else:
+        projections, names = load_columns(output_path)
+        assert names == PROJECTION_COLUMNS
+    assert np.array_equal(projections, expected)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 300])
+def test_profiled_headings(data_path, tmp_path, chunk_size):
+    events = []
+    profiler = Profiler(callback=lambda name, event: events.append(name))
+    run_headings(
+        data_path,
+        tmp_path / "headings.csv",
+        GNSSVehicleCoordinatesEstimator(0, 0, 1500),
+        GNSSHeadingEstimator(0, 0, 1500, north_direction=None),
+        MISSING,
+        chunk_size,
+        profiler=profiler,
+    )
+
+    for stage in ("read", "prepare", "coordinates", "headings", "write"):
+        assert profiler.stages[stage]["rows"] in (999, 1000)
+        assert profiler.stages[stage]["seconds"] > 0
+    assert events == [event["stage"] for event in profiler.events]
+    summary = profiler.summary().splitlines()
+    assert [line.split()[0] for line in summary[1:-1]] == list(profiler.stages)
+    profiler.save(tmp_path / "trace.json")
+    assert (tmp_path / "trace.json").exists()
+
+
+@pytest.mark.parametrize("chunk_size", [None, 7, 1000])
+def test_single_pass_pipeline(data_path, tmp_path, chunk_size):
+    run_projections(
+        data_path,
+        tmp_path / "projections.csv",
+        GNSSProjectionEstimator(0, 0, 1500),
+        MISSING,
+    )
+    run_headings(
+        data_path,
+        tmp_path / "headings.csv",
+        GNSSVehicleCoordinatesEstimator(0, 0, 1500),
+        GNSSHeadingEstimator(0, 0, 1500, north_direction=None),
+        MISSING,
+    )
+    for separate in (False, True):
+        run_pipeline(
+            data_path,
+            tmp_path / "all.csv",
+            GNSSVehicleCoordinatesEstimator(0, 0, 1500),
+            GNSSHeadingEstimator(0, 0, 1500, north_direction=None),
+            MISSING,
+            chunk_size,
+            separate=separate,
+        )
+
+    combined = pd.read_csv(tmp_path / "all.csv")
+    projections = pd.read_csv(tmp_path / "projections.csv")
+    headings = pd.read_csv(tmp_path / "headings.csv")
+    np.testing.assert_allclose(combined.iloc[:, :3], projections)
+    assert np.isnan(combined["angle"][0])
+    np.testing.assert_allclose(combined["angle"][1:], headings["angle"])
+    pd.testing.assert_frame_equal(
+        pd.read_csv(tmp_path / "all-projections.csv"), projections
+    )
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "all-headings.csv"), headings)
+    np.testing.assert_allclose(
+        pd.read_csv(tmp_path / "all-coordinates.csv"), combined.iloc[:, 3:6]
+    )
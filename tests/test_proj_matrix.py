@@ -1,7 +1,12 @@
 import pytest
 import numpy as np
 
-from gnss_localization.projection_matrix import build_projection_matrix
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.projection_matrix import (
+    build_projection_matrix,
+    build_projection_matrices,
+    rotate_vector,
+)
 
 
 @pytest.fixture
@@ -46,3 +51,56 @@ def test_matrix_projection(coords, data_samples):
         ]
     ).reshape(-1, 3)
     assert np.mean(coords_from_matrix[:, :2] - coords_from_triangles) < 1e-8
+
+
+@pytest.fixture
+def random_attitudes():
+    rng = np.random.default_rng(0)
+    return rng.uniform(-np.pi, np.pi, size=(100, 3))
+
+
+def test_batched_matrices(random_attitudes):
+    expected = np.asanyarray(
+        [build_projection_matrix(r, p, y) for r, p, y in random_attitudes]
+    )
+    matrices = build_projection_matrices(*random_attitudes.T)
+    assert matrices.shape == (len(random_attitudes), 3, 3)
+    assert np.allclose(matrices, expected)
+
+
+@pytest.mark.parametrize("vector", [[0, 0, 1500], [120, -40, 1500], [1, 2, 3]])
+def test_rotate_vector(vector, random_attitudes):
+    expected = build_projection_matrices(*random_attitudes.T) @ np.array(vector)
+    assert np.allclose(rotate_vector(*random_attitudes.T, vector), expected)
+
+    per_row = np.tile(vector, (len(random_attitudes), 1))
+    assert np.allclose(rotate_vector(*random_attitudes.T, per_row), expected)
+
+
+def test_projection_estimator_matches_matrices(random_attitudes):
+    estimator = GNSSProjectionEstimator(offset_x=10, offset_y=-20, offset_z=1500)
+    inputs = np.hstack([np.zeros((len(random_attitudes), 3)), random_attitudes])
+    expected = np.asanyarray(
+        [
+            build_projection_matrix(r, p, y) @ estimator.gnss_vector
+            for r, p, y in random_attitudes
+        ]
+    ).reshape(-1, 3)
+    assert np.allclose(estimator.predict(inputs), expected)
+    assert np.allclose(estimator.predict(list(inputs[0])), expected[:1])
+
+
+@pytest.mark.parametrize("constant", [(0,), (2,), (0, 2), (0, 1, 2)])
+def test_rotate_vector_scalar_angles(constant, random_attitudes):
+    angles = random_attitudes.copy()
+    angles[:, list(constant)] = 0.0
+    expected = rotate_vector(*angles.T, [120, -40, 1500])
+    scalar_angles = [0.0 if i in constant else angles[:, i] for i in range(3)]
+    out = np.empty((len(angles), 3))
+    rotate_vector(*scalar_angles, [120, -40, 1500], out=out)
+    np.testing.assert_allclose(out, expected, rtol=0, atol=1e-9)
+    # a constant non-zero angle is rotated as well
+    scalar_angles[constant[0]] = 0.3
+    angles[:, constant[0]] = 0.3
+    rotate_vector(*scalar_angles, [120, -40, 1500], out=out)
+    np.testing.assert_allclose(out, rotate_vector(*angles.T, [120, -40, 1500]))
@@ -0,0 +1,81 @@
+import pytest
+import numpy as np
+
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.projection_matrix import rotate_vector
+from gnss_localization.rotation_cache import RotationCache
+
+VECTOR = np.array([120.0, -40.0, 1500.0])
+
+
+def slow_attitudes(n_samples, seed):
+    """Attitude at 0.01 degree sensor resolution drifting slowly"""
+    rng = np.random.default_rng(seed)
+    angles = np.cumsum(rng.normal(0, 0.003, size=(n_samples, 3)), axis=0)
+    return np.deg2rad(np.round(angles, 2))
+
+
+@pytest.mark.parametrize("scale", [1.0, 1e4])
+def test_rotations_of_quantized_angles(scale):
+    # the large scale does not fit into packed keys
+    angles = slow_attitudes(2000, 0) * scale
+    cache = RotationCache(resolution=1e-4)
+    result = cache.rotate(*angles.T, VECTOR)
+
+    quantized = np.rint(angles / 1e-4) * 1e-4
+    np.testing.assert_allclose(result, rotate_vector(*quantized.T, VECTOR), atol=1e-9)
+    if scale == 1.0:
+        bound = np.linalg.norm(VECTOR) * 1e-4 * np.sqrt(3) / 2
+        assert np.abs(result - rotate_vector(*angles.T, VECTOR)).max() <= bound
+    distinct = len(np.unique(np.rint(angles / 1e-4), axis=0))
+    assert cache.evaluated == distinct
+    assert cache.hit_rate == pytest.approx(1 - distinct / len(angles))
+
+
+def test_scalar_angles_outside_of_key():
+    cache = RotationCache(resolution=1e-9)
+    result = cache.rotate(0.1, 0.2, 3.0, VECTOR)
+
+    quantized = np.rint(np.array([0.1, 0.2, 3.0]) / 1e-9) * 1e-9
+    assert result.shape == (1, 3)
+    np.testing.assert_allclose(result, rotate_vector(*quantized[:, None], VECTOR))
+
+
+def test_lru_between_calls():
+    angles = slow_attitudes(1000, 1)
+    distinct = len(np.unique(np.rint(angles / 1e-4), axis=0))
+    cache = RotationCache(resolution=1e-4, max_size=distinct)
+    first = cache.rotate(*angles.T, VECTOR)
+    second = cache.rotate(*angles.T, VECTOR)
+    np.testing.assert_array_equal(first, second)
+    assert cache.evaluated == distinct
+    assert cache.stats()["size"] == distinct
+
+    # single samples take the scalar path and agree with the batch
+    for sample, expected in zip(angles[:50], first[:50]):
+        np.testing.assert_array_equal(cache.rotate(*sample, VECTOR)[0], expected)
+    assert cache.evaluated == distinct
+
+    # the oldest matrices are evicted, a pass over the track rebuilds them
+    small = RotationCache(resolution=1e-4, max_size=10)
+    for _ in range(2):
+        for chunk in np.array_split(angles, 200):
+            small.rotate(*chunk.T, VECTOR)
+    assert small.stats()["size"] == 10
+    assert small.evaluated > 1.5 * distinct
+
+
+def test_estimator_with_cache():
+    rng = np.random.default_rng(2)
+    inputs = np.hstack([rng.normal(0, 1e4, size=(500, 3)), slow_attitudes(500, 2)])
+    exact = GNSSProjectionEstimator(120, -40, 1500)
+    cached = GNSSProjectionEstimator(120, -40, 1500, RotationCache(1e-4))
+    out = np.empty((500, 3))
+    result = cached.predict(inputs, out=out)
+    assert result is out
+    np.testing.assert_allclose(result, exact.predict(inputs), atol=0.2)
+    np.testing.assert_allclose(
+        cached.predict(inputs[0].tolist()), result[:1], rtol=0, atol=1e-12
+    )
+    with pytest.raises(ValueError):
+        RotationCache(resolution=0)
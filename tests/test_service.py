@@ -0,0 +1,127 @@
+import asyncio
+import struct
+
+import pytest
+import numpy as np
+
+from gnss_localization.heading_estimator import GNSSHeadingEstimator, compute_headings
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+from gnss_localization.service import (
+    OP_COORDINATES,
+    OP_HEADING,
+    OP_PROJECTION,
+    REQUEST,
+    EstimatorService,
+    MicroBatcher,
+    ServiceClient,
+)
+
+NORTH = (0.0, 1.0, 0.0)
+
+
+def make_service(**kwargs):
+    return EstimatorService(
+        GNSSProjectionEstimator(0, 0, 1500),
+        GNSSVehicleCoordinatesEstimator(0, 0, 1500),
+        GNSSHeadingEstimator(0, 0, 1500, north_direction=NORTH),
+        **kwargs,
+    )
+
+
+async def with_client(service, body):
+    server = await service.start(port=0)
+    port = server.sockets[0].getsockname()[1]
+    client = await ServiceClient.connect(port=port)
+    try:
+        return await body(client)
+    finally:
+        await client.close()
+        server.close()
+        await server.wait_closed()
+        await service.stop()
+
+
+def test_concurrent_requests_are_batched():
+    rng = np.random.default_rng(0)
+    inputs = np.hstack(
+        [rng.normal(0, 1000, size=(200, 3)), rng.normal(0, 0.1, size=(200, 3))]
+    )
+    coord_estimator = GNSSVehicleCoordinatesEstimator(0, 0, 1500)
+    vehicle_coordinates = coord_estimator.predict(inputs)
+    origins = np.roll(vehicle_coordinates, 1, axis=0)
+    service = make_service(max_wait=0.01)
+
+    async def body(client):
+        return await asyncio.gather(
+            *(client.projection(sample) for sample in inputs),
+            *(client.coordinates(sample) for sample in inputs),
+            *(client.heading(*pair) for pair in zip(inputs, origins)),
+        )
+
+    results = asyncio.run(with_client(service, body))
+    projections = np.vstack(results[:200])
+    coordinates = np.vstack(results[200:400])
+    headings = np.vstack(results[400:])
+    np.testing.assert_allclose(
+        projections, GNSSProjectionEstimator(0, 0, 1500).predict(inputs)
+    )
+    np.testing.assert_allclose(coordinates, vehicle_coordinates)
+    np.testing.assert_allclose(headings[:, :3], vehicle_coordinates)
+    expected = compute_headings(vehicle_coordinates - origins, NORTH)
+    np.testing.assert_allclose(headings[:, 3], expected)
+    for operation in (OP_PROJECTION, OP_COORDINATES, OP_HEADING):
+        batcher = service.batchers[operation]
+        assert batcher.requests == 200
+        assert batcher.batches < 20
+
+
+def test_errors():
+    with pytest.raises(ValueError, match="north vector"):
+        EstimatorService(
+            GNSSProjectionEstimator(0, 0, 1500),
+            GNSSVehicleCoordinatesEstimator(0, 0, 1500),
+            GNSSHeadingEstimator(0, 0, 1500, north_direction=None),
+        )
+
+    async def body(client):
+        result = await client.projection(np.zeros(6))
+        # the size of an unknown operation is unknown, the connection is closed
+        client._writer.write(REQUEST.pack(7, 42, 1) + struct.pack("<d", 0.0))
+        with pytest.raises(ConnectionError):
+            await client.projection(np.zeros(6))
+        return result
+
+    result = asyncio.run(with_client(make_service(), body))
+    np.testing.assert_allclose(result, [[0, 0, 1500]])
+
+
+def test_failed_batch_fails_its_requests():
+    def function(rows):
+        if np.any(rows < 0):
+            raise ValueError("negative")
+        return rows * 2
+
+    async def body():
+        batcher = MicroBatcher(function, max_wait=0.01, max_rows=2)
+        task = asyncio.ensure_future(batcher.run())
+        results = await asyncio.gather(
+            *(batcher.submit(np.full((1, 1), value)) for value in (1, -1, 2, 3)),
+            return_exceptions=True,
+        )
+        task.cancel()
+        return results
+
+    results = asyncio.run(body())
+    assert isinstance(results[0], ValueError) and isinstance(results[1], ValueError)
+    np.testing.assert_allclose(np.vstack(results[2:]), [[4], [6]])
+
+
+def test_cancelled_request_does_not_break_client():
+    async def body(client):
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.projection(np.zeros(6)), 0.001)
+        return await asyncio.wait_for(client.coordinates(np.zeros(6)), 5)
+
+    result = asyncio.run(with_client(make_service(max_wait=0.05), body))
+    np.testing.assert_allclose(result, [[0, 0, -1500]])
@@ -0,0 +1,157 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from gnss_localization.coordinates_estimator import GNSSVehicleCoordinatesEstimator
+from gnss_localization.heading_estimator import GNSSHeadingEstimator
+from gnss_localization.pipeline import prepare_inputs, run_headings
+from gnss_localization.smoothing import GNSSTrackSmoother
+
+
+def noisy_track(n_samples, seed):
+    rng = np.random.default_rng(seed)
+    times = np.cumsum(rng.uniform(0.05, 0.2, n_samples))
+    times[10] = times[9]
+    truth = np.column_stack(
+        [np.sin(times / 10) * 1e5, np.cos(times / 7) * 1e5, times * 10]
+    )
+    return times, truth, truth + rng.normal(0, 50, size=(n_samples, 3))
+
+
+def reference(smoother, times, measurements):
+    """Textbook filter and Rauch-Tung-Striebel pass with matrices per sample"""
+    q, r = smoother.acceleration_noise**2, smoother.measurement_noise**2
+    means = [np.array([measurements[0], np.zeros(3)])]
+    covariances = [np.diag([r, smoother.speed_noise**2])]
+    predictions, transitions = [None], [None]
+    for k in range(1, len(times)):
+        dt = times[k] - times[k - 1]
+        f = np.array([[1, dt], [0, 1]])
+        noise = q * np.array([[dt**3 / 3, dt**2 / 2], [dt**2 / 2, dt]])
+        mean, covariance = f @ means[-1], f @ covariances[-1] @ f.T + noise
+        gain = covariance[:, 0] / (covariance[0, 0] + r)
+        predictions.append(covariance)
+        transitions.append(f)
+        means.append(mean + np.outer(gain, measurements[k] - mean[0]))
+        covariances.append(covariance - np.outer(gain, covariance[0]))
+    smoothed = means[:]
+    for k in reversed(range(len(times) - 1)):
+        gain = covariances[k] @ transitions[k + 1].T @ np.linalg.inv(predictions[k + 1])
+        smoothed[k] = means[k] + gain @ (
+            smoothed[k + 1] - transitions[k + 1] @ means[k]
+        )
+    return np.array(means), np.array(smoothed)
+
+
+@pytest.mark.parametrize("n_samples", [1, 2, 50, 1001])
+def test_matches_reference(n_samples):
+    times, truth, measurements = noisy_track(max(n_samples, 11), 0)
+    times, truth, measurements = (
+        times[:n_samples],
+        truth[:n_samples],
+        measurements[:n_samples],
+    )
+    smoother = GNSSTrackSmoother()
+    filtered, smoothed = reference(smoother, times, measurements)
+
+    positions, velocities = smoother.smooth(times, measurements)
+    np.testing.assert_allclose(positions, smoothed[:, 0], rtol=0, atol=1e-6)
+    np.testing.assert_allclose(velocities, smoothed[:, 1], rtol=0, atol=1e-6)
+
+    chunks = [
+        smoother.filter(t, m)
+        for t, m in zip(np.array_split(times, 3), np.array_split(measurements, 3))
+    ]
+    np.testing.assert_allclose(
+        np.vstack([chunk[0] for chunk in chunks]), filtered[:, 0], rtol=0, atol=1e-6
+    )
+    smoother.reset()
+    for time, measured, expected in zip(times, measurements, filtered):
+        np.testing.assert_allclose(
+            smoother.update(time, *measured), expected[0], rtol=0, atol=1e-6
+        )
+        np.testing.assert_allclose(smoother.velocity, expected[1], rtol=0, atol=1e-6)
+
+
+def test_noise_is_reduced():
+    times, truth, measurements = noisy_track(5000, 1)
+    smoother = GNSSTrackSmoother()
+    positions, _ = smoother.smooth(times, measurements)
+    assert np.std(positions - truth) < 0.7 * np.std(measurements - truth)
+    with pytest.raises(ValueError):
+        smoother.smooth(times[::-1], measurements)
+    with pytest.raises(ValueError):
+        GNSSTrackSmoother(measurement_noise=0)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 64])
+def test_smoothed_headings(tmp_path, chunk_size):
+    times, truth, measurements = noisy_track(500, 2)
+    data = pd.DataFrame(
+        {
+            "time_s": times,
+            "x_mm": measurements[:, 0],
+            "y_mm": measurements[:, 1],
+            "roll_deg": np.zeros(len(times)),
+            "pitch_deg": np.zeros(len(times)),
+        }
+    )
+    data.to_csv(tmp_path / "data.csv", index=False)
+    missing = ["z_mm", "yaw_deg"]
+    coord_estimator = GNSSVehicleCoordinatesEstimator(0, 0, 1500)
+    heading_estimator = GNSSHeadingEstimator(0, 0, 1500, north_direction=(0, 1, 0))
+    smoother = GNSSTrackSmoother()
+    run_headings(
+        tmp_path / "data.csv",
+        tmp_path / "headings.csv",
+        coord_estimator,
+        heading_estimator,
+        missing,
+        chunk_size,
+        smoother=smoother,
+    )
+
+    vehicle_coordinates = coord_estimator.predict(prepare_inputs(data, missing))
+    if chunk_size is None:
+        expected, _ = GNSSTrackSmoother().smooth(times, vehicle_coordinates)
+    else:
+        expected, _ = GNSSTrackSmoother().filter(times, vehicle_coordinates)
+    headings = pd.read_csv(tmp_path / "headings.csv")["angle"].to_numpy()
+    np.testing.assert_allclose(
+        headings, heading_estimator.predict(expected), rtol=0, atol=1e-6
+    )
+
+
+def test_smoothed_north_matches_chunked(tmp_path):
+    times, _, measurements = noisy_track(500, 3)
+    pd.DataFrame(
+        {
+            "time_s": times,
+            "x_mm": measurements[:, 0],
+            "y_mm": measurements[:, 1],
+            "z_mm": measurements[:, 2],
+        }
+    ).to_csv(tmp_path / "data.csv", index=False)
+    missing = ["roll_deg", "pitch_deg", "yaw_deg"]
+    headings, norths = {}, {}
+    for chunk_size in [None, 64]:
+        heading_estimator = GNSSHeadingEstimator(0, 0, 0, north_direction=None)
+        run_headings(
+            tmp_path / "data.csv",
+            tmp_path / f"headings-{chunk_size}.csv",
+            GNSSVehicleCoordinatesEstimator(0, 0, 0),
+            heading_estimator,
+            missing,
+            chunk_size,
+            smoother=GNSSTrackSmoother(),
+        )
+        norths[chunk_size] = heading_estimator.north_vector
+        headings[chunk_size] = pd.read_csv(tmp_path / f"headings-{chunk_size}.csv")
+
+    np.testing.assert_allclose(norths[None], norths[64], rtol=0, atol=1e-6)
+    np.testing.assert_allclose(
+        norths[None][:2], measurements[-1, :2] - measurements[0, :2], atol=1e-6
+    )
+    assert len(headings[None]) == len(headings[64]) == len(times) - 1
+    difference = np.abs(headings[None]["angle"] - headings[64]["angle"])
+    assert np.median(np.minimum(difference, 360 - difference)) < 1
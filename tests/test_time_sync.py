@@ -0,0 +1,96 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from gnss_localization.pipeline import prepare_inputs, run_projections
+from gnss_localization.projection_estimator import GNSSProjectionEstimator
+from gnss_localization.time_sync import (
+    interpolate_angles,
+    synchronize,
+    synchronize_chunks,
+)
+
+
+@pytest.fixture
+def streams():
+    rng = np.random.default_rng(7)
+    gnss_times = 100.0 + np.arange(500) * 0.1 + rng.uniform(0, 0.01, 500)
+    imu_times = 100.02 + np.arange(10_000) * 0.005
+    positions = pd.DataFrame(
+        {
+            "time_s": gnss_times,
+            "x_mm": np.cumsum(rng.normal(100, 10, 500)),
+            "y_mm": np.cumsum(rng.normal(50, 10, 500)),
+        }
+    )
+    attitude = pd.DataFrame(
+        {
+            "time_s": imu_times,
+            "roll_deg": 3 * np.sin(imu_times),
+            "pitch_deg": 2 * np.cos(imu_times),
+            # yaw turns through north several times
+            "yaw_deg": (imu_times * 40) % 360,
+        }
+    )
+    return positions, attitude
+
+
+def test_interpolation_wraps_around():
+    angles, valid = interpolate_angles(
+        np.array([0.5, 2.5, 4.0]),
+        np.array([0.0, 1.0, 2.0, 3.0]),
+        np.array([[359.0], [1.0], [170.0], [-170.0]]),
+    )
+
+    np.testing.assert_allclose(angles[:2, 0], [0.0, -180.0])
+    np.testing.assert_array_equal(valid, [True, True, False])
+    assert np.isnan(angles[2, 0])
+
+
+def test_synchronize(streams):
+    positions, attitude = streams
+    result = synchronize(positions, attitude)
+
+    covered = positions["time_s"] >= attitude["time_s"].iloc[0]
+    assert len(result) == covered.sum()
+    np.testing.assert_allclose(
+        result["roll_deg"], 3 * np.sin(result["time_s"]), atol=1e-3
+    )
+    yaw_error = (result["yaw_deg"] - result["time_s"] * 40 + 180) % 360 - 180
+    np.testing.assert_allclose(yaw_error, 0, atol=1e-6)
+
+
+@pytest.mark.parametrize("chunk_sizes", [(1, 1), (7, 300), (64, 13), (1000, 20_000)])
+def test_synchronize_chunks(streams, chunk_sizes):
+    positions, attitude = streams
+    position_size, attitude_size = chunk_sizes
+    chunks = synchronize_chunks(
+        (positions[i : i + position_size] for i in range(0, 500, position_size)),
+        (attitude[i : i + attitude_size] for i in range(0, 10_000, attitude_size)),
+    )
+
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True), synchronize(positions, attitude)
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [None, 50])
+def test_projections_with_attitude(streams, tmp_path, chunk_size):
+    positions, attitude = streams
+    positions.to_csv(tmp_path / "gnss.csv", index=False)
+    attitude.to_csv(tmp_path / "imu.csv", index=False)
+
+    run_projections(
+        tmp_path / "gnss.csv",
+        tmp_path / "projections.csv",
+        GNSSProjectionEstimator(0, 0, 1500),
+        ["z_mm"],
+        chunk_size,
+        attitude_path=tmp_path / "imu.csv",
+    )
+    projections = pd.read_csv(tmp_path / "projections.csv")
+
+    expected = GNSSProjectionEstimator(0, 0, 1500).predict(
+        prepare_inputs(synchronize(positions, attitude), ["z_mm"])
+    )
+    np.testing.assert_allclose(projections.to_numpy(), expected)
@@ -0,0 +1,42 @@
+import shutil
+
+import pytest
+import numpy as np
+from PIL import Image
+
+from gnss_localization.visualizations import plot_headings, save_projections_animation
+
+
+@pytest.fixture
+def projections():
+    rng = np.random.default_rng(6)
+    return np.cumsum(rng.normal(size=(5000, 3)), axis=0)
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_gif_animation(projections, tmp_path, jobs):
+    path = save_projections_animation(
+        projections, tmp_path / "projections.gif", max_frames=12, jobs=jobs
+    )
+
+    with Image.open(path) as animation:
+        assert animation.n_frames == 12
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is not None, reason="ffmpeg installed")
+def test_mp4_needs_ffmpeg(projections, tmp_path):
+    with pytest.raises(ValueError):
+        save_projections_animation(projections, tmp_path / "projections.mp4")
+
+
+@pytest.mark.parametrize("raster", [False, True])
+def test_plot_headings(projections, raster):
+    headings = np.linspace(0, 360, len(projections) - 1)
+    fig = plot_headings(projections, headings, raster=raster, bins=64)
+
+    trajectory_axes, heading_axes = fig.axes
+    assert len(trajectory_axes.images) == (2 if raster else 0)
+    assert len(trajectory_axes.patches) == 1
+    assert len(heading_axes.collections if raster else heading_axes.lines) == 1
+    if raster:
+        assert trajectory_axes.images[0].get_array().shape == (64, 64)